@@ -33,6 +33,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'habilitations_app.profiling.ProfilingMiddleware',  # Inactif sauf PROFILING_ENABLED
     'habilitations_app.middleware.MultiTenantMiddleware',  # Isolation multi-tenant B2B2C
 ]
 
@@ -56,11 +57,60 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Base de données : DB_ENGINE=sqlite (défaut, petites installations) ou postgresql
+# (pilote psycopg à installer). Connexions persistantes DB_CONN_MAX_AGE secondes
+# (0 = une connexion par requête), vérifiées avant réutilisation.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+# SQLite : attente (millisecondes) d'un verrou d'écriture avant « database is locked »
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+if DB_ENGINE in ('postgresql', 'postgres'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'habilitations'),
+            'USER': os.environ.get('DB_USER', 'habilitations'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+                'application_name': 'habilitations',
+                # Garde-fous posés à l'ouverture de session (millisecondes, 0 = illimité)
+                'options': (
+                    f"-c statement_timeout={int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))} "
+                    f"-c idle_in_transaction_session_timeout={int(os.environ.get('DB_IDLE_TX_TIMEOUT_MS', 60000))}"
+                ),
+            },
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+            },
+        }
+    }
+
+# Pragmas SQLite posés à chaque nouvelle connexion (habilitations_app/db.py) : WAL
+# (lecteurs et écrivain concurrents), synchronous=NORMAL (fsync au checkpoint seulement),
+# mmap et cache de pages (KiB) pour les lectures
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'normal'),
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024)),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 20000)),
+    'temp_store': 'memory',
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -91,4 +141,68 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = 'bootstrap5'
 CRISPY_TEMPLATE_PACK = 'bootstrap5'
 
 # Email configuration (à adapter selon votre serveur)
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Pour tester l'outbox sans SMTP : EMAIL_BACKEND=django.core.mail.backends.filebased.EmailBackend
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH', str(BASE_DIR / 'media' / 'emails'))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'no-reply@oxalis.local')
+
+# Durée (secondes) du cache process-local de résolution hôte → tenant
+TENANT_CACHE_TTL = int(os.environ.get('TENANT_CACHE_TTL', 300))
+
+# Nombre maximum d'hôtes gardés dans ce cache (LRU ; l'en-tête Host vient du client)
+TENANT_CACHE_MAX_SIZE = int(os.environ.get('TENANT_CACHE_MAX_SIZE', 1000))
+
+# Import CSV : nombre de lignes traitées par lot (une transaction par lot)
+CSV_IMPORT_BATCH_SIZE = 500
+
+# File de jobs de fond (manage.py run_workers)
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 2))
+# Le worker signale toutes les JOB_HEARTBEAT_INTERVAL secondes que son job tourne encore ;
+# un job 'en_cours' sans signal depuis JOB_STALE_TIMEOUT secondes est considéré abandonné et remis en file
+JOB_HEARTBEAT_INTERVAL = int(os.environ.get('JOB_HEARTBEAT_INTERVAL', 30))
+JOB_STALE_TIMEOUT = int(os.environ.get('JOB_STALE_TIMEOUT', 300))
+
+# Rendu PDF en lot : processus du pool (défaut : nombre de CPU) et titres par tâche
+PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', 0)) or None
+PDF_RENDER_CHUNK_SIZE = 50
+# api/titres/pdf/ : au-delà de ce nombre de titres, le lot part en job de fond (rendu hors worker web)
+PDF_BATCH_SYNC_MAX = int(os.environ.get('PDF_BATCH_SYNC_MAX', 50))
+
+# Cache disque des PDF de titres (clé = empreinte des champs rendus + version du gabarit)
+TITRE_PDF_CACHE_DIR = os.path.join(MEDIA_ROOT, 'titres_pdf')
+
+# Durée (secondes) du cache process-local des sessions par formateur (moteur de périmètre)
+SCOPE_CACHE_TTL = int(os.environ.get('SCOPE_CACHE_TTL', 60))
+
+# Durée (secondes) du cache process-local de l'index de planning des formateurs
+PLANNING_CACHE_TTL = int(os.environ.get('PLANNING_CACHE_TTL', 60))
+
+# Scan des expirations (manage.py scan_expirations) : délai de planification des
+# renouvellements avant échéance et taille des lots
+RENOUVELLEMENT_HORIZON_JOURS = int(os.environ.get('RENOUVELLEMENT_HORIZON_JOURS', 90))
+EXPIRATION_SCAN_BATCH_SIZE = int(os.environ.get('EXPIRATION_SCAN_BATCH_SIZE', 1000))
+
+# Outbox (manage.py dispatch_outbox) : taille des lots, nouvelles tentatives
+# (délai = OUTBOX_RETRY_BASE_DELAY * 2^tentatives secondes) et débit max par tenant
+OUTBOX_BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', 100))
+OUTBOX_MAX_TENTATIVES = int(os.environ.get('OUTBOX_MAX_TENTATIVES', 5))
+OUTBOX_RETRY_BASE_DELAY = int(os.environ.get('OUTBOX_RETRY_BASE_DELAY', 60))
+OUTBOX_TENANT_RATE_LIMIT = int(os.environ.get('OUTBOX_TENANT_RATE_LIMIT', 60))  # emails/minute, 0 = illimité
+# Un message 'en_cours' depuis plus longtemps (dispatcher interrompu) est remis en file
+OUTBOX_STALE_TIMEOUT = int(os.environ.get('OUTBOX_STALE_TIMEOUT', 1800))
+
+# Pagination par curseur : durée (secondes) du cache process-local des totaux de liste
+KEYSET_COUNT_CACHE_TTL = int(os.environ.get('KEYSET_COUNT_CACHE_TTL', 60))
+
+# Autocomplétion (api/autocomplete/) : durée (secondes) des index de préfixes
+# process-locaux, nombre max d'index (un par source et périmètre) et taille du cache LRU
+AUTOCOMPLETE_CACHE_TTL = int(os.environ.get('AUTOCOMPLETE_CACHE_TTL', 120))
+AUTOCOMPLETE_MAX_INDEXES = int(os.environ.get('AUTOCOMPLETE_MAX_INDEXES', 64))
+AUTOCOMPLETE_LRU_SIZE = int(os.environ.get('AUTOCOMPLETE_LRU_SIZE', 512))
+
+# Profilage des vues (requêtes SQL, temps, N+1) : voir api/perf/ et manage.py perf_report.
+# Tampon circulaire en mémoire ; PROFILING_LOG_FILE (JSONL) pour l'analyse hors processus
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '0') == '1'
+PROFILING_BUFFER_SIZE = int(os.environ.get('PROFILING_BUFFER_SIZE', 2000))
+PROFILING_LOG_FILE = os.environ.get('PROFILING_LOG_FILE', '')
@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from .models import (
     Entreprise, Habilitation, Stagiaire, Formation, 
-    ValidationCompetence, Titre, AvisFormation, 
+    ValidationCompetence, CompetenceItem, Titre, AvisFormation, 
     RenouvellementHabilitation, Journal,
     DemandeStagiaire, SessionFormation, ProfilUtilisateur,
     DemandeFormation,
@@ -81,6 +81,15 @@ class ValidationCompetenceAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(CompetenceItem)
+class CompetenceItemAdmin(admin.ModelAdmin):
+    list_display = ['titre', 'type_competence', 'habilitation', 'specialisation', 'ordre', 'actif']
+    list_filter = ['type_competence', 'actif', 'habilitation']
+    search_fields = ['titre', 'habilitation__code', 'specialisation__code']
+    # Référentiel compilé depuis les champs texte savoirs / savoirs_faire : lecture seule
+    readonly_fields = ['habilitation', 'specialisation', 'type_competence', 'titre', 'ordre', 'actif']
+
+
 @admin.register(Titre)
 class TitreAdmin(admin.ModelAdmin):
     list_display = ['numero_titre', 'stagiaire', 'habilitation', 'statut', 'date_delivrance', 'date_expiration']
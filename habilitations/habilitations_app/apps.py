@@ -1,7 +1,14 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class HabilitationsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'habilitations_app'
     verbose_name = 'Gestion des Habilitations Électriques'
+
+    def ready(self):
+        from .db import configure_connection
+
+        # Pragmas SQLite posés à l'ouverture de chaque connexion
+        connection_created.connect(configure_connection, dispatch_uid='habilitations_configure_connection')
@@ -0,0 +1,189 @@
+# habilitations_app/autocomplete.py
+"""
+Autocomplétion des champs de formulaire (api/autocomplete/<source>/)
+
+Pour chaque source ('stagiaires', 'formateurs') et chaque périmètre d'accès, un
+PrefixIndex est construit en une requête : liste triée des mots normalisés
+(voir search.normaliser) → identifiants, parcourue par bisection. Les index sont
+gardés en cache process-local AUTOCOMPLETE_CACHE_TTL secondes (au plus
+AUTOCOMPLETE_MAX_INDEXES), les réponses dans un petit cache LRU
+(AUTOCOMPLETE_LRU_SIZE entrées) ; les deux sont vidés par les signaux des modèles
+sources (voir models.py) et après les bulk_create de stagiaires.
+
+La clé d'un index est le SQL du queryset du périmètre : deux utilisateurs au
+même périmètre partagent l'index, deux périmètres différents ne se mélangent pas.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import EmptyResultSet
+
+from .search import normaliser
+
+
+# ==================== INDEX ====================
+
+class PrefixIndex:
+    """
+    Index des préfixes de mots d'une liste d'objets.
+
+    Args:
+        rows: Itérable de (pk, libellé, texte cherchable)
+    """
+
+    def __init__(self, rows):
+        self.libelles = {}
+        self.mots = {}
+        entries = []
+        for pk, libelle, texte in rows:
+            mots = tuple(set(normaliser(texte).split()))
+            self.libelles[pk] = libelle
+            self.mots[pk] = mots
+            entries.extend((mot, pk) for mot in mots)
+        entries.sort()
+        self.keys = [mot for mot, _ in entries]
+        self.pks = [pk for _, pk in entries]
+        # Rang alphabétique des libellés : ordre d'affichage des résultats
+        self.rang = {
+            pk: i for i, pk in enumerate(sorted(self.libelles, key=lambda pk: normaliser(self.libelles[pk])))
+        }
+
+    def __len__(self):
+        return len(self.libelles)
+
+    def _prefixe(self, mot):
+        # Les mots normalisés ne contiennent que [0-9a-z] : '{' suit 'z'
+        debut = bisect_left(self.keys, mot)
+        fin = bisect_left(self.keys, mot + '{', debut)
+        return set(self.pks[debut:fin])
+
+    def chercher(self, query, limit=20):
+        """[(pk, libellé)] des objets dont chaque mot cherché préfixe un mot, par ordre alphabétique"""
+        mots = sorted(set(normaliser(query).split()), key=len, reverse=True)
+        if not mots:
+            return []
+        # Le mot le plus long est le plus sélectif : bisection, puis filtrage des autres
+        candidats = self._prefixe(mots[0])
+        for mot in mots[1:]:
+            candidats = {pk for pk in candidats if any(m.startswith(mot) for m in self.mots[pk])}
+        return [(pk, self.libelles[pk]) for pk in heapq.nsmallest(limit, candidats, key=self.rang.__getitem__)]
+
+
+# ==================== SOURCES ====================
+
+Source = namedtuple('Source', 'queryset fields libelle')
+
+
+def _formateurs(scope):
+    # Même population que FormateurForm.user_id, réservée au personnel OF
+    if scope.is_global or scope.is_of_staff:
+        return User.objects.filter(profil__role='formateur')
+    return User.objects.none()
+
+
+def _libelle_formateur(first_name, last_name, username, email):
+    nom = f"{first_name} {last_name}".strip()
+    return f"{nom} ({username})" if nom else username
+
+
+SOURCES = {
+    'stagiaires': Source(
+        queryset=lambda scope: scope.stagiaires(),
+        fields=('prenom', 'nom', 'email'),
+        libelle=lambda prenom, nom, email: f"{prenom} {nom}",
+    ),
+    'formateurs': Source(
+        queryset=_formateurs,
+        fields=('first_name', 'last_name', 'username', 'email'),
+        libelle=_libelle_formateur,
+    ),
+}
+
+
+# ==================== CACHES ====================
+
+# (source, sql) → (PrefixIndex, expiration) ; (source, sql, requête, limite) → résultats
+_index_cache = OrderedDict()
+_result_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {'hits': 0, 'misses': 0, 'builds': 0, 'invalidations': 0}
+
+
+def invalidate_autocomplete_cache(source=None):
+    """Vide les index et résultats d'une source (toutes si None)"""
+    with _cache_lock:
+        for cache in (_index_cache, _result_cache):
+            for key in [k for k in cache if source is None or k[0] == source]:
+                del cache[key]
+        _cache_stats['invalidations'] += 1
+
+
+def autocomplete_cache_stats():
+    """Compteurs des caches d'autocomplétion (hits, misses, builds, tailles)"""
+    with _cache_lock:
+        stats = dict(_cache_stats)
+        stats['indexes'] = len(_index_cache)
+        stats['results'] = len(_result_cache)
+    return stats
+
+
+def _get_index(source, key, queryset):
+    now = time.monotonic()
+    entry = _index_cache.get(key)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+    definition = SOURCES[source]
+    index = PrefixIndex(
+        (pk, definition.libelle(*values), ' '.join(filter(None, values)))
+        for pk, *values in queryset.order_by().values_list('pk', *definition.fields)
+    )
+    with _cache_lock:
+        _cache_stats['builds'] += 1
+        _index_cache[key] = (index, now + getattr(settings, 'AUTOCOMPLETE_CACHE_TTL', 120))
+        _index_cache.move_to_end(key)
+        while len(_index_cache) > getattr(settings, 'AUTOCOMPLETE_MAX_INDEXES', 64):
+            _index_cache.popitem(last=False)
+    return index
+
+
+def autocomplete(source, scope, query, limit=20):
+    """
+    Suggestions d'une source dans le périmètre d'accès.
+
+    Args:
+        source: Clé de SOURCES
+        scope: scopes.AccessScope de l'utilisateur
+        query: Début de saisie (accents et casse indifférents)
+        limit: Nombre maximum de suggestions
+
+    Returns:
+        Liste de dicts {'id', 'text'} par ordre alphabétique
+    """
+    queryset = SOURCES[source].queryset(scope)
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        return []
+    index_key = (source, sql)
+    result_key = (source, sql, normaliser(query), limit)
+
+    with _cache_lock:
+        results = _result_cache.get(result_key)
+        if results is not None and index_key in _index_cache and _index_cache[index_key][1] > time.monotonic():
+            _result_cache.move_to_end(result_key)
+            _cache_stats['hits'] += 1
+            return results
+        _cache_stats['misses'] += 1
+
+    index = _get_index(source, index_key, queryset)
+    results = [{'id': pk, 'text': libelle} for pk, libelle in index.chercher(query, limit)]
+    with _cache_lock:
+        _result_cache[result_key] = results
+        while len(_result_cache) > getattr(settings, 'AUTOCOMPLETE_LRU_SIZE', 512):
+            _result_cache.popitem(last=False)
+    return results
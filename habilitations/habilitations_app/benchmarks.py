@@ -0,0 +1,387 @@
+# habilitations_app/benchmarks.py
+"""
+Suite de benchmarks des chemins critiques (``manage.py run_benchmarks``)
+
+Chaque scénario rejoue une requête HTTP via django.test.Client, connecté avec un
+compte du jeu généré par ``generate_dataset`` (admin OF, responsable PME,
+formateur du premier tenant ; super admin existant s'il y en a un). Pour chaque
+scénario : une exécution de chauffe (caches remplis) puis ``repeat`` mesures de
+la durée totale et du nombre de requêtes SQL.
+
+Les scénarios qui écrivent (import CSV réel) s'exécutent dans une transaction
+annulée ; le PDF « à froid » vide le cache de rendu du titre avant chaque mesure.
+Le résultat est un dict JSON (métadonnées + mesures) comparable à une exécution
+précédente avec ``compare``.
+
+``run_throughput`` mesure le débit de la base sous concurrence (threads mêlant
+lectures de pages et courtes transactions d'écriture) : à lancer sous chaque
+profil de base (DB_ENGINE, SQLITE_*) pour les comparer.
+"""
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .db import database_profile
+from .models import (
+    DemandeFormation, Entreprise, Formation, Habilitation, SessionFormation, Stagiaire, Tenant, Titre,
+)
+from .pagination import encode_cursor
+
+
+# ==================== CONTEXTE ====================
+
+class DatasetManquant(Exception):
+    """Le jeu de données du préfixe demandé n'existe pas"""
+
+
+class Contexte:
+    """Objets du premier tenant d'un jeu généré, utilisés par les scénarios"""
+
+    def __init__(self, prefix='bench', csv_lignes=200):
+        self.prefix = prefix
+        self.tenant = Tenant.objects.filter(slug=f"{prefix}-of-1").select_related('organisme_formation').first()
+        if self.tenant is None:
+            raise DatasetManquant(f"Aucun tenant « {prefix}-of-1 » : lancer d'abord manage.py generate_dataset")
+        base = f"{prefix}-t1"
+        self.users = {
+            'admin': User.objects.get(username=f"{base}-admin"),
+            'pme': User.objects.filter(username__startswith=f"{base}-pme-").order_by('pk').first(),
+            'formateur': User.objects.filter(username__startswith=f"{base}-formateur-").order_by('pk').first(),
+            'super_admin': User.objects.filter(profil__role='super_admin').order_by('pk').first(),
+        }
+        self.titre_id = Titre.objects.filter(tenant=self.tenant).order_by('pk').values_list('pk', flat=True).first()
+        self.csv = self._csv(csv_lignes)
+
+    def _csv(self, lignes):
+        # Moitié de PME existantes, moitié de nouvelles ; emails inédits
+        pmes = list(Entreprise.objects.filter(tenant=self.tenant, type_entreprise='client')
+                    .order_by('pk').values_list('nom', flat=True)[:10])
+        codes = list(Habilitation.objects.filter(actif=True).order_by('code').values_list('code', flat=True))
+        rows = ['entreprise,email,nom,prenom,habilitation_code']
+        for i in range(lignes):
+            entreprise = pmes[i % len(pmes)] if pmes and i % 2 else f"{self.prefix.upper()} IMPORT {i // 20:04d}"
+            code = codes[i % len(codes)] if codes else ''
+            rows.append(f"{entreprise},{self.prefix}-import-{i}@example.com,Import{i},Stagiaire,{code}")
+        return ('\n'.join(rows) + '\n').encode('utf-8')
+
+    def compteurs(self):
+        filtre = {'tenant': self.tenant}
+        return {
+            'tenants': Tenant.objects.filter(slug__startswith=f"{self.prefix}-").count(),
+            'stagiaires': Stagiaire.objects.filter(**filtre).count(),
+            'formations': Formation.objects.filter(**filtre).count(),
+            'titres': Titre.objects.filter(**filtre).count(),
+            'sessions': SessionFormation.objects.filter(**filtre).count(),
+            'demandes_formation': DemandeFormation.objects.filter(**filtre).count(),
+        }
+
+
+# ==================== SCÉNARIOS ====================
+
+# requete(client, ctx) → HttpResponse ; preparer(ctx) exécuté avant chaque mesure, hors chrono
+Scenario = namedtuple('Scenario', 'nom role requete preparer', defaults=(None,))
+
+
+def _import_csv(dry_run):
+    def requete(client, ctx):
+        fichier = SimpleUploadedFile('import.csv', ctx.csv, content_type='text/csv')
+        data = {'file': fichier, 'dry_run': 'true' if dry_run else 'false'}
+        if dry_run:
+            return client.post(reverse('api_import_csv'), data)
+        # Import réel annulé : la mesure reste répétable
+        with transaction.atomic():
+            response = client.post(reverse('api_import_csv'), data)
+            transaction.set_rollback(True)
+        return response
+    return requete
+
+
+def _pdf(client, ctx):
+    response = client.get(reverse('api_pdf_titre', args=[ctx.titre_id]))
+    if hasattr(response, 'streaming_content'):
+        b''.join(response.streaming_content)
+    response.close()
+    return response
+
+
+def _vider_cache_pdf(ctx):
+    shutil.rmtree(os.path.join(settings.TITRE_PDF_CACHE_DIR, str(ctx.titre_id)), ignore_errors=True)
+
+
+def _get(url_name, *args, **params):
+    return lambda client, ctx: client.get(reverse(url_name, args=args), params)
+
+
+# Curseur « Dernière » des listes paginées par keyset (indépendant du tri, signé)
+DERNIERE_PAGE = encode_cursor({'d': 'l'})
+
+SCENARIOS = [
+    Scenario('dashboard_admin_of', 'admin', _get('dashboard_admin_of')),
+    Scenario('dashboard_responsable_pme', 'pme', _get('dashboard_responsable_pme')),
+    Scenario('dashboard_formateur', 'formateur', _get('dashboard_formateur')),
+    Scenario('dashboard_super_admin', 'super_admin', _get('dashboard_super_admin')),
+    Scenario('stagiaires_page_1', 'admin', _get('stagiaire_list')),
+    Scenario('stagiaires_derniere_page', 'admin', _get('stagiaire_list', cursor=DERNIERE_PAGE)),
+    Scenario('stagiaires_recherche', 'admin', _get('stagiaire_list', search='martin')),
+    Scenario('formations_page_1', 'admin', _get('formation_list')),
+    Scenario('titres_page_1', 'admin', _get('titre_list')),
+    Scenario('titres_derniere_page', 'admin', _get('titre_list', cursor=DERNIERE_PAGE)),
+    Scenario('sessions_liste', 'admin', _get('liste_sessions_formation')),
+    Scenario('api_recherche', 'admin', _get('api_recherche', q='martin')),
+    Scenario('api_autocomplete', 'admin', _get('api_autocomplete', 'stagiaires', q='mar')),
+    Scenario('api_aggregats_of', 'admin', _get('api_aggregats_of')),
+    Scenario('api_type_formations', 'admin', _get('api_type_formations')),
+    Scenario('api_catalogue', 'admin', _get('catalogue_formations_list')),
+    Scenario('import_csv_dry_run', 'admin', _import_csv(dry_run=True)),
+    Scenario('import_csv_reel', 'admin', _import_csv(dry_run=False)),
+    Scenario('pdf_titre_froid', 'admin', _pdf, _vider_cache_pdf),
+    Scenario('pdf_titre_chaud', 'admin', _pdf),
+]
+
+
+# ==================== EXÉCUTION ====================
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0
+
+
+def _mesurer(scenario, client, ctx, repeat):
+    durees, requetes, status = [], [], None
+    # Chauffe (non mesurée), puis mesures
+    for iteration in range(repeat + 1):
+        if scenario.preparer:
+            scenario.preparer(ctx)
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = scenario.requete(client, ctx)
+            duree = time.perf_counter() - start
+        status = response.status_code
+        if status >= 400:
+            return {'status': status, 'erreur': f"HTTP {status}"}
+        if iteration:
+            durees.append(duree * 1000)
+            requetes.append(len(queries))
+    return {
+        'status': status,
+        'n': len(durees),
+        'min_ms': round(min(durees), 2),
+        'median_ms': round(statistics.median(durees), 2),
+        'p95_ms': round(_percentile(durees, 95), 2),
+        'max_ms': round(max(durees), 2),
+        'queries': max(requetes),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmarks(prefix='bench', repeat=5, only=None, csv_lignes=200, throughput=None, stdout=None):
+    """
+    Exécute les scénarios sur le jeu ``prefix``.
+
+    Args:
+        prefix: Préfixe du jeu généré par generate_dataset
+        repeat: Mesures par scénario (après une chauffe)
+        only: Noms de scénarios à exécuter (tous si None, aucun si liste vide)
+        csv_lignes: Lignes du CSV importé
+        throughput: Arguments de run_throughput, ou None pour ne pas mesurer le débit
+
+    Returns:
+        dict {'meta': {...}, 'results': {scénario: mesures}, 'throughput': {...} | None}
+    """
+    ctx = Contexte(prefix, csv_lignes)
+    clients = {}
+    results = {}
+    # Cache PDF dans un répertoire temporaire : le benchmark ne touche pas au cache réel
+    cache_pdf = tempfile.mkdtemp(prefix='bench-pdf-')
+    try:
+        with override_settings(TITRE_PDF_CACHE_DIR=cache_pdf):
+            for scenario in SCENARIOS:
+                if only is not None and scenario.nom not in only:
+                    continue
+                user = ctx.users.get(scenario.role)
+                if user is None or (scenario.requete is _pdf and ctx.titre_id is None):
+                    results[scenario.nom] = {'status': None, 'erreur': 'ignoré (données absentes)'}
+                    continue
+                if scenario.role not in clients:
+                    clients[scenario.role] = Client()
+                    clients[scenario.role].force_login(user)
+                results[scenario.nom] = _mesurer(scenario, clients[scenario.role], ctx, repeat)
+                if stdout is not None:
+                    stdout.write(format_ligne(scenario.nom, results[scenario.nom]))
+    finally:
+        shutil.rmtree(cache_pdf, ignore_errors=True)
+
+    debit = None
+    if throughput is not None:
+        debit = run_throughput(prefix, **throughput)
+        if stdout is not None:
+            stdout.write(format_debit(debit))
+
+    return {
+        'meta': {
+            'date': timezone.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': database_profile(),
+            'prefix': prefix,
+            'repeat': repeat,
+            'csv_lignes': csv_lignes,
+            'dataset': ctx.compteurs(),
+        },
+        'results': results,
+        'throughput': debit,
+    }
+
+
+# ==================== DÉBIT ====================
+
+def _worker_debit(ctx, stagiaire_ids, deadline, write_ratio, seed, stats, lock):
+    rng = random.Random(seed)
+    lectures, ecritures, erreurs = [], [], 0
+    try:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    # Courte transaction d'écriture : deux UPDATE
+                    stagiaire_id = rng.choice(stagiaire_ids)
+                    with transaction.atomic():
+                        Stagiaire.objects.filter(pk=stagiaire_id).update(date_modification=timezone.now())
+                        Formation.objects.filter(stagiaire_id=stagiaire_id).update(date_modification=timezone.now())
+                    ecritures.append(time.perf_counter() - start)
+                else:
+                    # Page de liste : total + 20 lignes
+                    queryset = Stagiaire.objects.filter(tenant=ctx.tenant).select_related('entreprise')
+                    queryset.count()
+                    list(queryset.order_by('-pk')[rng.randrange(0, 50) * 20:][:20])
+                    lectures.append(time.perf_counter() - start)
+            except OperationalError:
+                # « database is locked » (SQLite) ou équivalent
+                erreurs += 1
+    finally:
+        connection.close()
+    with lock:
+        stats['lectures'].extend(lectures)
+        stats['ecritures'].extend(ecritures)
+        stats['erreurs'] += erreurs
+
+
+def run_throughput(prefix='bench', threads=8, duration=10, write_ratio=0.2):
+    """
+    Débit de la base sous ``threads`` connexions concurrentes pendant ``duration`` secondes.
+
+    Returns:
+        dict : threads, duree_s, write_ratio, ops_s, lectures, ecritures, erreurs,
+        lecture_p50/p95_ms, ecriture_p50/p95_ms
+    """
+    ctx = Contexte(prefix, csv_lignes=0)
+    stagiaire_ids = list(Stagiaire.objects.filter(tenant=ctx.tenant).values_list('pk', flat=True))
+    stats = {'lectures': [], 'ecritures': [], 'erreurs': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    workers = [
+        threading.Thread(target=_worker_debit, args=(ctx, stagiaire_ids, deadline, write_ratio, i, stats, lock))
+        for i in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    lectures = [d * 1000 for d in stats['lectures']]
+    ecritures = [d * 1000 for d in stats['ecritures']]
+    return {
+        'threads': threads,
+        'duree_s': round(elapsed, 2),
+        'write_ratio': write_ratio,
+        'ops_s': round((len(lectures) + len(ecritures)) / elapsed, 1),
+        'lectures': len(lectures),
+        'ecritures': len(ecritures),
+        'erreurs': stats['erreurs'],
+        'lecture_p50_ms': round(_percentile(lectures, 50), 2),
+        'lecture_p95_ms': round(_percentile(lectures, 95), 2),
+        'ecriture_p50_ms': round(_percentile(ecritures, 50), 2),
+        'ecriture_p95_ms': round(_percentile(ecritures, 95), 2),
+    }
+
+
+# ==================== RAPPORT ====================
+
+def format_ligne(nom, mesure):
+    if 'erreur' in mesure:
+        return f"{nom:<28} {mesure['erreur']}"
+    return (f"{nom:<28} médiane {mesure['median_ms']:>9.1f} ms  p95 {mesure['p95_ms']:>9.1f} ms  "
+            f"{mesure['queries']:>5} requêtes")
+
+
+def format_debit(debit):
+    return (f"Débit : {debit['ops_s']:.0f} op/s ({debit['threads']} threads, {debit['write_ratio']:.0%} écritures), "
+            f"lecture p95 {debit['lecture_p95_ms']:.1f} ms, écriture p95 {debit['ecriture_p95_ms']:.1f} ms, "
+            f"{debit['erreurs']} erreur(s) de verrou")
+
+
+def compare(courant, precedent):
+    """
+    Lignes de comparaison entre deux résultats de run_benchmarks.
+
+    Returns:
+        Liste de dicts : scenario, median_ms, median_ms_avant, delta_pct, queries, queries_avant
+    """
+    lignes = []
+    for nom, mesure in courant['results'].items():
+        avant = precedent.get('results', {}).get(nom)
+        if 'erreur' in mesure or not avant or 'erreur' in avant:
+            continue
+        lignes.append({
+            'scenario': nom,
+            'median_ms': mesure['median_ms'],
+            'median_ms_avant': avant['median_ms'],
+            'delta_pct': round((mesure['median_ms'] - avant['median_ms']) / avant['median_ms'] * 100, 1)
+            if avant['median_ms'] else None,
+            'queries': mesure['queries'],
+            'queries_avant': avant['queries'],
+        })
+    return lignes
+
+
+def compare_throughput(courant, precedent):
+    """Écart de débit entre deux résultats (None si l'un des deux ne l'a pas mesuré)"""
+    debit, avant = courant.get('throughput'), precedent.get('throughput')
+    if not debit or not avant:
+        return None
+    return {
+        'ops_s': debit['ops_s'],
+        'ops_s_avant': avant['ops_s'],
+        'delta_pct': round((debit['ops_s'] - avant['ops_s']) / avant['ops_s'] * 100, 1) if avant['ops_s'] else None,
+        'erreurs': debit['erreurs'],
+        'erreurs_avant': avant['erreurs'],
+    }
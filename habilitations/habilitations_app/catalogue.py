@@ -0,0 +1,126 @@
+# habilitations_app/catalogue.py
+"""
+Réponses JSON du catalogue de formations, mises en cache par version
+
+Le catalogue (TypeFormation → Specialisation, TenantFormation) change rarement
+mais la modale du catalogue le recharge à chaque ouverture. Chaque modification
+incrémente VersionCatalogue.version (signaux, voir models.py) ; les réponses
+sont construites en deux requêtes (prefetch) puis gardées en cache process-local
+par (type de réponse, tenant, version), et servies avec un ETag dérivé de la
+version : un client à jour reçoit un 304 après une seule lecture de la version.
+"""
+import json
+import threading
+
+from django.db.models import F, Prefetch, Q
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+
+from .models import Specialisation, TenantFormation, TypeFormation, VersionCatalogue
+
+
+# ==================== VERSION ====================
+
+def get_catalogue_version():
+    return VersionCatalogue.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_catalogue_version():
+    """Incrémente la version du catalogue (UPDATE atomique, ligne créée au besoin)"""
+    if not VersionCatalogue.objects.filter(pk=1).update(version=F('version') + 1):
+        VersionCatalogue.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+def _request_version(request):
+    # Lue une fois par requête (ETag puis corps)
+    if not hasattr(request, '_catalogue_version'):
+        request._catalogue_version = get_catalogue_version()
+    return request._catalogue_version
+
+
+def catalogue_etag(request, kind):
+    """ETag d'une réponse du catalogue (pour django.views.decorators.http.condition)"""
+    tenant_id = getattr(getattr(request.user, 'profil', None), 'tenant_id', None)
+    return f"{kind}-{tenant_id or 0}-v{_request_version(request)}"
+
+
+# ==================== CONSTRUCTION ====================
+
+def build_types_formations(tenant_id):
+    """Types de formations globaux + personnalisés du tenant, avec leurs spécialisations"""
+    types = TypeFormation.objects.filter(
+        Q(created_by_tenant__isnull=True) | Q(created_by_tenant_id=tenant_id)
+    ).prefetch_related('specialisations')
+    return {
+        'types': [
+            {
+                'id': t.id,
+                'nom': t.nom,
+                'code': t.code,
+                'is_custom': t.created_by_tenant_id is not None,
+                'spécialisations': [
+                    {'id': s.id, 'code': s.code, 'nom': s.nom}
+                    for s in t.specialisations.all()
+                ],
+            }
+            for t in types
+        ],
+        # Option "Autre" (type de formation personnalisé)
+        'allow_custom': True,
+    }
+
+
+def build_catalogue_tenant(tenant_id):
+    """Formations proposées par un tenant (modale du catalogue)"""
+    formations = TenantFormation.objects.filter(tenant_id=tenant_id).select_related('type_formation').prefetch_related(
+        Prefetch('spécialisations', queryset=Specialisation.objects.only('id', 'code', 'type_formation_id'))
+    )
+    return {
+        'formations': [
+            {
+                'id': f.id,
+                'nom': f.type_formation.nom,
+                'code': f.type_formation.code,
+                'actif': f.actif,
+                'specialisations': [s.code for s in f.spécialisations.all()],
+                'date_activation': f.date_activation.strftime('%d/%m/%Y'),
+            }
+            for f in formations
+        ]
+    }
+
+
+BUILDERS = {
+    'types': build_types_formations,
+    'catalogue': build_catalogue_tenant,
+}
+
+
+# ==================== CACHE ====================
+
+# (kind, tenant_id) → (version, corps JSON) ; une version obsolète est simplement remplacée
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+
+
+def catalogue_json(kind, tenant_id, version):
+    """Corps JSON (bytes) d'une réponse du catalogue pour une version donnée"""
+    key = (kind, tenant_id)
+    entry = _response_cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    body = json.dumps(BUILDERS[kind](tenant_id), ensure_ascii=False).encode('utf-8')
+    with _response_cache_lock:
+        _response_cache[key] = (version, body)
+    return body
+
+
+def catalogue_response(request, kind):
+    """HttpResponse JSON du catalogue pour le tenant de l'utilisateur, revalidée à chaque appel"""
+    tenant_id = getattr(getattr(request.user, 'profil', None), 'tenant_id', None)
+    response = HttpResponse(
+        catalogue_json(kind, tenant_id, _request_version(request)),
+        content_type='application/json; charset=utf-8',
+    )
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
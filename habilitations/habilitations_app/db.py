@@ -0,0 +1,73 @@
+# habilitations_app/db.py
+"""
+Initialisation des connexions à la base de données
+
+``configure_connection`` est branché sur le signal connection_created (voir
+apps.py) : il s'exécute une fois par connexion physique, donc une seule fois
+pour toute la durée de vie d'une connexion persistante (DB_CONN_MAX_AGE).
+
+Sur SQLite il pose les pragmas de SQLITE_PRAGMAS. Le mode WAL laisse les lectures
+se poursuivre pendant une écriture, et busy_timeout fait attendre un écrivain au
+lieu d'échouer immédiatement sur « database is locked ». Une transaction qui lit
+puis écrit peut encore échouer si un autre écrivain a validé entre-temps : les
+écritures concurrentes doivent rester courtes. Sur PostgreSQL, les réglages de
+session passent par OPTIONS['options'] (config/settings.py) et ne coûtent aucun
+aller-retour.
+"""
+from django.conf import settings
+from django.db import connections
+
+
+# Pragmas acceptés et valeurs symboliques autorisées (les valeurs sont interpolées dans le SQL)
+PRAGMAS = {
+    'journal_mode': {'delete', 'truncate', 'persist', 'memory', 'wal', 'off'},
+    'synchronous': {'off', 'normal', 'full', 'extra'},
+    'temp_store': {'default', 'file', 'memory'},
+    'busy_timeout': int,
+    'mmap_size': int,
+    'cache_size': int,
+}
+
+
+def _pragma_sql(pragma, value):
+    accepte = PRAGMAS.get(pragma)
+    if accepte is None:
+        raise ValueError(f"Pragma SQLite non supporté : {pragma}")
+    if accepte is int:
+        return f"PRAGMA {pragma} = {int(value)}"
+    value = str(value).lower()
+    if value not in accepte:
+        raise ValueError(f"Valeur invalide pour le pragma {pragma} : {value}")
+    return f"PRAGMA {pragma} = {value}"
+
+
+def configure_connection(sender, connection, **kwargs):
+    """Receiver de connection_created : pragmas SQLite de chaque nouvelle connexion"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(_pragma_sql(pragma, value))
+
+
+def database_profile(alias='default'):
+    """Réglages effectifs d'une connexion (moteur, version, persistance, pragmas SQLite)"""
+    connection = connections[alias]
+    connection.ensure_connection()
+    profile = {
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+        'health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+    }
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            profile['version'] = connection.Database.sqlite_version
+            for pragma in PRAGMAS:
+                cursor.execute(f"PRAGMA {pragma}")
+                profile[pragma] = cursor.fetchone()[0]
+        elif connection.vendor == 'postgresql':
+            cursor.execute("SHOW server_version")
+            profile['version'] = cursor.fetchone()[0]
+            cursor.execute("SHOW statement_timeout")
+            profile['statement_timeout'] = cursor.fetchone()[0]
+    return profile
@@ -6,7 +6,7 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.urls import reverse_lazy
-from .models import ProfilUtilisateur
+from .middleware import get_request_principal
 
 
 def role_required(roles):
@@ -21,16 +21,10 @@ def role_required(roles):
     def decorator(view_func):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            try:
-                profil = request.user.profil
-                # Superuser always passes to avoid redirect loops when the profil is missing
-                if request.user.is_superuser:
-                    return view_func(request, *args, **kwargs)
-
-                if profil.role in roles or profil.est_super_admin:
-                    return view_func(request, *args, **kwargs)
-            except (AttributeError, ProfilUtilisateur.DoesNotExist):
-                pass
+            principal = get_request_principal(request)
+            # Superuser always passes to avoid redirect loops when the profil is missing
+            if request.user.is_superuser or principal.has_role(roles):
+                return view_func(request, *args, **kwargs)
             
             messages.error(request, f"Accès réservé aux rôles: {', '.join(roles)}")
             return redirect('home')
@@ -84,11 +78,7 @@ class RoleRequiredMixin(UserPassesTestMixin):
         if not self.required_role:
             return True
         
-        try:
-            profil = self.request.user.profil
-            return profil.role == self.required_role
-        except ProfilUtilisateur.DoesNotExist:
-            return False
+        return get_request_principal(self.request).role == self.required_role
     
     def handle_no_permission(self):
         messages.error(self.request, self.permission_denied_message)
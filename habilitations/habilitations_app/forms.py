@@ -1,5 +1,7 @@
 from django import forms
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.urls import reverse
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Fieldset, Row, Column, Submit, HTML, Div
 from .models import (
@@ -10,6 +12,44 @@ from .models import (
 )
 
 
+# ==================== WIDGETS ====================
+
+class AutocompleteSelect(forms.Select):
+    """
+    Liste déroulante chargée à la demande depuis api/autocomplete/<source>/.
+
+    Seules les options sélectionnées sont rendues (une requête sur leurs clés) ;
+    les autres sont proposées au fil de la saisie par le script de base.html.
+    La validation reste celle du ModelChoiceField (queryset complet).
+    """
+
+    def __init__(self, source, attrs=None):
+        super().__init__(attrs)
+        self.source = source
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = reverse('api_autocomplete', args=[self.source])
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        field = self.choices.field
+        selected = {str(v) for v in value if str(v) not in field.empty_values}
+        options = []
+        if not self.allow_multiple_selected and field.empty_label is not None:
+            options.append(self.create_option(name, '', field.empty_label, not selected, 0, attrs=attrs))
+        if selected:
+            to_field_name = field.to_field_name or 'pk'
+            try:
+                objets = list(field.queryset.filter(**{f'{to_field_name}__in': selected}))
+            except (ValueError, ValidationError):
+                objets = []  # Valeur soumise invalide : l'erreur est portée par le champ
+            for objet in objets:
+                options.append(self.create_option(
+                    name, self.choices.choice(objet)[0], field.label_from_instance(objet), True, len(options), attrs=attrs,
+                ))
+        return [(None, [option], option['index']) for option in options]
+
 class EntrepriseForm(forms.ModelForm):
     """Form pour créer/modifier une entreprise"""
     class Meta:
@@ -265,7 +305,7 @@ class FiltreFormationForm(forms.Form):
     stagiaire = forms.ModelChoiceField(
         queryset=Stagiaire.objects.all(),
         required=False,
-        widget=forms.Select(attrs={'class': 'form-control'})
+        widget=AutocompleteSelect('stagiaires', attrs={'class': 'form-control'})
     )
     habilitation = forms.ModelChoiceField(
         queryset=Habilitation.objects.all(),
@@ -294,7 +334,7 @@ class DemandeStagiaireForm(forms.ModelForm):
     stagiaire_existant = forms.ModelChoiceField(
         queryset=Stagiaire.objects.none(),
         required=False,
-        widget=forms.RadioSelect(attrs={'class': 'form-check-input'}),
+        widget=AutocompleteSelect('stagiaires', attrs={'class': 'form-control'}),
         label="Sélectionner un stagiaire existant (optionnel)"
     )
     
@@ -413,12 +453,57 @@ class SessionFormationForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         # Filtrer les formateurs disponibles pour l'OF courant
+        self._of = None
         if user and hasattr(user, 'profil'):
             from .services import formateurs_of
             of = user.profil.entreprise
             if of:
+                self._of = of
                 self.fields['formateurs'].queryset = formateurs_of(of)
 
+        # Session existante : ne proposer que les formateurs qualifiés pour ses spécialisations
+        if not self.is_bound and self.instance.pk:
+            from .services import formateurs_qualifies
+            spec_ids = self.instance.spécialisations.values_list('pk', flat=True)
+            self.fields['formateurs'].queryset = formateurs_qualifies(
+                spec_ids, queryset=self.fields['formateurs'].queryset
+            )
+            # ... et libres sur ses dates (les formateurs déjà affectés restent proposés)
+            if self._of and self.instance.date_debut and self.instance.date_fin:
+                from .planning import get_planning
+                disponibles = get_planning(self._of).formateurs_disponibles_ids(
+                    self.instance.date_debut, self.instance.date_fin, exclude_session_id=self.instance.pk
+                )
+                affectes = set(self.instance.formateurs.values_list('pk', flat=True))
+                self.fields['formateurs'].queryset = self.fields['formateurs'].queryset.filter(
+                    pk__in=disponibles | affectes
+                )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        specialisations = cleaned_data.get('spécialisations')
+        formateurs = cleaned_data.get('formateurs')
+        if specialisations and formateurs:
+            from .services import formateurs_qualifies
+            qualifies = set(formateurs_qualifies(
+                [s.pk for s in specialisations], queryset=formateurs
+            ).values_list('pk', flat=True))
+            non_qualifies = [f for f in formateurs if f.pk not in qualifies]
+            if non_qualifies:
+                noms = ", ".join(f.user.get_full_name() or f.user.username for f in non_qualifies)
+                self.add_error('formateurs', f"Formateur(s) sans toutes les compétences requises : {noms}")
+
+        date_debut = cleaned_data.get('date_debut')
+        date_fin = cleaned_data.get('date_fin')
+        if formateurs and date_debut and date_fin:
+            from .planning import conflits_formateurs
+            conflits = conflits_formateurs(formateurs, date_debut, date_fin, exclude_session_id=self.instance.pk)
+            for formateur, sessions in conflits.items():
+                nom = formateur.user.get_full_name() or formateur.user.username
+                numeros = ", ".join(s.numero_session for s in sessions)
+                self.add_error('formateurs', f"{nom} est déjà affecté sur la période : {numeros}")
+        return cleaned_data
+
 
 class AssignerDemandeForm(forms.Form):
     """Form pour assigner des demandes de stagiaires à une session"""
@@ -445,6 +530,7 @@ class FormateurForm(forms.Form):
     # Option 1 : Sélectionner un user existant
     user_id = forms.ModelChoiceField(
         queryset=User.objects.filter(profil__role='formateur').select_related('profil'),
+        widget=AutocompleteSelect('formateurs', attrs={'class': 'form-control'}),
         required=False,
         label="Utilisateur existant formateur",
         empty_label="-- Créer un nouvel utilisateur --"
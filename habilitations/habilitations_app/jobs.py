@@ -0,0 +1,262 @@
+# habilitations_app/jobs.py
+"""
+File de tâches de fond stockée en base (modèle Job)
+
+- enqueue_job() crée un Job en attente depuis une vue
+- claim_next_job() réserve le prochain job par un UPDATE conditionnel
+  (fonctionne à l'identique sur SQLite et PostgreSQL, sans broker)
+- run_job() exécute le handler enregistré pour le type du job
+- worker_loop() est la boucle d'un processus lancé par ``manage.py run_workers`` ;
+  pendant un job, un thread met à jour ``date_heartbeat`` toutes les
+  JOB_HEARTBEAT_INTERVAL secondes, et la boucle remet périodiquement en file les
+  jobs dont le worker ne donne plus signe de vie (requeue_stale_jobs)
+"""
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import DatabaseError, connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+
+JOB_HANDLERS = {}
+
+
+def register_job(type_job):
+    """Décorateur enregistrant le handler d'un type de job.
+
+    Le handler reçoit le Job et retourne un dict JSON stocké dans ``Job.resultat``.
+    """
+    def decorator(func):
+        JOB_HANDLERS[type_job] = func
+        return func
+    return decorator
+
+
+def enqueue_job(type_job, parametres=None, user=None, tenant=None, fichier=None):
+    """
+    Crée un job en attente.
+
+    Args:
+        type_job: Clé d'un handler enregistré
+        parametres: dict JSON passé au handler
+        user: Utilisateur créateur (contrôle d'accès au suivi)
+        tenant: Tenant concerné
+        fichier: UploadedFile/File optionnel stocké dans fichier_entree
+    """
+    if type_job not in JOB_HANDLERS:
+        raise ValueError(f"Type de job inconnu : {type_job}")
+    job = Job(type_job=type_job, parametres=parametres or {}, cree_par=user, tenant=tenant)
+    if fichier is not None:
+        job.fichier_entree.save(os.path.basename(fichier.name), fichier, save=False)
+    job.save()
+    return job
+
+
+def set_progress(job, progression, total=None):
+    """Met à jour la progression d'un job en cours (sans toucher aux autres champs)"""
+    job.progression = progression
+    fields = {'progression': progression}
+    if total is not None:
+        job.progression_total = total
+        fields['progression_total'] = total
+    Job.objects.filter(pk=job.pk).update(**fields)
+
+
+def claim_next_job(worker_id):
+    """
+    Réserve le plus ancien job en attente pour ce worker.
+
+    La réservation est un UPDATE conditionnel sur statut='en_attente' : si un autre
+    worker a pris le job entre-temps, on passe au suivant.
+
+    Returns:
+        Job réservé ou None
+    """
+    candidates = Job.objects.filter(statut='en_attente').order_by('date_creation').values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        now = timezone.now()
+        claimed = Job.objects.filter(pk=pk, statut='en_attente').update(
+            statut='en_cours',
+            worker=worker_id,
+            date_debut=now,
+            date_heartbeat=now,
+            tentatives=F('tentatives') + 1,
+        )
+        if claimed:
+            return Job.objects.select_related('tenant').get(pk=pk)
+    return None
+
+
+def run_job(job):
+    """Exécute un job réservé et enregistre son résultat ou son erreur"""
+    handler = JOB_HANDLERS.get(job.type_job)
+    try:
+        if handler is None:
+            raise ValueError(f"Type de job inconnu : {job.type_job}")
+        resultat = handler(job)
+    except Exception as exc:
+        Job.objects.filter(pk=job.pk).update(
+            statut='echec',
+            erreur=f"{exc}\n\n{traceback.format_exc()}",
+            date_fin=timezone.now(),
+        )
+        return False
+
+    job.resultat = resultat
+    job.statut = 'termine'
+    job.date_fin = timezone.now()
+    job.save(update_fields=['resultat', 'statut', 'date_fin', 'fichier_resultat'])
+    return True
+
+
+def requeue_stale_jobs(timeout_seconds=None, max_tentatives=3):
+    """
+    Remet en attente les jobs 'en_cours' abandonnés ; échec au-delà de max_tentatives.
+
+    Un job est abandonné quand son worker n'a plus signalé d'activité (date_heartbeat)
+    depuis ``timeout_seconds`` (défaut : JOB_STALE_TIMEOUT) : un job long mais vivant
+    n'est jamais repris par un autre worker.
+    """
+    if timeout_seconds is None:
+        timeout_seconds = getattr(settings, 'JOB_STALE_TIMEOUT', 300)
+    limite = timezone.now() - timedelta(seconds=timeout_seconds)
+    stale = Job.objects.filter(statut='en_cours', date_heartbeat__lt=limite)
+    stale.filter(tentatives__gte=max_tentatives).update(
+        statut='echec', erreur='Abandonné par le worker (délai dépassé)', date_fin=timezone.now()
+    )
+    return stale.filter(tentatives__lt=max_tentatives).update(statut='en_attente', worker='')
+
+
+def _heartbeat(job_id, worker_id, stop, interval):
+    """Thread de battement de cœur : date_heartbeat du job mise à jour jusqu'à ``stop``"""
+    try:
+        while not stop.wait(interval):
+            try:
+                Job.objects.filter(pk=job_id, statut='en_cours', worker=worker_id).update(
+                    date_heartbeat=timezone.now()
+                )
+            except DatabaseError:
+                pass  # Base momentanément verrouillée : prochain battement
+    finally:
+        connections.close_all()
+
+
+def run_job_with_heartbeat(job, worker_id, interval=None):
+    """run_job() accompagné d'un thread de battement de cœur (connexion base dédiée)"""
+    interval = interval or getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 30)
+    stop = threading.Event()
+    thread = threading.Thread(target=_heartbeat, args=(job.pk, worker_id, stop, interval), daemon=True)
+    thread.start()
+    try:
+        return run_job(job)
+    finally:
+        stop.set()
+        thread.join()
+
+
+def worker_loop(poll_interval=2.0, max_jobs=None, stop_when_idle=False):
+    """
+    Boucle d'un processus worker : réserve et exécute les jobs jusqu'à interruption.
+
+    Args:
+        poll_interval: Attente (secondes) quand la file est vide
+        max_jobs: Nombre de jobs après lequel le processus s'arrête (None = illimité)
+        stop_when_idle: S'arrêter dès que la file est vide
+    """
+    import django
+    django.setup()
+    # Ne jamais réutiliser une connexion héritée du processus parent
+    connections.close_all()
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    requeue_interval = getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 30)
+    last_requeue = None
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        if last_requeue is None or time.monotonic() - last_requeue >= requeue_interval:
+            requeue_stale_jobs()
+            last_requeue = time.monotonic()
+        job = claim_next_job(worker_id)
+        if job is None:
+            if stop_when_idle:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job_with_heartbeat(job, worker_id)
+        done += 1
+    connections.close_all()
+    return done
+
+
+# ==================== HANDLERS ====================
+
+@register_job('import_csv')
+def job_import_csv(job):
+    """Import CSV stagiaires/demandes (voir services_import)"""
+    from django.contrib.auth.models import User
+    from .models import Entreprise
+    from .services_import import import_stagiaires_csv
+
+    params = job.parametres
+    organisme_formation = Entreprise.objects.get(pk=params['organisme_formation_id'])
+    user = User.objects.filter(pk=job.cree_par_id).first()
+    with job.fichier_entree.open('rb') as fichier:
+        return import_stagiaires_csv(
+            fichier,
+            organisme_formation=organisme_formation,
+            tenant=job.tenant,
+            user=user,
+            dry_run=params.get('dry_run', True),
+            progress=lambda lignes: set_progress(job, lignes),
+        )
+
+
+@register_job('pdf_titre')
+def job_pdf_titre(job):
+    """PDF d'un titre, stocké dans fichier_resultat"""
+    from .models import Titre
+    from .services_pdf import TITRE_RELATED, get_cached_titre_pdf, titre_pdf_filename
+
+    titre = Titre.objects.select_related(*TITRE_RELATED).get(pk=job.parametres['titre_id'])
+    set_progress(job, 0, total=1)
+    fichier, _ = get_cached_titre_pdf(titre)
+    with fichier as fh:
+        job.fichier_resultat.save(titre_pdf_filename(titre), ContentFile(fh.read()), save=False)
+    set_progress(job, 1)
+    return {'titre_id': titre.pk, 'numero_titre': titre.numero_titre}
+
+
+@register_job('pdf_titres_batch')
+def job_pdf_titres_batch(job):
+    """PDF de tous les titres d'une session ou d'un tenant (ZIP ou multi-pages)"""
+    from .models import SessionFormation
+    from .services_pdf import render_titres_batch, titres_for_batch
+
+    params = job.parametres
+    session = None
+    if params.get('session_id'):
+        session = SessionFormation.objects.get(pk=params['session_id'])
+    titres = titres_for_batch(session=session, tenant=job.tenant)
+    set_progress(job, 0, total=titres.count())
+    filename, content, count = render_titres_batch(titres, output=params.get('format', 'zip'))
+    job.fichier_resultat.save(filename, ContentFile(content), save=False)
+    set_progress(job, count)
+    return {'titres': count, 'session_id': params.get('session_id'), 'format': params.get('format', 'zip')}
+
+
+@register_job('scan_expirations')
+def job_scan_expirations(job):
+    """Scan incrémental des expirations (voir services_expirations)"""
+    from .services_expirations import scan_expirations
+
+    params = job.parametres
+    return scan_expirations(horizon_jours=params.get('horizon_jours'), full=params.get('full', False))
@@ -0,0 +1,42 @@
+"""
+Envoi des emails de l'outbox (lots sur une connexion, nouvelles tentatives, débit par tenant)
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from habilitations_app.notifications import dispatch_outbox, enqueue_expiration_alerts, requeue_stale_messages
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails en attente de l'outbox (et met en file les alertes d'expiration avec --expirations)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--expirations', action='store_true',
+                            help="Mettre d'abord en file les alertes d'expiration des titres")
+        parser.add_argument('--par-titre', action='store_true',
+                            help="Un email par titre au lieu d'un récapitulatif par PME")
+        parser.add_argument('--horizon', type=int, default=None, help="Délai d'alerte en jours")
+        parser.add_argument('--batch-size', type=int, default=None, help="Emails par lot")
+        parser.add_argument('--loop', action='store_true', help="Tourner en continu")
+        parser.add_argument('--poll-interval', type=float, default=10.0,
+                            help="Attente (secondes) entre deux passes en mode --loop")
+
+    def handle(self, *args, **options):
+        if options['expirations']:
+            emails, titres = enqueue_expiration_alerts(
+                horizon_jours=options['horizon'], digest=not options['par_titre']
+            )
+            self.stdout.write(f"{emails} alerte(s) d'expiration mise(s) en file pour {titres} titre(s)")
+
+        while True:
+            requeue_stale_messages(getattr(settings, 'OUTBOX_STALE_TIMEOUT', 1800))
+            resultat = dispatch_outbox(batch_size=options['batch_size'])
+            if resultat['envoyes'] or resultat['echecs'] or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{resultat['envoyes']} email(s) envoyé(s), {resultat['echecs']} échec(s)"
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['poll_interval'])
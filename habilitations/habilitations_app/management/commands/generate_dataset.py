@@ -0,0 +1,54 @@
+"""
+Génère un jeu de données de charge reproductible (tenants, PME, stagiaires, sessions, titres, demandes)
+
+Exemple : python manage.py generate_dataset --tenants 5 --stagiaires 20000 --seed 1 --flush
+"""
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from habilitations_app.services_dataset import DATASET_PASSWORD, flush_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = "Génère un jeu de données de charge reproductible (même graine + même date = mêmes données)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=1, help="Nombre de tenants (OF)")
+        parser.add_argument('--pme', type=int, default=20, help="PME clientes par tenant")
+        parser.add_argument('--stagiaires', type=int, default=1000, help="Stagiaires par tenant")
+        parser.add_argument('--formateurs', type=int, default=5, help="Formateurs par tenant")
+        parser.add_argument('--demandes', type=int, default=200, help="Demandes de formation par tenant")
+        parser.add_argument('--formations-max', type=int, default=3, help="Formations maximum par stagiaire")
+        parser.add_argument('--seed', type=int, default=42, help="Graine du tirage")
+        parser.add_argument('--prefix', default='bench', help="Préfixe des objets générés")
+        parser.add_argument('--date', help="Date de référence AAAA-MM-JJ (défaut : aujourd'hui)")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Taille des lots de bulk_create")
+        parser.add_argument('--no-index', action='store_true', help="Ne pas alimenter l'index de recherche")
+        parser.add_argument('--flush', action='store_true', help="Supprimer d'abord le jeu existant de même préfixe")
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Date invalide : {options['date']}")
+        prefix = options['prefix']
+
+        if options['flush']:
+            self.stdout.write(f"{flush_dataset(prefix)} tenant(s) « {prefix} » supprimé(s)")
+
+        start = time.perf_counter()
+        totals = generate_dataset(
+            tenants=options['tenants'], pme=options['pme'], stagiaires=options['stagiaires'],
+            formateurs=options['formateurs'], demandes=options['demandes'],
+            formations_max=options['formations_max'], seed=options['seed'], prefix=prefix, today=today,
+            batch_size=options['batch_size'], index=not options['no_index'], stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Jeu « {prefix} » généré en {time.perf_counter() - start:.1f} s : "
+            + ', '.join(f"{n} {m}" for m, n in totals.items())
+        ))
+        self.stdout.write(f"Comptes : {prefix}-t<N>-admin, -secretariat, -formateur-<i>, -pme-<i> / mot de passe {DATASET_PASSWORD}")
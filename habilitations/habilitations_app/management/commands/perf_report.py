@@ -0,0 +1,48 @@
+"""
+Rapport de profilage des vues (requêtes SQL, temps, N+1) à partir de PROFILING_LOG_FILE
+"""
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from habilitations_app.profiling import read_log_file, summarize
+
+
+class Command(BaseCommand):
+    help = "Synthèse par vue et tenant des enregistrements de ProfilingMiddleware"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None, help="Fichier JSONL (défaut : PROFILING_LOG_FILE)")
+        parser.add_argument('--sort', choices=['queries', 'total', 'sql'], default='queries',
+                            help="Tri : requêtes moyennes, p95 de durée ou temps SQL moyen")
+        parser.add_argument('--top', type=int, default=20, help="Nombre de vues affichées")
+        parser.add_argument('--json', action='store_true', help="Sortie JSON brute")
+
+    def handle(self, *args, **options):
+        path = options['file'] or getattr(settings, 'PROFILING_LOG_FILE', '')
+        if not path:
+            raise CommandError("Aucun fichier : --file ou PROFILING_LOG_FILE")
+        try:
+            records = read_log_file(path)
+        except FileNotFoundError:
+            raise CommandError(f"Fichier introuvable : {path}")
+
+        lignes = summarize(records, sort=options['sort'])[:options['top']]
+        if options['json']:
+            self.stdout.write(json.dumps(lignes, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'Vue':<40} {'Tenant':>6} {'Appels':>6} {'Req.moy':>8} {'Req.max':>8} "
+            f"{'SQL ms':>8} {'Py ms':>8} {'p50 ms':>8} {'p95 ms':>8}"
+        )
+        for ligne in lignes:
+            self.stdout.write(
+                f"{str(ligne['url_name'])[:40]:<40} {str(ligne['tenant_id'] or '-'):>6} {ligne['hits']:>6} "
+                f"{ligne['queries_avg']:>8} {ligne['queries_max']:>8} {ligne['sql_ms_avg']:>8} "
+                f"{ligne['python_ms_avg']:>8} {ligne['total_ms_p50']:>8} {ligne['total_ms_p95']:>8}"
+            )
+            for dup in ligne['duplicates'][:3]:
+                self.stdout.write(self.style.WARNING(f"    x{dup['count']} {dup['sql'][:150]}"))
+        self.stdout.write(self.style.SUCCESS(f"{len(records)} requête(s) HTTP analysée(s)"))
@@ -0,0 +1,28 @@
+"""
+Reconstruit les compteurs matérialisés du tableau de bord Admin OF (TenantDashboardStats)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from habilitations_app.models import Tenant
+from habilitations_app.services import refresh_tenant_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = "Recalcule entièrement TenantDashboardStats pour tous les tenants (ou un seul)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help="Slug du tenant à reconstruire (défaut : tous)")
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.select_related('organisme_formation')
+        if options['tenant']:
+            tenants = tenants.filter(slug=options['tenant'])
+            if not tenants.exists():
+                raise CommandError(f"Tenant '{options['tenant']}' introuvable")
+
+        count = 0
+        for tenant in tenants.iterator():
+            refresh_tenant_dashboard_stats(tenant)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{count} tenant(s) reconstruit(s)"))
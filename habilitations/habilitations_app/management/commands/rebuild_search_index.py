@@ -0,0 +1,19 @@
+"""
+Reconstruit l'index de recherche plein texte (stagiaires, entreprises, titres, sessions)
+"""
+from django.core.management.base import BaseCommand
+
+from habilitations_app.search import fts_disponible, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche (FTS5 sur SQLite, trigrammes ailleurs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Objets indexés par lot")
+
+    def handle(self, *args, **options):
+        moteur = 'FTS5' if fts_disponible() else 'trigrammes'
+        self.stdout.write(f"Moteur : {moteur}")
+        totals = rebuild_index(batch_size=options['batch_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f"{sum(totals.values())} document(s) indexé(s)"))
@@ -0,0 +1,33 @@
+"""
+Recalcule le compteur dénormalisé SessionFormation.places_occupees
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from habilitations_app.models import Formation, SessionFormation
+
+
+class Command(BaseCommand):
+    help = "Compare places_occupees au nombre réel de formations par session et corrige les écarts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Afficher les écarts sans corriger")
+
+    def handle(self, *args, **options):
+        reels = dict(
+            Formation.objects.filter(session__isnull=False).order_by()
+            .values('session').annotate(n=Count('pk')).values_list('session', 'n')
+        )
+        ecarts = []
+        for pk, numero, stocke in SessionFormation.objects.values_list('pk', 'numero_session', 'places_occupees'):
+            reel = reels.get(pk, 0)
+            if reel != stocke:
+                ecarts.append((pk, numero, stocke, reel))
+
+        for pk, numero, stocke, reel in ecarts:
+            self.stdout.write(f"{numero} : {stocke} → {reel}")
+            if not options['dry_run']:
+                SessionFormation.objects.filter(pk=pk).update(places_occupees=reel)
+
+        verbe = "détecté(s)" if options['dry_run'] else "corrigé(s)"
+        self.stdout.write(self.style.SUCCESS(f"{len(ecarts)} écart(s) {verbe}"))
@@ -0,0 +1,44 @@
+"""
+Rend en lot les PDF des titres d'une session ou d'un tenant (ZIP ou PDF multi-pages)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from habilitations_app.models import SessionFormation, Tenant
+from habilitations_app.services_pdf import render_titres_batch, titres_for_batch
+
+
+class Command(BaseCommand):
+    help = "Génère les PDF des titres d'une session (--session) ou d'un tenant (--tenant)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--session', help="Numéro de session")
+        parser.add_argument('--tenant', help="Slug du tenant")
+        parser.add_argument('--format', choices=['zip', 'pdf'], default='zip',
+                            help="zip : un PDF par titre ; pdf : un seul PDF multi-pages")
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Processus de rendu (défaut : PDF_RENDER_WORKERS)")
+        parser.add_argument('--output', '-o', help="Fichier de sortie (défaut : titres.zip / titres.pdf)")
+
+    def handle(self, *args, **options):
+        if not options['session'] and not options['tenant']:
+            raise CommandError("Préciser --session ou --tenant")
+
+        session = tenant = None
+        if options['session']:
+            session = SessionFormation.objects.filter(numero_session=options['session']).first()
+            if session is None:
+                raise CommandError(f"Session '{options['session']}' introuvable")
+        if options['tenant']:
+            tenant = Tenant.objects.filter(slug=options['tenant']).first()
+            if tenant is None:
+                raise CommandError(f"Tenant '{options['tenant']}' introuvable")
+
+        filename, content, count = render_titres_batch(
+            titres_for_batch(session=session, tenant=tenant),
+            output=options['format'],
+            workers=options['workers'],
+        )
+        path = options['output'] or filename
+        with open(path, 'wb') as fh:
+            fh.write(content)
+        self.stdout.write(self.style.SUCCESS(f"{count} titre(s) → {path}"))
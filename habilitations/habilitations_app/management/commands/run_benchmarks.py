@@ -0,0 +1,81 @@
+"""
+Mesure les chemins critiques (tableaux de bord, listes, recherche, import CSV, PDF) sur le jeu généré
+
+Exemple :
+    python manage.py generate_dataset --tenants 3 --stagiaires 20000 --date 2026-01-15 --flush
+    python manage.py run_benchmarks --output bench.json --compare bench-avant.json
+
+Débit sous concurrence, à comparer entre profils de base (voir DATABASES dans config/settings.py) :
+    SQLITE_JOURNAL_MODE=delete SQLITE_SYNCHRONOUS=full python manage.py run_benchmarks --no-scenarios --threads 8 --output rollback.json
+    python manage.py run_benchmarks --no-scenarios --threads 8 --compare rollback.json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from habilitations_app.benchmarks import (
+    DatasetManquant, SCENARIOS, compare, compare_throughput, run_benchmarks,
+)
+
+
+class Command(BaseCommand):
+    help = "Exécute la suite de benchmarks sur un jeu généré par generate_dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help="Préfixe du jeu de données")
+        parser.add_argument('--repeat', type=int, default=5, help="Mesures par scénario (après une chauffe)")
+        parser.add_argument('--only', action='append', choices=[s.nom for s in SCENARIOS],
+                            help="Scénario à exécuter (option répétable)")
+        parser.add_argument('--csv-lignes', type=int, default=200, help="Lignes du CSV importé")
+        parser.add_argument('--no-scenarios', action='store_true', help="Ne pas exécuter les scénarios HTTP")
+        parser.add_argument('--threads', type=int, default=0, help="Mesurer le débit avec N connexions concurrentes")
+        parser.add_argument('--duration', type=float, default=10, help="Durée (secondes) de la mesure de débit")
+        parser.add_argument('--write-ratio', type=float, default=0.2, help="Part des opérations d'écriture")
+        parser.add_argument('--output', help="Fichier JSON des résultats")
+        parser.add_argument('--compare', help="Fichier JSON d'une exécution précédente")
+
+    def handle(self, *args, **options):
+        precedent = None
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as fh:
+                    precedent = json.load(fh)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Lecture de {options['compare']} impossible : {exc}")
+
+        try:
+            resultat = run_benchmarks(
+                prefix=options['prefix'], repeat=max(1, options['repeat']),
+                only=[] if options['no_scenarios'] else options['only'],
+                csv_lignes=options['csv_lignes'], stdout=self.stdout,
+                throughput={
+                    'threads': options['threads'], 'duration': options['duration'],
+                    'write_ratio': options['write_ratio'],
+                } if options['threads'] > 0 else None,
+            )
+        except DatasetManquant as exc:
+            raise CommandError(str(exc))
+
+        meta = resultat['meta']
+        self.stdout.write(f"Commit {meta['commit'] or '?'} - base {meta['database']} - jeu {meta['dataset']}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                json.dump(resultat, fh, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Résultats écrits dans {options['output']}"))
+
+        if precedent is not None:
+            self.stdout.write(f"\nComparaison avec {options['compare']} (commit {precedent.get('meta', {}).get('commit') or '?'}) :")
+            for ligne in compare(resultat, precedent):
+                delta = f"{ligne['delta_pct']:+.1f} %" if ligne['delta_pct'] is not None else 'n/a'
+                self.stdout.write(
+                    f"{ligne['scenario']:<28} {ligne['median_ms_avant']:>9.1f} → {ligne['median_ms']:>9.1f} ms "
+                    f"({delta})  requêtes {ligne['queries_avant']} → {ligne['queries']}"
+                )
+            debit = compare_throughput(resultat, precedent)
+            if debit is not None:
+                delta = f"{debit['delta_pct']:+.1f} %" if debit['delta_pct'] is not None else 'n/a'
+                self.stdout.write(
+                    f"{'débit (op/s)':<28} {debit['ops_s_avant']:>9.1f} → {debit['ops_s']:>9.1f} "
+                    f"({delta})  erreurs de verrou {debit['erreurs_avant']} → {debit['erreurs']}"
+                )
@@ -0,0 +1,57 @@
+"""
+Lance les processus workers de la file de jobs de fond (modèle Job)
+"""
+import multiprocessing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from habilitations_app.jobs import worker_loop
+
+
+class Command(BaseCommand):
+    help = "Exécute les jobs en attente (import CSV, PDF...) dans N processus"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Nombre de processus (défaut : JOB_WORKERS)")
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help="Attente en secondes quand la file est vide (défaut : JOB_POLL_INTERVAL)")
+        parser.add_argument('--once', action='store_true',
+                            help="Traiter les jobs en attente puis s'arrêter")
+
+    def handle(self, *args, **options):
+        workers = options['workers'] or getattr(settings, 'JOB_WORKERS', 2)
+        poll_interval = options['poll_interval'] or getattr(settings, 'JOB_POLL_INTERVAL', 2.0)
+        once = options['once']
+
+        # Les jobs abandonnés (plus de battement de cœur) sont remis en file par la boucle des workers
+        if workers == 1:
+            done = worker_loop(poll_interval=poll_interval, stop_when_idle=once)
+            self.stdout.write(self.style.SUCCESS(f"{done} job(s) traité(s)"))
+            return
+
+        # Les enfants ouvrent leurs propres connexions. Processus non démons (pas de
+        # multiprocessing.Pool) : un job peut à son tour lancer le pool de rendu PDF.
+        connections.close_all()
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_worker_process, args=(results, poll_interval, once))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        done = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        self.stdout.write(self.style.SUCCESS(f"{done} job(s) traité(s)"))
+
+
+def _worker_process(results, poll_interval, once):
+    """Point d'entrée d'un processus worker : renvoie le nombre de jobs traités au parent"""
+    done = 0
+    try:
+        done = worker_loop(poll_interval=poll_interval, stop_when_idle=once)
+    finally:
+        results.put(done)
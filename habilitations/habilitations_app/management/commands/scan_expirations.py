@@ -0,0 +1,34 @@
+"""
+Scan incrémental des expirations : titres échus et renouvellements à planifier
+"""
+from django.core.management.base import BaseCommand
+
+from habilitations_app.services_expirations import scan_expirations
+
+
+class Command(BaseCommand):
+    help = "Passe les titres échus à 'expire' et planifie les renouvellements depuis le dernier scan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, default=None,
+                            help="Jours d'avance pour planifier les renouvellements (défaut : RENOUVELLEMENT_HORIZON_JOURS)")
+        parser.add_argument('--batch-size', type=int, default=None, help="Titres par lot")
+        parser.add_argument('--full', action='store_true', help="Ignorer les curseurs et tout reparcourir")
+        parser.add_argument('--dry-run', action='store_true', help="Compter sans rien écrire")
+
+    def handle(self, *args, **options):
+        resultat = scan_expirations(
+            horizon_jours=options['horizon'],
+            batch_size=options['batch_size'],
+            full=options['full'],
+            dry_run=options['dry_run'],
+        )
+        for ligne in resultat['tenants']:
+            tenant = ligne['tenant_id'] or 'sans tenant'
+            self.stdout.write(
+                f"Tenant {tenant} : {ligne['expires']} expiré(s), {ligne['renouvellements']} renouvellement(s)"
+            )
+        verbe = "à traiter" if options['dry_run'] else "traités"
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultat['expires']} titre(s) expiré(s), {resultat['renouvellements']} renouvellement(s) planifié(s) {verbe}"
+        ))
@@ -4,6 +4,12 @@ Supporte les rôles super_admin, admin_of, secretariat, formateur, responsable_p
 Résout le tenant depuis le sous-domaine ou le profil utilisateur et injecte des helpers sur la requête.
 """
 
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import redirect
@@ -12,6 +18,98 @@ from django.utils.functional import cached_property
 from .models import Tenant
 
 
+ROLE_FLAGS = {
+    'is_super_admin': 'super_admin',
+    'is_admin_of': 'admin_of',
+    'is_secretariat': 'secretariat',
+    'is_formateur': 'formateur',
+    'is_responsable_pme': 'responsable_pme',
+    'is_stagiaire': 'stagiaire',
+}
+
+
+@dataclass(frozen=True)
+class RequestPrincipal:
+    """Identité résolue une seule fois par requête (rôle, tenant, entreprise).
+
+    Les drapeaux de rôle sont calculés à la construction ; décorateurs,
+    helpers d'accès et vues s'appuient dessus au lieu de relire le profil.
+    """
+
+    user_id: Optional[int] = None
+    profil_id: Optional[int] = None
+    role: Optional[str] = None
+    tenant_id: Optional[int] = None
+    entreprise_id: Optional[int] = None
+    is_superuser: bool = False
+    is_super_admin: bool = False
+    is_admin_of: bool = False
+    is_secretariat: bool = False
+    is_formateur: bool = False
+    is_responsable_pme: bool = False
+    is_stagiaire: bool = False
+
+    @classmethod
+    def from_profil(cls, user, profil):
+        return cls(
+            user_id=user.pk,
+            profil_id=profil.pk,
+            role=profil.role,
+            tenant_id=profil.tenant_id,
+            entreprise_id=profil.entreprise_id,
+            is_superuser=user.is_superuser,
+            **{flag: profil.role == role for flag, role in ROLE_FLAGS.items()}
+        )
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    @property
+    def is_of(self):
+        return self.is_admin_of or self.is_secretariat or self.is_formateur
+
+    def has_role(self, roles):
+        return self.role in roles or self.is_super_admin
+
+
+ANONYMOUS_PRINCIPAL = RequestPrincipal()
+
+
+def load_profil(user):
+    """Charge le profil et ses relations (tenant, entreprise, tenant_of) en une requête.
+
+    Le profil est rattaché au cache de ``user.profil`` pour que les accès
+    ultérieurs (vues, formulaires, templates) ne déclenchent plus de requête.
+    """
+    from .models import ProfilUtilisateur
+
+    try:
+        profil = ProfilUtilisateur.objects.select_related(
+            'tenant',
+            'entreprise',
+            'entreprise__tenant',
+            'entreprise__tenant_of',
+        ).get(user_id=user.pk)
+    except ProfilUtilisateur.DoesNotExist:
+        return None
+    user.profil = profil
+    return profil
+
+
+def get_request_principal(request):
+    """Retourne le principal de la requête (le construit si le middleware n'est pas passé)."""
+    principal = getattr(request, 'principal', None)
+    if principal is None:
+        principal = ANONYMOUS_PRINCIPAL
+        if request.user.is_authenticated:
+            profil = load_profil(request.user)
+            if profil is not None:
+                principal = RequestPrincipal.from_profil(request.user, profil)
+        request.principal = principal
+    return principal
+
+
 class MultiTenantMiddleware:
     """Middleware pour l'isolation multi-tenant"""
     
@@ -20,54 +118,94 @@ class MultiTenantMiddleware:
     
     def __call__(self, request):
         request.tenant = resolve_tenant_from_host(request)
+        request.profil = None
+        request.principal = ANONYMOUS_PRINCIPAL
 
-        # Récupération du profil utilisateur
+        # Récupération du profil utilisateur (une seule requête avec ses relations)
         if request.user.is_authenticated:
-            try:
-                profil = request.user.profil
+            profil = load_profil(request.user)
+            if profil is not None:
                 request.profil = profil
+                request.principal = RequestPrincipal.from_profil(request.user, profil)
                 # Si le profil n'a pas de tenant explicite, tenter de dériver depuis l'entreprise OF
                 if not request.tenant:
                     request.tenant = (
-                        getattr(profil, 'tenant', None)
+                        profil.tenant
                         or getattr(profil.entreprise, 'tenant_of', None)
                         or getattr(profil.entreprise, 'tenant', None)
                     )
 
-                request.is_super_admin = profil.est_super_admin
-                request.is_admin_of = profil.est_admin_of
-                request.is_secretariat = profil.est_secretariat
-                request.is_formateur = profil.est_formateur
-                request.is_responsable_pme = profil.est_responsable_pme
-                request.is_stagiaire = profil.est_stagiaire
-            except Exception:
-                request.profil = None
-                request.is_super_admin = False
-                request.is_admin_of = False
-                request.is_secretariat = False
-                request.is_formateur = False
-                request.is_responsable_pme = False
-                request.is_stagiaire = False
-        else:
-            request.profil = None
-            request.is_super_admin = False
-            request.is_admin_of = False
-            request.is_secretariat = False
-            request.is_formateur = False
-            request.is_responsable_pme = False
-            request.is_stagiaire = False
-        
+        for flag in ROLE_FLAGS:
+            setattr(request, flag, getattr(request.principal, flag))
+
         response = self.get_response(request)
         return response
 
 
+# Cache process-local hôte → tenant (positif et négatif), invalidé par les signaux Tenant.
+# LRU borné à TENANT_CACHE_MAX_SIZE hôtes : l'en-tête Host est fourni par le client.
+_tenant_cache = OrderedDict()
+_tenant_cache_lock = threading.Lock()
+_tenant_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+
+def _tenant_cache_ttl():
+    return getattr(settings, 'TENANT_CACHE_TTL', 300)
+
+
+def _tenant_cache_max_size():
+    return getattr(settings, 'TENANT_CACHE_MAX_SIZE', 1000)
+
+
+def invalidate_tenant_cache():
+    """Vide le cache hôte → tenant (appelé sur post_save/post_delete de Tenant)."""
+    with _tenant_cache_lock:
+        _tenant_cache.clear()
+        _tenant_cache_stats['invalidations'] += 1
+
+
+def tenant_cache_stats():
+    """Compteurs du cache de résolution des tenants (hits, misses, évictions, taille)."""
+    with _tenant_cache_lock:
+        stats = dict(_tenant_cache_stats)
+        stats['size'] = len(_tenant_cache)
+        stats['max_size'] = _tenant_cache_max_size()
+    return stats
+
+
 def resolve_tenant_from_host(request):
-    """Résout le tenant à partir du sous-domaine ou du domaine complet."""
+    """Résout le tenant à partir du sous-domaine ou du domaine complet.
+
+    Le résultat (y compris l'absence de tenant) est mis en cache par hôte
+    pendant TENANT_CACHE_TTL secondes, dans la limite de TENANT_CACHE_MAX_SIZE
+    hôtes (les moins récemment utilisés sont évincés).
+    """
 
     host = request.get_host().split(':')[0].lower()
     if host in ['localhost', '127.0.0.1']:
         return None
 
+    now = time.monotonic()
+    with _tenant_cache_lock:
+        entry = _tenant_cache.get(host)
+        if entry is not None and entry[1] > now:
+            _tenant_cache.move_to_end(host)
+            _tenant_cache_stats['hits'] += 1
+            return entry[0]
+
+    tenant = _lookup_tenant(host)
+    with _tenant_cache_lock:
+        _tenant_cache_stats['misses'] += 1
+        _tenant_cache[host] = (tenant, now + _tenant_cache_ttl())
+        _tenant_cache.move_to_end(host)
+        while len(_tenant_cache) > _tenant_cache_max_size():
+            _tenant_cache.popitem(last=False)
+            _tenant_cache_stats['evictions'] += 1
+    return tenant
+
+
+def _lookup_tenant(host):
+    """Recherche en base du tenant pour un hôte (domaine dédié puis sous-domaine)."""
     base_domain = getattr(settings, 'SITE_DOMAIN', '').lower()
     subdomain = None
 
@@ -90,122 +228,17 @@ def resolve_tenant_from_host(request):
 
 def get_accessible_stagiaires(user):
     """Retourne la liste des stagiaires accessibles selon le rôle de l'utilisateur"""
-    from .models import Stagiaire
-    
-    if not user.is_authenticated:
-        return Stagiaire.objects.none()
-    
-    try:
-        profil = user.profil
-    except:
-        return Stagiaire.objects.none()
-    
-    # Super Admin : tous les stagiaires
-    if profil.est_super_admin:
-        return Stagiaire.objects.all()
-    
-    tenant = getattr(profil, 'tenant', None)
-    
-    # Admin OF / Secrétariat : stagiaires du tenant
-    if profil.est_admin_of or profil.est_secretariat:
-        qs = Stagiaire.objects.all()
-        if tenant:
-            qs = qs.filter(tenant=tenant)
-        else:
-            qs = qs.filter(organisme_formation=profil.entreprise)
-        return qs
-
-    # Formateur : stagiaires présents dans ses sessions
-    if profil.est_formateur:
-        return Stagiaire.objects.filter(formations__session__formateur=user).distinct()
-    
-    # Responsable PME : employés de sa PME uniquement
-    if profil.est_responsable_pme:
-        return Stagiaire.objects.filter(entreprise=profil.entreprise)
-    
-    # Stagiaire : son propre dossier uniquement
-    if profil.est_stagiaire:
-        try:
-            return Stagiaire.objects.filter(user=user)
-        except:
-            return Stagiaire.objects.none()
-    
-    return Stagiaire.objects.none()
+    from .scopes import scope_for_user
+    return scope_for_user(user).stagiaires()
 
 
 def get_accessible_entreprises(user):
     """Retourne la liste des entreprises accessibles selon le rôle de l'utilisateur"""
-    from .models import Entreprise
-    
-    if not user.is_authenticated:
-        return Entreprise.objects.none()
-    
-    try:
-        profil = user.profil
-    except:
-        return Entreprise.objects.none()
-    
-    # Super Admin : toutes les entreprises
-    if profil.est_super_admin:
-        return Entreprise.objects.all()
-    
-    tenant = getattr(profil, 'tenant', None)
-
-    # Admin OF / Secrétariat : son OF + Clients rattachés au tenant
-    if profil.est_admin_of or profil.est_secretariat:
-        from django.db.models import Q
-        qs = Entreprise.objects.filter(
-            Q(pk=profil.entreprise.pk) |
-            Q(type_entreprise='client', stagiaires__organisme_formation=profil.entreprise)
-        )
-        if tenant:
-            qs = qs.filter(Q(tenant=tenant) | Q(pk=profil.entreprise.pk))
-        return qs.distinct()
-
-    # Formateur : accès lecture aux PME des stagiaires de ses sessions
-    if profil.est_formateur:
-        return Entreprise.objects.filter(stagiaires__formations__session__formateur=user).distinct()
-    
-    # Responsable PME : sa PME uniquement
-    if profil.est_responsable_pme:
-        return Entreprise.objects.filter(pk=profil.entreprise.pk)
-    
-    # Stagiaire : aucune entreprise
-    return Entreprise.objects.none()
+    from .scopes import scope_for_user
+    return scope_for_user(user).entreprises()
 
 
 def get_accessible_demandes_formation(user):
     """Retourne les demandes de formation accessibles selon le rôle"""
-    from .models import DemandeFormation
-    
-    if not user.is_authenticated:
-        return DemandeFormation.objects.none()
-    
-    try:
-        profil = user.profil
-    except:
-        return DemandeFormation.objects.none()
-    
-    # Super Admin : toutes les demandes
-    if profil.est_super_admin:
-        return DemandeFormation.objects.all()
-    
-    tenant = getattr(profil, 'tenant', None)
-
-    # Admin OF / Secrétariat : demandes reçues par le tenant
-    if profil.est_admin_of or profil.est_secretariat:
-        qs = DemandeFormation.objects.filter(organisme_formation=profil.entreprise)
-        if tenant:
-            qs = qs.filter(tenant=tenant)
-        return qs
-
-    # Formateur : lecture seule sur les demandes déjà intégrées dans ses sessions
-    if profil.est_formateur:
-        return DemandeFormation.objects.filter(session_creee__formateur=user)
-    
-    # Responsable PME : demandes émises par sa PME
-    if profil.est_responsable_pme:
-        return DemandeFormation.objects.filter(entreprise_demandeuse=profil.entreprise)
-    
-    # Stagiaire : aucune demande
-    return DemandeFormation.objects.none()
+    from .scopes import scope_for_user
+    return scope_for_user(user).demandes_formation()
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0016_alter_tenantformation_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantDashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_stagiaires', models.PositiveIntegerField(default=0)),
+                ('stagiaires_independants', models.PositiveIntegerField(default=0)),
+                ('total_pme', models.PositiveIntegerField(default=0)),
+                ('sessions_en_cours', models.PositiveIntegerField(default=0)),
+                ('demandes_en_attente', models.PositiveIntegerField(default=0)),
+                ('demandes_approuvees', models.PositiveIntegerField(default=0)),
+                ('formations_a_valider', models.PositiveIntegerField(default=0)),
+                ('titres_mois', models.PositiveIntegerField(default=0)),
+                ('date_reference', models.DateField(blank=True, help_text='Jour de calcul des compteurs datés', null=True)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_stats', to='habilitations_app.tenant')),
+            ],
+            options={
+                'verbose_name': 'Statistiques tableau de bord',
+                'verbose_name_plural': 'Statistiques tableaux de bord',
+            },
+        ),
+    ]
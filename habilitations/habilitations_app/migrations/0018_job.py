@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 01:56
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('habilitations_app', '0017_tenantdashboardstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_job', models.CharField(max_length=50)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('echec', 'Échec')], default='en_attente', max_length=20)),
+                ('parametres', models.JSONField(blank=True, default=dict)),
+                ('fichier_entree', models.FileField(blank=True, upload_to='jobs/entrees/%Y/%m/')),
+                ('progression', models.PositiveIntegerField(default=0)),
+                ('progression_total', models.PositiveIntegerField(blank=True, null=True)),
+                ('resultat', models.JSONField(blank=True, null=True)),
+                ('fichier_resultat', models.FileField(blank=True, upload_to='jobs/resultats/%Y/%m/')),
+                ('erreur', models.TextField(blank=True)),
+                ('tentatives', models.PositiveIntegerField(default=0)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_debut', models.DateTimeField(blank=True, null=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True)),
+                ('cree_par', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL)),
+                ('tenant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='habilitations_app.tenant')),
+            ],
+            options={
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', 'date_creation'], name='habilitatio_statut_1aab56_idx'), models.Index(fields=['cree_par', 'date_creation'], name='habilitatio_cree_pa_62a9d2_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:04
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_places_occupees(apps, schema_editor):
+    SessionFormation = apps.get_model('habilitations_app', 'SessionFormation')
+    Formation = apps.get_model('habilitations_app', 'Formation')
+    inscrits = Formation.objects.filter(session=OuterRef('pk')).order_by().values('session').annotate(
+        n=Count('pk')
+    ).values('n')
+    SessionFormation.objects.update(places_occupees=Coalesce(Subquery(inscrits), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0018_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessionformation',
+            name='places_occupees',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_places_occupees, migrations.RunPython.noop),
+    ]
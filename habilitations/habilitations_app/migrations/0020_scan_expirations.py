@@ -0,0 +1,46 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0019_sessionformation_places_occupees'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EtatScanExpirations',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('curseur_expiration', models.DateField(blank=True, null=True)),
+                ('curseur_renouvellement', models.DateField(blank=True, null=True)),
+                ('derniere_execution', models.DateTimeField(blank=True, null=True)),
+                ('resultat', models.JSONField(blank=True, default=dict, help_text='Compteurs de la dernière exécution par tenant')),
+            ],
+            options={
+                'verbose_name': 'État du scan des expirations',
+                'verbose_name_plural': 'État du scan des expirations',
+            },
+        ),
+        migrations.AddField(
+            model_name='tenantdashboardstats',
+            name='renouvellements_planifies',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tenantdashboardstats',
+            name='titres_expirant',
+            field=models.PositiveIntegerField(default=0, help_text='Titres valides expirant sous 90 jours'),
+        ),
+        migrations.AddField(
+            model_name='tenantdashboardstats',
+            name='titres_expires',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='titre',
+            index=models.Index(fields=['statut', 'date_expiration'], name='habilitatio_statut_523fec_idx'),
+        ),
+    ]
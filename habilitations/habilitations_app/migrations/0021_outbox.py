@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0020_scan_expirations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='titre',
+            name='expiration_notifiee_le',
+            field=models.DateTimeField(blank=True, editable=False, help_text="Date de mise en file de l'alerte d'expiration (voir notifications)", null=True),
+        ),
+        migrations.CreateModel(
+            name='Outbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_message', models.CharField(max_length=50)),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('envoye', 'Envoyé'), ('echec', 'Échec')], default='en_attente', max_length=20)),
+                ('destinataires', models.JSONField(default=list)),
+                ('sujet', models.CharField(max_length=255)),
+                ('corps', models.TextField()),
+                ('expediteur', models.CharField(blank=True, help_text='Vide = DEFAULT_FROM_EMAIL', max_length=255)),
+                ('tentatives', models.PositiveIntegerField(default=0)),
+                ('prochaine_tentative', models.DateTimeField(default=django.utils.timezone.now)),
+                ('erreur', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_envoi', models.DateTimeField(blank=True, null=True)),
+                ('tenant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='outbox', to='habilitations_app.tenant')),
+            ],
+            options={
+                'verbose_name': 'Email en attente',
+                'verbose_name_plural': 'Outbox',
+                'ordering': ['date_creation'],
+                'indexes': [models.Index(fields=['statut', 'prochaine_tentative'], name='habilitatio_statut_5969a8_idx'), models.Index(fields=['tenant', 'statut', 'date_envoi'], name='habilitatio_tenant__17e6b2_idx')],
+            },
+        ),
+    ]
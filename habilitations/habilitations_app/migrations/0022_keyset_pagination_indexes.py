@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0021_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='formation',
+            index=models.Index(fields=['tenant', '-date_debut', 'id'], name='habilitatio_tenant__d59ba6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='formation',
+            index=models.Index(fields=['-date_debut', 'id'], name='habilitatio_date_de_c8b003_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='renouvellementhabilitation',
+            index=models.Index(fields=['tenant', 'date_renouvellement_prevue', 'id'], name='habilitatio_tenant__ff6b0a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(fields=['tenant', 'nom', 'prenom', 'id'], name='habilitatio_tenant__cb782c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(fields=['organisme_formation', 'nom', 'prenom', 'id'], name='habilitatio_organis_6a35aa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(fields=['entreprise', 'nom', 'prenom', 'id'], name='habilitatio_entrepr_012b56_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stagiaire',
+            index=models.Index(fields=['nom', 'prenom', 'id'], name='habilitatio_nom_1377b4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titre',
+            index=models.Index(fields=['tenant', '-date_delivrance', 'id'], name='habilitatio_tenant__dbfef4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titre',
+            index=models.Index(fields=['-date_delivrance', 'id'], name='habilitatio_date_de_084f2e_idx'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+FTS_TABLE = 'habilitations_recherche_fts'
+
+
+def create_fts_table(apps, schema_editor):
+    """Table FTS5 de l'index de recherche (SQLite uniquement ; ailleurs : TrigrammeRecherche)"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "texte, prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        )
+    except Exception:
+        # SQLite compilé sans FTS5 : repli sur les trigrammes
+        pass
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0022_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentRecherche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_objet', models.CharField(choices=[('stagiaire', 'Stagiaire'), ('entreprise', 'Entreprise'), ('titre', 'Titre'), ('session', 'Session')], max_length=20)),
+                ('objet_id', models.PositiveBigIntegerField()),
+                ('libelle', models.CharField(max_length=255)),
+                ('texte', models.TextField()),
+                ('tenant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='habilitations_app.tenant')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrigrammeRecherche',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigramme', models.CharField(max_length=3)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrammes', to='habilitations_app.documentrecherche')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['trigramme', 'document'], name='habilitatio_trigram_5a3721_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='documentrecherche',
+            index=models.Index(fields=['tenant', 'type_objet'], name='habilitatio_tenant__01c38f_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='documentrecherche',
+            unique_together={('type_objet', 'objet_id')},
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0023_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCatalogue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('date_modification', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Version du catalogue',
+                'verbose_name_plural': 'Version du catalogue',
+            },
+        ),
+    ]
@@ -0,0 +1,109 @@
+# Generated by Django 4.2.7 on 2026-10-18 02:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _lignes(source):
+    # Copie de services.lignes_competences (les migrations ne dépendent pas du code courant)
+    lignes = {}
+    for type_competence, texte in (('savoir', source.savoirs), ('savoir_faire', source.savoirs_faire)):
+        for ligne in (texte or '').split('\n'):
+            titre = ligne.strip()[:255]
+            if titre:
+                lignes.setdefault(titre, type_competence)
+    return [(type_competence, titre) for titre, type_competence in lignes.items()]
+
+
+def build_competence_items(apps, schema_editor):
+    CompetenceItem = apps.get_model('habilitations_app', 'CompetenceItem')
+    Habilitation = apps.get_model('habilitations_app', 'Habilitation')
+    Specialisation = apps.get_model('habilitations_app', 'Specialisation')
+    ValidationCompetence = apps.get_model('habilitations_app', 'ValidationCompetence')
+
+    items = []
+    for champ, model in (('habilitation', Habilitation), ('specialisation', Specialisation)):
+        for source in model.objects.only('id', 'savoirs', 'savoirs_faire'):
+            items.extend(
+                CompetenceItem(**{champ: source}, type_competence=type_competence, titre=titre, ordre=ordre)
+                for ordre, (type_competence, titre) in enumerate(_lignes(source))
+            )
+    CompetenceItem.objects.bulk_create(items, batch_size=500)
+
+    # Rattacher les validations existantes par (habilitation de la formation, titre)
+    ids = {
+        (habilitation_id, titre): pk
+        for pk, habilitation_id, titre in CompetenceItem.objects.filter(
+            habilitation__isnull=False
+        ).values_list('pk', 'habilitation_id', 'titre')
+    }
+    validations = []
+    for validation in ValidationCompetence.objects.filter(competence_item__isnull=True).select_related('formation').only(
+        'id', 'titre_competence', 'formation__habilitation_id'
+    ).iterator(chunk_size=2000):
+        pk = ids.get((validation.formation.habilitation_id, validation.titre_competence))
+        if pk:
+            validation.competence_item_id = pk
+            validations.append(validation)
+    ValidationCompetence.objects.bulk_update(validations, ['competence_item'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0024_version_catalogue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompetenceItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type_competence', models.CharField(choices=[('savoir', 'Savoir théorique'), ('savoir_faire', 'Savoir-faire pratique')], max_length=20)),
+                ('titre', models.CharField(max_length=255)),
+                ('ordre', models.PositiveSmallIntegerField(default=0)),
+                ('actif', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Compétence du référentiel',
+                'verbose_name_plural': 'Référentiel des compétences',
+                'ordering': ['type_competence', 'ordre'],
+            },
+        ),
+        migrations.AddField(
+            model_name='competenceitem',
+            name='habilitation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='competence_items', to='habilitations_app.habilitation'),
+        ),
+        migrations.AddField(
+            model_name='competenceitem',
+            name='specialisation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='competence_items', to='habilitations_app.specialisation'),
+        ),
+        migrations.AddField(
+            model_name='validationcompetence',
+            name='competence_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='validations', to='habilitations_app.competenceitem'),
+        ),
+        migrations.AddIndex(
+            model_name='validationcompetence',
+            index=models.Index(fields=['competence_item', 'valide'], name='habilitatio_compete_93387c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competenceitem',
+            index=models.Index(fields=['habilitation', 'actif'], name='habilitatio_habilit_b52ec3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competenceitem',
+            index=models.Index(fields=['specialisation', 'actif'], name='habilitatio_special_85695a_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='competenceitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('habilitation__isnull', False)), fields=('habilitation', 'titre'), name='competence_item_habilitation_titre_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='competenceitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('specialisation__isnull', False)), fields=('specialisation', 'titre'), name='competence_item_specialisation_titre_uniq'),
+        ),
+        migrations.RunPython(build_competence_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:12
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+FTS_TABLE = 'habilitations_recherche_fts'
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+# Copies de search.normaliser/trigrammes et des documents de search.INDEXED
+# (les migrations ne dépendent pas du code courant)
+def _normaliser(texte):
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM.sub(' ', texte).strip()
+
+
+def _trigrammes(texte):
+    result = set()
+    for mot in texte.split():
+        mot = f"  {mot} "
+        result.update(mot[i:i + 3] for i in range(len(mot) - 2))
+    return result
+
+
+def _texte(*valeurs):
+    return ' '.join(filter(None, valeurs))
+
+
+DOCUMENTS = {
+    'stagiaire': ('Stagiaire', lambda o: (
+        f"{o.prenom} {o.nom}", _texte(o.nom, o.prenom, o.email, o.poste))),
+    'entreprise': ('Entreprise', lambda o: (
+        o.nom, _texte(o.nom, o.ville, o.code_postal, o.email))),
+    'titre': ('Titre', lambda o: (o.numero_titre, o.numero_titre)),
+    'session': ('SessionFormation', lambda o: (
+        o.numero_session, _texte(o.numero_session, o.lieu))),
+}
+
+
+def fill_search_index(apps, schema_editor, batch_size=1000):
+    """Indexe les objets existants (l'index n'est ensuite tenu à jour que par les signaux)"""
+    connection = schema_editor.connection
+    DocumentRecherche = apps.get_model('habilitations_app', 'DocumentRecherche')
+    TrigrammeRecherche = apps.get_model('habilitations_app', 'TrigrammeRecherche')
+    fts = connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+
+    with connection.cursor() as cursor:
+        if fts:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    TrigrammeRecherche.objects.all().delete()
+    DocumentRecherche.objects.all().delete()
+
+    for type_objet, (model_name, builder) in DOCUMENTS.items():
+        model = apps.get_model('habilitations_app', model_name)
+        last_pk = 0
+        while True:
+            batch = list(model.objects.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            documents = []
+            for objet in batch:
+                libelle, texte = builder(objet)
+                documents.append(DocumentRecherche(
+                    type_objet=type_objet, objet_id=objet.pk, tenant_id=objet.tenant_id,
+                    libelle=(libelle or '')[:255], texte=_normaliser(texte),
+                ))
+            DocumentRecherche.objects.bulk_create(documents)
+            # Relire les identifiants (tous les backends ne les retournent pas)
+            documents = DocumentRecherche.objects.filter(
+                type_objet=type_objet, objet_id__in=[o.pk for o in batch]
+            ).values_list('pk', 'texte')
+            if fts:
+                with connection.cursor() as cursor:
+                    cursor.executemany(f"INSERT INTO {FTS_TABLE}(rowid, texte) VALUES (%s, %s)", list(documents))
+            else:
+                TrigrammeRecherche.objects.bulk_create([
+                    TrigrammeRecherche(document_id=pk, trigramme=t)
+                    for pk, texte in documents for t in _trigrammes(texte)
+                ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0025_competence_items'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
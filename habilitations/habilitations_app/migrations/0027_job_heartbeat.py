@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:31
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_heartbeat(apps, schema_editor):
+    # Jobs en cours au déploiement : dernier signal connu = début du job
+    Job = apps.get_model('habilitations_app', 'Job')
+    Job.objects.filter(statut='en_cours').update(date_heartbeat=F('date_debut'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habilitations_app', '0026_fill_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='date_heartbeat',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_heartbeat, migrations.RunPython.noop),
+    ]
@@ -170,6 +170,24 @@ class TenantFormation(models.Model):
         return f"{self.tenant.nom_public} → {self.type_formation.nom}{package} ({specs})"
 
 
+class VersionCatalogue(models.Model):
+    """Numéro de version du catalogue de formations (ligne unique)
+
+    Incrémenté à chaque modification de TypeFormation, Specialisation ou
+    TenantFormation (signaux) : les réponses JSON du catalogue mises en cache et
+    leurs ETag sont indexés par ce numéro, partagé entre processus.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    date_modification = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Version du catalogue"
+        verbose_name_plural = "Version du catalogue"
+
+    def __str__(self):
+        return f"Catalogue v{self.version}"
+
+
 class FormateurCompetence(models.Model):
     """
     LIEN entre Formateur et spécialisations qu'il peut enseigner
@@ -306,6 +324,11 @@ class Stagiaire(models.Model):
         indexes = [
             models.Index(fields=['entreprise', 'actif']),
             models.Index(fields=['tenant', 'actif']),
+            # Pagination par curseur (nom, prenom, id) dans chaque périmètre
+            models.Index(fields=['tenant', 'nom', 'prenom', 'id']),
+            models.Index(fields=['organisme_formation', 'nom', 'prenom', 'id']),
+            models.Index(fields=['entreprise', 'nom', 'prenom', 'id']),
+            models.Index(fields=['nom', 'prenom', 'id']),
         ]
     
     def __str__(self):
@@ -362,6 +385,9 @@ class Formation(models.Model):
         indexes = [
             models.Index(fields=['tenant', 'statut']),
             models.Index(fields=['stagiaire', 'habilitation', 'statut']),
+            # Pagination par curseur (-date_debut, id)
+            models.Index(fields=['tenant', '-date_debut', 'id']),
+            models.Index(fields=['-date_debut', 'id']),
         ]
     
     def __str__(self):
@@ -378,6 +404,54 @@ class Formation(models.Model):
         return (self.date_fin_prevue - timezone.now().date()).days
 
 
+class CompetenceItem(models.Model):
+    """
+    Ligne du référentiel de compétences d'une Habilitation ou d'une Specialisation
+
+    Version compilée des champs texte ``savoirs`` / ``savoirs_faire`` (une ligne par
+    compétence), resynchronisée à chaque enregistrement de la source
+    (services.synchroniser_referentiel) : une ligne inchangée garde son identifiant,
+    une ligne retirée est désactivée (les validations existantes la référencent encore).
+    """
+    COMPETENCE_TYPES = [
+        ('savoir', 'Savoir théorique'),
+        ('savoir_faire', 'Savoir-faire pratique'),
+    ]
+
+    habilitation = models.ForeignKey(
+        Habilitation, on_delete=models.CASCADE, null=True, blank=True, related_name='competence_items'
+    )
+    specialisation = models.ForeignKey(
+        Specialisation, on_delete=models.CASCADE, null=True, blank=True, related_name='competence_items'
+    )
+    type_competence = models.CharField(max_length=20, choices=COMPETENCE_TYPES)
+    titre = models.CharField(max_length=255)
+    ordre = models.PositiveSmallIntegerField(default=0)
+    actif = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['type_competence', 'ordre']
+        verbose_name = "Compétence du référentiel"
+        verbose_name_plural = "Référentiel des compétences"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['habilitation', 'titre'], condition=models.Q(habilitation__isnull=False),
+                name='competence_item_habilitation_titre_uniq',
+            ),
+            models.UniqueConstraint(
+                fields=['specialisation', 'titre'], condition=models.Q(specialisation__isnull=False),
+                name='competence_item_specialisation_titre_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['habilitation', 'actif']),
+            models.Index(fields=['specialisation', 'actif']),
+        ]
+
+    def __str__(self):
+        return self.titre
+
+
 class ValidationCompetence(models.Model):
     """
     Model pour valider les compétences par spécialisation
@@ -411,6 +485,15 @@ class ValidationCompetence(models.Model):
         help_text="Spécialisation validée (remplace l'ancien système)"
     )
     
+    # Ligne du référentiel (clé entière stable pour rapports et exports)
+    competence_item = models.ForeignKey(
+        CompetenceItem,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='validations',
+    )
+
     # LEGACY : Rendre optionnels pour migration progressive
     type_competence = models.CharField(max_length=20, choices=COMPETENCE_TYPES, blank=True)
     titre_competence = models.CharField(max_length=255, blank=True)
@@ -438,6 +521,7 @@ class ValidationCompetence(models.Model):
         ordering = ['type_competence', 'titre_competence']
         indexes = [
             models.Index(fields=['tenant', 'type_competence']),
+            models.Index(fields=['competence_item', 'valide']),
         ]
     
     def __str__(self):
@@ -494,6 +578,10 @@ class Titre(models.Model):
     date_delivrance = models.DateField()
     date_expiration = models.DateField()
     statut = models.CharField(max_length=20, choices=STATUTS, default='attente')
+    expiration_notifiee_le = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        help_text="Date de mise en file de l'alerte d'expiration (voir notifications)"
+    )
     notes_avis = models.TextField(blank=True)
     delivre_par = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='titres_delivres')
     date_creation = models.DateTimeField(auto_now_add=True)
@@ -503,8 +591,12 @@ class Titre(models.Model):
         ordering = ['-date_delivrance']
         indexes = [
             models.Index(fields=['date_expiration']),
+            models.Index(fields=['statut', 'date_expiration']),  # scan_expirations
             models.Index(fields=['tenant', 'statut']),
             models.Index(fields=['specialisation', 'statut']),  # ⭐ Index nouvelle logique
+            # Pagination par curseur (-date_delivrance, id)
+            models.Index(fields=['tenant', '-date_delivrance', 'id']),
+            models.Index(fields=['-date_delivrance', 'id']),
         ]
     
     def __str__(self):
@@ -589,6 +681,8 @@ class RenouvellementHabilitation(models.Model):
         indexes = [
             models.Index(fields=['tenant', 'statut']),
             models.Index(fields=['date_renouvellement_prevue']),
+            # Pagination par curseur (date_renouvellement_prevue, id)
+            models.Index(fields=['tenant', 'date_renouvellement_prevue', 'id']),
         ]
     
     def __str__(self):
@@ -607,6 +701,10 @@ class RenouvellementHabilitation(models.Model):
         return (self.date_renouvellement_prevue - timezone.now().date()).days
 
 
+class PlacesInsuffisantes(Exception):
+    """Levée par SessionFormation.reserve_seats quand la capacité serait dépassée"""
+
+
 class SessionFormation(models.Model):
     """
     Model pour les sessions de formation créées par les secrétaires
@@ -686,6 +784,9 @@ class SessionFormation(models.Model):
     
     statut = models.CharField(max_length=20, choices=STATUTS, default='planifiee')
     nombre_places = models.IntegerField(default=12)
+    # Compteur dénormalisé des formations rattachées (signaux Formation / reserve_seats ;
+    # recalcul : manage.py reconcile_session_seats)
+    places_occupees = models.PositiveIntegerField(default=0, editable=False)
     notes = models.TextField(blank=True)
     createur = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='sessions_creees')
     date_creation = models.DateTimeField(auto_now_add=True)
@@ -706,37 +807,124 @@ class SessionFormation(models.Model):
             return f"{self.numero_session} - {self.type_formation.nom} ({spec_codes}) - {self.date_debut}"
         return f"{self.numero_session} - {self.habilitation.code if self.habilitation else 'N/A'} ({self.date_debut})"
     
+    @property
+    def nombre_inscrits(self):
+        """Nombre de formations rattachées (compteur places_occupees, sans requête)"""
+        return self.places_occupees
+
     @property
     def places_restantes(self):
         """Retourne le nombre de places disponibles"""
-        stagiaires_inscrits = self.formations_session.count()
-        return max(0, self.nombre_places - stagiaires_inscrits)
+        return max(0, self.nombre_places - self.places_occupees)
     
     @property
     def est_complete(self):
         """Retourne True si la session est complète"""
         return self.places_restantes == 0
+
+    def reserve_seats(self, n=1):
+        """
+        Réserve n places par un UPDATE conditionnel (atomique, sans lecture préalable).
+
+        À utiliser pour les créations en bulk (qui ne déclenchent pas les signaux Formation).
+
+        Raises:
+            PlacesInsuffisantes: si la capacité serait dépassée (rien n'est modifié)
+        """
+        if n <= 0:
+            return
+        updated = SessionFormation.objects.filter(
+            pk=self.pk,
+            places_occupees__lte=models.F('nombre_places') - n,
+        ).update(places_occupees=models.F('places_occupees') + n)
+        if not updated:
+            raise PlacesInsuffisantes(f"Session {self.numero_session} : moins de {n} place(s) disponible(s)")
+        self.refresh_from_db(fields=['places_occupees'])
+
+    def release_seats(self, n=1):
+        """Libère n places (jamais en dessous de zéro)"""
+        if n <= 0:
+            return
+        SessionFormation.objects.filter(pk=self.pk, places_occupees__gte=n).update(
+            places_occupees=models.F('places_occupees') - n
+        )
+        self.refresh_from_db(fields=['places_occupees'])
     
     def formateur_has_competences(self):
         """
         Vérifie que tous les formateurs affectés maîtrisent TOUTES les spécialisations de la session.
         Legacy : si aucun formateur M2M, on tolère (True).
+
+        Utilise l'annotation ``formateurs_competents`` si présente
+        (services.annotate_formateurs_competents), sinon une requête groupée.
         """
-        specs = list(self.spécialisations.all())
-        if not specs:
+        annote = getattr(self, 'formateurs_competents', None)
+        if annote is not None:
+            return annote
+        from .services import qualified_formateur_ids
+        spec_ids = set(self.spécialisations.values_list('pk', flat=True))
+        if not spec_ids:
             return True
-        formateurs = list(self.formateurs.all())
-        if not formateurs:
+        formateur_ids = set(self.formateurs.values_list('pk', flat=True))
+        if not formateur_ids:
             return True  # tolérance legacy, à durcir si besoin
-        for f in formateurs:
-            ok = FormateurCompetence.objects.filter(
-                formateur_profil=f,
-                specialisation__in=specs,
-                actif=True
-            ).count() == len(specs)
-            if not ok:
-                return False
-        return True
+        qualifies = qualified_formateur_ids(spec_ids).filter(
+            formateur_profil_id__in=formateur_ids
+        ).values_list('formateur_profil_id', flat=True)
+        return set(qualifies) == formateur_ids
+
+class TenantDashboardStats(models.Model):
+    """Compteurs matérialisés du tableau de bord Admin OF (une ligne par tenant)
+
+    Tenue à jour par les signaux (Stagiaire, Formation, AvisFormation, Titre,
+    SessionFormation, DemandeFormation) et reconstruite par
+    ``manage.py rebuild_dashboard_stats``. Les compteurs dépendant de la date
+    (sessions en cours, titres du mois) sont recalculés quand ``date_reference``
+    n'est plus la date du jour.
+    """
+    tenant = models.OneToOneField(Tenant, on_delete=models.CASCADE, related_name='dashboard_stats')
+    total_stagiaires = models.PositiveIntegerField(default=0)
+    stagiaires_independants = models.PositiveIntegerField(default=0)
+    total_pme = models.PositiveIntegerField(default=0)
+    sessions_en_cours = models.PositiveIntegerField(default=0)
+    demandes_en_attente = models.PositiveIntegerField(default=0)
+    demandes_approuvees = models.PositiveIntegerField(default=0)
+    formations_a_valider = models.PositiveIntegerField(default=0)
+    titres_mois = models.PositiveIntegerField(default=0)
+    titres_expires = models.PositiveIntegerField(default=0)
+    titres_expirant = models.PositiveIntegerField(default=0, help_text="Titres valides expirant sous 90 jours")
+    renouvellements_planifies = models.PositiveIntegerField(default=0)
+    date_reference = models.DateField(null=True, blank=True, help_text="Jour de calcul des compteurs datés")
+    date_maj = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Statistiques tableau de bord"
+        verbose_name_plural = "Statistiques tableaux de bord"
+
+    def __str__(self):
+        return f"Stats {self.tenant.slug}"
+
+
+class EtatScanExpirations(models.Model):
+    """Curseurs du scan incrémental des expirations (ligne unique, voir ``manage.py scan_expirations``)
+
+    Les titres délivrés dont la date d'expiration est antérieure à ``curseur_expiration``
+    ont déjà été passés à 'expire' ; ceux expirant avant ``curseur_renouvellement`` ont
+    déjà leur renouvellement planifié. Chaque exécution ne parcourt que l'intervalle
+    entre le curseur et la nouvelle borne, via l'index (statut, date_expiration).
+    """
+    curseur_expiration = models.DateField(null=True, blank=True)
+    curseur_renouvellement = models.DateField(null=True, blank=True)
+    derniere_execution = models.DateTimeField(null=True, blank=True)
+    resultat = models.JSONField(default=dict, blank=True, help_text="Compteurs de la dernière exécution par tenant")
+
+    class Meta:
+        verbose_name = "État du scan des expirations"
+        verbose_name_plural = "État du scan des expirations"
+
+    def __str__(self):
+        return f"Scan expirations (expiration < {self.curseur_expiration}, renouvellement < {self.curseur_renouvellement})"
+
 
 class DemandeFormation(models.Model):
     """Demande de formation d'une PME vers un OF
@@ -854,6 +1042,10 @@ class DemandeFormation(models.Model):
     
     @property
     def nombre_stagiaires(self):
+        # Annotation ``nb_stagiaires`` posée par les listes pour éviter un COUNT par ligne
+        nb_stagiaires = getattr(self, 'nb_stagiaires', None)
+        if nb_stagiaires is not None:
+            return nb_stagiaires
         return self.stagiaires.count()
 
 
@@ -1185,8 +1377,149 @@ class InvitationEntreprise(models.Model):
         return timezone.now() > self.expires_at
 
 
+class Job(models.Model):
+    """Tâche de fond (import CSV, génération PDF...) exécutée par ``manage.py run_workers``
+
+    File d'attente stockée en base : aucun broker externe n'est nécessaire.
+    Le résultat JSON est dans ``resultat`` et l'éventuel fichier produit dans ``fichier_resultat``.
+    """
+    STATUTS = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminé'),
+        ('echec', 'Échec'),
+    ]
+
+    type_job = models.CharField(max_length=50)
+    statut = models.CharField(max_length=20, choices=STATUTS, default='en_attente')
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    cree_par = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    parametres = models.JSONField(default=dict, blank=True)
+    fichier_entree = models.FileField(upload_to='jobs/entrees/%Y/%m/', blank=True)
+    progression = models.PositiveIntegerField(default=0)
+    progression_total = models.PositiveIntegerField(null=True, blank=True)
+    resultat = models.JSONField(null=True, blank=True)
+    fichier_resultat = models.FileField(upload_to='jobs/resultats/%Y/%m/', blank=True)
+    erreur = models.TextField(blank=True)
+    tentatives = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_debut = models.DateTimeField(null=True, blank=True)
+    # Dernier signal de vie du worker qui exécute le job (voir jobs.requeue_stale_jobs)
+    date_heartbeat = models.DateTimeField(null=True, blank=True)
+    date_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-date_creation']
+        indexes = [
+            models.Index(fields=['statut', 'date_creation']),
+            models.Index(fields=['cree_par', 'date_creation']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} {self.type_job} ({self.get_statut_display()})"
+
+    @property
+    def est_termine(self):
+        return self.statut in ('termine', 'echec')
+
+
+class Outbox(models.Model):
+    """Email à envoyer, écrit dans la même transaction que le changement métier
+
+    Vidée par lots par ``manage.py dispatch_outbox`` sur une seule connexion SMTP,
+    avec nouvelles tentatives espacées et limite de débit par tenant.
+    """
+    STATUTS = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('envoye', 'Envoyé'),
+        ('echec', 'Échec'),
+    ]
+
+    type_message = models.CharField(max_length=50)
+    statut = models.CharField(max_length=20, choices=STATUTS, default='en_attente')
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='outbox'
+    )
+    destinataires = models.JSONField(default=list)
+    sujet = models.CharField(max_length=255)
+    corps = models.TextField()
+    expediteur = models.CharField(max_length=255, blank=True, help_text="Vide = DEFAULT_FROM_EMAIL")
+    tentatives = models.PositiveIntegerField(default=0)
+    prochaine_tentative = models.DateTimeField(default=timezone.now)
+    erreur = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_envoi = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['date_creation']
+        verbose_name = "Email en attente"
+        verbose_name_plural = "Outbox"
+        indexes = [
+            models.Index(fields=['statut', 'prochaine_tentative']),
+            models.Index(fields=['tenant', 'statut', 'date_envoi']),
+        ]
+
+    def __str__(self):
+        return f"{self.type_message} → {', '.join(self.destinataires)} ({self.get_statut_display()})"
+
+
+class DocumentRecherche(models.Model):
+    """Texte normalisé (minuscules, sans accents) d'un objet cherchable, voir search.py
+
+    Sur SQLite le texte est aussi indexé dans une table FTS5 (rowid = id du document) ;
+    ailleurs, dans TrigrammeRecherche.
+    """
+    TYPES = [
+        ('stagiaire', 'Stagiaire'),
+        ('entreprise', 'Entreprise'),
+        ('titre', 'Titre'),
+        ('session', 'Session'),
+    ]
+
+    type_objet = models.CharField(max_length=20, choices=TYPES)
+    objet_id = models.PositiveBigIntegerField()
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    libelle = models.CharField(max_length=255)
+    texte = models.TextField()
+
+    class Meta:
+        unique_together = [('type_objet', 'objet_id')]
+        indexes = [models.Index(fields=['tenant', 'type_objet'])]
+
+    def __str__(self):
+        return f"{self.type_objet} {self.objet_id} : {self.libelle}"
+
+
+class TrigrammeRecherche(models.Model):
+    """Trigrammes d'un DocumentRecherche (index de repli hors SQLite/FTS5)"""
+    document = models.ForeignKey(DocumentRecherche, on_delete=models.CASCADE, related_name='trigrammes')
+    trigramme = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [models.Index(fields=['trigramme', 'document'])]
+
+
 # Signals pour créer automatiquement un ProfilUtilisateur
-from django.db.models.signals import post_save
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.utils.text import slugify
 
@@ -1240,3 +1573,258 @@ def create_of_entreprise_tenant(sender, instance, created, **kwargs):
             entreprise=entreprise,
             tenant=tenant
         )
+
+
+@receiver(post_save, sender=Tenant)
+@receiver(post_delete, sender=Tenant)
+def invalidate_tenant_resolution_cache(sender, instance, **kwargs):
+    """Invalider le cache hôte → tenant du middleware quand un Tenant change"""
+    from .middleware import invalidate_tenant_cache
+    invalidate_tenant_cache()
+
+
+
+@receiver(post_save, sender=SessionFormation)
+@receiver(post_delete, sender=SessionFormation)
+@receiver(m2m_changed, sender=SessionFormation.formateurs.through)
+def invalidate_formateur_scope_cache(sender, **kwargs):
+    """Invalider le cache des sessions par formateur du moteur de périmètre"""
+    from .scopes import invalidate_formateur_sessions_cache
+    invalidate_formateur_sessions_cache()
+
+
+@receiver(post_save, sender=SessionFormation)
+@receiver(post_delete, sender=SessionFormation)
+@receiver(m2m_changed, sender=SessionFormation.formateurs.through)
+@receiver(post_save, sender=FormateurAffectation)
+@receiver(post_delete, sender=FormateurAffectation)
+def invalidate_planning_formateurs_cache(sender, **kwargs):
+    """Invalider l'index de planning des formateurs (dates, formateurs ou affectations modifiés)"""
+    from .planning import invalidate_planning_cache
+    invalidate_planning_cache()
+
+
+@receiver(post_save, sender=Stagiaire)
+@receiver(post_delete, sender=Stagiaire)
+def invalidate_autocomplete_stagiaires(sender, **kwargs):
+    """Invalider les index d'autocomplétion des stagiaires"""
+    from .autocomplete import invalidate_autocomplete_cache
+    invalidate_autocomplete_cache('stagiaires')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=ProfilUtilisateur)
+@receiver(post_delete, sender=ProfilUtilisateur)
+def invalidate_autocomplete_formateurs(sender, update_fields=None, **kwargs):
+    """Invalider les index d'autocomplétion des formateurs (nom, email ou rôle modifié)"""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return  # Connexion d'un utilisateur
+    from .autocomplete import invalidate_autocomplete_cache
+    invalidate_autocomplete_cache('formateurs')
+
+
+@receiver(post_save, sender=TypeFormation)
+@receiver(post_delete, sender=TypeFormation)
+@receiver(post_save, sender=Specialisation)
+@receiver(post_delete, sender=Specialisation)
+@receiver(post_save, sender=TenantFormation)
+@receiver(post_delete, sender=TenantFormation)
+@receiver(m2m_changed, sender=TenantFormation.spécialisations.through)
+def catalogue_changed(sender, raw=False, **kwargs):
+    """Incrémenter la version du catalogue (invalide les réponses JSON en cache)"""
+    if raw or kwargs.get('action', 'post_').startswith('pre_'):
+        return
+    from .catalogue import bump_catalogue_version
+    bump_catalogue_version()
+
+
+def _schedule_dashboard_stats(group, organisme_formation_id=None, tenant_id=None, stagiaire_id=None):
+    from .services import schedule_dashboard_stats_refresh
+    schedule_dashboard_stats_refresh(
+        group, organisme_formation_id=organisme_formation_id, tenant_id=tenant_id, stagiaire_id=stagiaire_id
+    )
+
+
+# Groupes de compteurs qui suivent le stagiaire (et donc son OF)
+STAGIAIRE_STATS_GROUPS = ('stagiaires', 'formations', 'titres')
+
+
+@receiver(pre_save, sender=Stagiaire)
+def stagiaire_remember_of(sender, instance, raw=False, **kwargs):
+    """Mémoriser l'OF d'origine pour rafraîchir aussi ses compteurs"""
+    if instance.pk and not raw:
+        instance._of_id_initial = Stagiaire.objects.filter(pk=instance.pk).values_list(
+            'organisme_formation_id', flat=True
+        ).first()
+    else:
+        instance._of_id_initial = None
+
+
+@receiver(post_save, sender=Stagiaire)
+def stats_stagiaire_saved(sender, instance, **kwargs):
+    """Mettre à jour les compteurs stagiaires/PME du tenant (des deux OF si le stagiaire change d'OF)"""
+    ancien = getattr(instance, '_of_id_initial', None)
+    if ancien and ancien != instance.organisme_formation_id:
+        for of_id in (ancien, instance.organisme_formation_id):
+            for group in STAGIAIRE_STATS_GROUPS:
+                _schedule_dashboard_stats(group, organisme_formation_id=of_id)
+    else:
+        _schedule_dashboard_stats('stagiaires', organisme_formation_id=instance.organisme_formation_id)
+
+
+@receiver(post_delete, sender=Stagiaire)
+def stats_stagiaire_deleted(sender, instance, **kwargs):
+    """Formations et titres partent en cascade : leur stagiaire n'existera plus au commit"""
+    for group in STAGIAIRE_STATS_GROUPS:
+        _schedule_dashboard_stats(group, organisme_formation_id=instance.organisme_formation_id)
+
+
+@receiver(pre_save, sender=Formation)
+def formation_remember_initial(sender, instance, raw=False, **kwargs):
+    """
+    Mémoriser la session et le stagiaire d'origine (compteurs de places et de statistiques)
+    et réserver la place dans la session de destination.
+
+    Même contrôle de capacité que reserve_seats, avant l'écriture de la formation :
+    PlacesInsuffisantes est levée et rien n'est enregistré si la session est complète.
+    """
+    initial = None
+    if instance.pk and not raw:
+        initial = Formation.objects.filter(pk=instance.pk).values_list('session_id', 'stagiaire_id').first()
+    instance._session_id_initial, instance._stagiaire_id_initial = initial or (None, None)
+    if raw or not instance.session_id or instance.session_id == instance._session_id_initial:
+        return
+    reservee = SessionFormation.objects.filter(
+        pk=instance.session_id, places_occupees__lt=models.F('nombre_places'),
+    ).update(places_occupees=models.F('places_occupees') + 1)
+    if not reservee:
+        raise PlacesInsuffisantes(f"Session {instance.session.numero_session} : plus de place disponible")
+
+
+@receiver(post_save, sender=Formation)
+def seats_formation_saved(sender, instance, raw=False, **kwargs):
+    """Formation déplacée : libérer la place de l'ancienne session (la nouvelle est réservée en pre_save)"""
+    ancienne = getattr(instance, '_session_id_initial', None)
+    if raw or not ancienne or ancienne == instance.session_id:
+        return
+    SessionFormation.objects.filter(pk=ancienne, places_occupees__gt=0).update(
+        places_occupees=models.F('places_occupees') - 1
+    )
+
+
+@receiver(post_delete, sender=Formation)
+def seats_formation_deleted(sender, instance, **kwargs):
+    """Formation supprimée : libérer sa place"""
+    if instance.session_id:
+        SessionFormation.objects.filter(pk=instance.session_id, places_occupees__gt=0).update(
+            places_occupees=models.F('places_occupees') - 1
+        )
+
+
+@receiver(post_save, sender=Habilitation)
+@receiver(post_save, sender=Specialisation)
+def referentiel_competences_changed(sender, instance, raw=False, **kwargs):
+    """Resynchroniser le référentiel de compétences (sans écriture si le texte n'a pas changé)"""
+    if raw:
+        # loaddata : les compétences sont chargées par la fixture elle-même
+        return
+    from .services import synchroniser_referentiel
+    synchroniser_referentiel(instance)
+
+
+@receiver(post_save, sender=Formation)
+def competences_formation_creee(sender, instance, created, raw=False, **kwargs):
+    """Matérialiser la checklist de compétences d'une nouvelle formation"""
+    if created and not raw:
+        from .services import materialiser_competences
+        materialiser_competences([instance])
+
+
+def _schedule_stagiaire_stats(group, instance):
+    """Compteurs de l'OF du stagiaire d'une formation/d'un titre, et de l'ancien s'il a changé"""
+    _schedule_dashboard_stats(group, stagiaire_id=instance.stagiaire_id)
+    ancien = getattr(instance, '_stagiaire_id_initial', None)
+    if ancien and ancien != instance.stagiaire_id:
+        _schedule_dashboard_stats(group, stagiaire_id=ancien)
+
+
+@receiver(post_save, sender=Formation)
+@receiver(post_delete, sender=Formation)
+def stats_formation_changed(sender, instance, **kwargs):
+    """Mettre à jour le compteur de formations à valider (OF résolu au commit, ancien stagiaire compris)"""
+    _schedule_stagiaire_stats('formations', instance)
+
+
+@receiver(post_save, sender=AvisFormation)
+@receiver(post_delete, sender=AvisFormation)
+def stats_avis_changed(sender, instance, **kwargs):
+    """Un avis retire la formation des formations à valider"""
+    of_id = Formation.objects.filter(pk=instance.formation_id).values_list(
+        'stagiaire__organisme_formation_id', flat=True
+    ).first()
+    _schedule_dashboard_stats('formations', organisme_formation_id=of_id)
+
+
+@receiver(pre_save, sender=Titre)
+def titre_remember_stagiaire(sender, instance, raw=False, **kwargs):
+    """Mémoriser le stagiaire d'origine pour rafraîchir aussi les compteurs de son OF"""
+    if instance.pk and not raw:
+        instance._stagiaire_id_initial = Titre.objects.filter(pk=instance.pk).values_list(
+            'stagiaire_id', flat=True
+        ).first()
+    else:
+        instance._stagiaire_id_initial = None
+
+
+@receiver(post_save, sender=Titre)
+@receiver(post_delete, sender=Titre)
+def stats_titre_changed(sender, instance, **kwargs):
+    """Mettre à jour le compteur de titres du mois (OF résolu au commit, ancien stagiaire compris)"""
+    _schedule_stagiaire_stats('titres', instance)
+
+
+@receiver(post_save, sender=RenouvellementHabilitation)
+@receiver(post_delete, sender=RenouvellementHabilitation)
+def stats_renouvellement_changed(sender, instance, **kwargs):
+    """Mettre à jour le compteur de renouvellements planifiés"""
+    of_id = Titre.objects.filter(pk=instance.titre_precedent_id).values_list(
+        'stagiaire__organisme_formation_id', flat=True
+    ).first()
+    _schedule_dashboard_stats('titres', organisme_formation_id=of_id)
+
+
+@receiver(post_save, sender=SessionFormation)
+@receiver(post_delete, sender=SessionFormation)
+def stats_session_changed(sender, instance, **kwargs):
+    """Mettre à jour le compteur de sessions en cours"""
+    _schedule_dashboard_stats('sessions', tenant_id=instance.tenant_id)
+
+
+@receiver(post_save, sender=DemandeFormation)
+@receiver(post_delete, sender=DemandeFormation)
+def stats_demande_changed(sender, instance, **kwargs):
+    """Mettre à jour les compteurs de demandes reçues"""
+    _schedule_dashboard_stats('demandes', organisme_formation_id=instance.organisme_formation_id)
+
+
+@receiver(post_save, sender=Stagiaire)
+@receiver(post_save, sender=Entreprise)
+@receiver(post_save, sender=Titre)
+@receiver(post_save, sender=SessionFormation)
+def search_index_objet(sender, instance, raw=False, **kwargs):
+    """Réindexer l'objet dans la recherche plein texte"""
+    if raw:
+        return
+    from .search import TYPE_PAR_MODELE, index_objets
+    index_objets(TYPE_PAR_MODELE[sender], [instance])
+
+
+@receiver(post_delete, sender=Stagiaire)
+@receiver(post_delete, sender=Entreprise)
+@receiver(post_delete, sender=Titre)
+@receiver(post_delete, sender=SessionFormation)
+def search_desindexer_objet(sender, instance, **kwargs):
+    """Retirer l'objet de la recherche plein texte"""
+    from .search import TYPE_PAR_MODELE, desindexer
+    desindexer(TYPE_PAR_MODELE[sender], [instance.pk])
@@ -0,0 +1,251 @@
+# habilitations_app/notifications.py
+"""
+Notifications par email via une outbox stockée en base (modèle Outbox)
+
+- enqueue_email() écrit le message dans la transaction courante : il n'est envoyé
+  que si le changement métier est validé
+- notifier_invitation() / enqueue_expiration_alerts() construisent les messages
+  (rendus une fois à la mise en file, le dispatcher ne touche plus aux données)
+- dispatch_outbox() vide la file par lots sur une seule connexion au backend email
+  (SMTP, fichier, console...), avec nouvelles tentatives espacées et limite de
+  débit par tenant ; lancé par ``manage.py dispatch_outbox``
+"""
+import os
+import socket
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Outbox, ProfilUtilisateur, Titre
+
+
+# ==================== MISE EN FILE ====================
+
+def enqueue_email(type_message, destinataires, sujet, corps, tenant=None):
+    """
+    Ajoute un email à l'outbox (à appeler dans la transaction du changement métier).
+
+    Args:
+        type_message: Catégorie ('invitation', 'expiration'...)
+        destinataires: Adresse ou liste d'adresses
+        sujet, corps: Contenu déjà rendu
+        tenant: Tenant émetteur (limite de débit, nom d'expéditeur)
+    """
+    if isinstance(destinataires, str):
+        destinataires = [destinataires]
+    return Outbox.objects.create(
+        type_message=type_message,
+        destinataires=list(destinataires),
+        sujet=sujet[:255],
+        corps=corps,
+        expediteur=_expediteur(tenant),
+        tenant=tenant,
+    )
+
+
+def _expediteur(tenant):
+    if tenant is None:
+        return ''
+    return f"{tenant.nom_public} <{settings.DEFAULT_FROM_EMAIL}>"
+
+
+def notifier_invitation(invitation, lien):
+    """Met en file l'email d'invitation d'un Responsable PME"""
+    organisme_formation = invitation.organisme_formation
+    tenant = getattr(organisme_formation, 'tenant_of', None)
+    context = {'invitation': invitation, 'lien': lien, 'organisme_formation': organisme_formation}
+    return enqueue_email(
+        'invitation',
+        invitation.email_contact,
+        f"Invitation de {organisme_formation.nom} sur Oxalis",
+        render_to_string('habilitations_app/emails/invitation.txt', context),
+        tenant=tenant,
+    )
+
+
+def enqueue_expiration_alerts(horizon_jours=None, digest=True, today=None):
+    """
+    Met en file les alertes d'expiration des titres non encore notifiés.
+
+    Args:
+        horizon_jours: Titres expirant sous ce délai (défaut : RENOUVELLEMENT_HORIZON_JOURS)
+        digest: Un seul email par PME listant tous ses titres (sinon un email par titre)
+        today: Date de référence
+
+    Returns:
+        (nombre d'emails mis en file, nombre de titres notifiés)
+    """
+    today = today or timezone.now().date()
+    if horizon_jours is None:
+        horizon_jours = getattr(settings, 'RENOUVELLEMENT_HORIZON_JOURS', 90)
+
+    titres = list(Titre.objects.filter(
+        statut='delivre',
+        date_expiration__gte=today,
+        date_expiration__lte=today + timedelta(days=horizon_jours),
+        expiration_notifiee_le__isnull=True,
+        stagiaire__entreprise__isnull=False,
+    ).select_related(
+        'stagiaire__entreprise', 'habilitation', 'specialisation', 'tenant'
+    ).order_by('stagiaire__entreprise_id', 'date_expiration'))
+    if not titres:
+        return 0, 0
+
+    par_entreprise = defaultdict(list)
+    for titre in titres:
+        par_entreprise[titre.stagiaire.entreprise].append(titre)
+    destinataires = _destinataires_pme({e.pk for e in par_entreprise})
+
+    emails = 0
+    notifies = []
+    with transaction.atomic():
+        for entreprise, titres_pme in par_entreprise.items():
+            adresses = destinataires.get(entreprise.pk) or [entreprise.email]
+            groupes = [titres_pme] if digest else [[titre] for titre in titres_pme]
+            for groupe in groupes:
+                context = {'entreprise': entreprise, 'titres': groupe, 'today': today}
+                sujet = (
+                    f"{len(groupe)} titre(s) d'habilitation expirent bientôt" if digest
+                    else f"Titre {groupe[0].numero_titre} : expiration le {groupe[0].date_expiration:%d/%m/%Y}"
+                )
+                enqueue_email(
+                    'expiration',
+                    adresses,
+                    sujet,
+                    render_to_string('habilitations_app/emails/expiration_titres.txt', context),
+                    tenant=groupe[0].tenant,
+                )
+                emails += 1
+            notifies.extend(titre.pk for titre in titres_pme)
+        Titre.objects.filter(pk__in=notifies).update(expiration_notifiee_le=timezone.now())
+    return emails, len(notifies)
+
+
+def _destinataires_pme(entreprise_ids):
+    """Emails des Responsables PME actifs, par entreprise (une requête)"""
+    destinataires = defaultdict(list)
+    rows = ProfilUtilisateur.objects.filter(
+        entreprise_id__in=entreprise_ids, role__in=('responsable_pme', 'client'), actif=True,
+    ).exclude(user__email='').values_list('entreprise_id', 'user__email')
+    for entreprise_id, email in rows:
+        destinataires[entreprise_id].append(email)
+    return destinataires
+
+
+# ==================== ENVOI ====================
+
+def _claim_batch(worker_id, batch_size):
+    """
+    Réserve un lot de messages dus, en respectant la limite de débit par tenant.
+
+    Les messages au-delà du quota d'un tenant restent en attente pour un lot suivant.
+    """
+    now = timezone.now()
+    limite = getattr(settings, 'OUTBOX_TENANT_RATE_LIMIT', 0)
+    dus = Outbox.objects.filter(statut='en_attente', prochaine_tentative__lte=now)
+
+    envoyes = Counter()
+    if limite:
+        envoyes.update(dict(Outbox.objects.filter(
+            statut='envoye', date_envoi__gte=now - timedelta(minutes=1), tenant__isnull=False,
+        ).order_by().values('tenant_id').annotate(n=Count('pk')).values_list('tenant_id', 'n')))
+        # Tenants déjà au quota : exclus d'emblée pour ne pas affamer les autres
+        dus = dus.exclude(tenant_id__in=[tenant_id for tenant_id, n in envoyes.items() if n >= limite])
+
+    retenus = []
+    for pk, tenant_id in dus.order_by('prochaine_tentative', 'pk').values_list('pk', 'tenant_id')[:batch_size * 2]:
+        if limite and tenant_id:
+            if envoyes[tenant_id] >= limite:
+                continue
+            envoyes[tenant_id] += 1
+        retenus.append(pk)
+        if len(retenus) >= batch_size:
+            break
+    if not retenus:
+        return []
+
+    # prochaine_tentative = date de réservation, pour repérer un dispatcher interrompu
+    Outbox.objects.filter(pk__in=retenus, statut='en_attente').update(
+        statut='en_cours', worker=worker_id, tentatives=F('tentatives') + 1, prochaine_tentative=now,
+    )
+    return list(Outbox.objects.filter(pk__in=retenus, statut='en_cours', worker=worker_id))
+
+
+def _retry_delay(tentatives):
+    return timedelta(seconds=getattr(settings, 'OUTBOX_RETRY_BASE_DELAY', 60) * 2 ** max(tentatives - 1, 0))
+
+
+def _mark_failed(message, erreur):
+    """Replanifie un message en échec, ou l'abandonne après OUTBOX_MAX_TENTATIVES"""
+    if message.tentatives >= getattr(settings, 'OUTBOX_MAX_TENTATIVES', 5):
+        fields = {'statut': 'echec'}
+    else:
+        fields = {'statut': 'en_attente', 'prochaine_tentative': timezone.now() + _retry_delay(message.tentatives)}
+    Outbox.objects.filter(pk=message.pk).update(erreur=str(erreur)[:2000], worker='', **fields)
+
+
+def dispatch_outbox(batch_size=None, max_batches=None, connection=None):
+    """
+    Envoie les messages dus, lot par lot, sur une seule connexion au backend email.
+
+    Args:
+        batch_size: Messages par lot (défaut : OUTBOX_BATCH_SIZE)
+        max_batches: Nombre maximum de lots (None = jusqu'à épuisement)
+        connection: Connexion email existante (défaut : get_connection())
+
+    Returns:
+        dict avec clés 'envoyes', 'echecs'
+    """
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    connection = connection or get_connection()
+    resultat = {'envoyes': 0, 'echecs': 0}
+    lots = 0
+
+    connection.open()
+    try:
+        while max_batches is None or lots < max_batches:
+            batch = _claim_batch(worker_id, batch_size)
+            if not batch:
+                break
+            lots += 1
+            envoyes = []
+            for message in batch:
+                email = EmailMessage(
+                    subject=message.sujet,
+                    body=message.corps,
+                    from_email=message.expediteur or None,
+                    to=message.destinataires,
+                    connection=connection,
+                )
+                try:
+                    # Un message à la fois sur la connexion ouverte : un échec n'invalide pas le lot
+                    if connection.send_messages([email]) != 1:
+                        raise RuntimeError("Message refusé par le backend")
+                except Exception as exc:
+                    _mark_failed(message, exc)
+                    resultat['echecs'] += 1
+                else:
+                    envoyes.append(message.pk)
+            if envoyes:
+                Outbox.objects.filter(pk__in=envoyes).update(
+                    statut='envoye', date_envoi=timezone.now(), erreur='', worker='',
+                )
+                resultat['envoyes'] += len(envoyes)
+    finally:
+        connection.close()
+    return resultat
+
+
+def requeue_stale_messages(timeout_seconds):
+    """Remet en attente les messages 'en_cours' d'un dispatcher interrompu"""
+    limite = timezone.now() - timedelta(seconds=timeout_seconds)
+    return Outbox.objects.filter(statut='en_cours', prochaine_tentative__lt=limite).update(
+        statut='en_attente', worker='',
+    )
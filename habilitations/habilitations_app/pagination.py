@@ -0,0 +1,275 @@
+# habilitations_app/pagination.py
+"""
+Pagination par curseur (keyset) des grandes listes
+
+Au lieu de ``COUNT(*)`` + ``OFFSET n``, chaque page filtre sur les valeurs de tri
+de la dernière ligne vue (``(nom, prenom, id) > (…)``) et lit ``per_page + 1``
+lignes le long d'un index composite : la page 500 coûte autant que la page 1.
+
+Le curseur est opaque (signé, donc non falsifiable) et contient les valeurs de
+tri, le sens de lecture et, tant que la liste a été parcourue vers l'avant
+depuis la première page, le numéro de page affiché : en lecture à rebours ou
+depuis « Dernière », le numéro serait faux (la première page atteinte à rebours
+peut être incomplète) et n'est pas affiché. Le total est optionnel :
+estimé par le planificateur sur PostgreSQL, sinon compté puis mis en cache
+KEYSET_COUNT_CACHE_TTL secondes.
+
+Le tri doit se terminer par une clé unique (``id``) et ne porter que sur des
+champs non nuls.
+"""
+import json
+import threading
+import time
+from functools import cached_property
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+from django.db.models import Q
+
+
+CURSOR_SALT = 'habilitations.keyset'
+
+
+def encode_cursor(payload):
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token):
+    """Retourne le contenu du curseur, ou None s'il est absent/invalide"""
+    if not token:
+        return None
+    try:
+        return signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+
+
+# ==================== TOTAL ====================
+
+# Cache process-local (sql, params) → (total, expiration)
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def estimated_count(queryset):
+    """
+    Nombre approximatif de lignes d'un queryset.
+
+    PostgreSQL : estimation du planificateur (EXPLAIN, sans parcourir la table).
+    Autres moteurs : COUNT(*) exact mis en cache KEYSET_COUNT_CACHE_TTL secondes.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    sql, params = queryset.values('pk').query.sql_with_params()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    key = (queryset.db, sql, tuple(map(str, params)))
+    now = time.monotonic()
+    entry = _count_cache.get(key)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+    total = queryset.count()
+    with _count_cache_lock:
+        if len(_count_cache) > 1000:
+            _count_cache.clear()
+        _count_cache[key] = (total, now + getattr(settings, 'KEYSET_COUNT_CACHE_TTL', 60))
+    return total
+
+
+# ==================== PAGINATEUR ====================
+
+class KeysetPage:
+    """Page d'un KeysetPaginator (interface proche de django.core.paginator.Page)"""
+
+    def __init__(self, object_list, number, paginator, has_next, has_previous, first_key, last_key):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self._first_key = first_key
+        self._last_key = last_key
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(self._payload('n', self._last_key, self.number and self.number + 1))
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return encode_cursor(self._payload('p', self._first_key, None))
+
+    @staticmethod
+    def _payload(direction, key, number):
+        payload = {'k': key, 'd': direction}
+        if number:
+            payload['p'] = number
+        return payload
+
+
+class KeysetPaginator:
+    """
+    Paginateur par curseur.
+
+    Args:
+        queryset: Queryset filtré (sans tri : l'ordre est imposé par ``ordering``)
+        ordering: Champs de tri, ex. ('nom', 'prenom', 'id') ou ('-date_delivrance', 'id')
+        per_page: Lignes par page
+        count: None (pas de total), 'exact' ou 'estimate' (voir estimated_count)
+    """
+
+    def __init__(self, queryset, ordering, per_page, count=None):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.fields = [f.lstrip('-') for f in self.ordering]
+        self.per_page = per_page
+        self.count_mode = count
+
+    @cached_property
+    def count(self):
+        """Total (exact ou estimé) ; None si désactivé"""
+        if self.count_mode == 'exact':
+            return self.queryset.count()
+        if self.count_mode == 'estimate':
+            return estimated_count(self.queryset)
+        return None
+
+    def _after(self, key, reverse=False):
+        """Condition « après key » dans l'ordre de tri (« avant » si reverse)"""
+        condition = Q()
+        egalites = Q()
+        for field, ordre, value in zip(self.fields, self.ordering, key):
+            descendant = ordre.startswith('-') != reverse
+            condition |= egalites & Q(**{f"{field}__{'lt' if descendant else 'gt'}": value})
+            egalites &= Q(**{field: value})
+        return condition
+
+    def _key(self, obj):
+        return [_serialize(getattr(obj, _attname(self.queryset.model, field))) for field in self.fields]
+
+    @property
+    def num_pages(self):
+        """Nombre de pages d'après le total ; None si le total est désactivé"""
+        if self.count is None:
+            return None
+        return max(1, -(-self.count // self.per_page))
+
+    @property
+    def last_cursor(self):
+        return encode_cursor({'d': 'l'})
+
+    def page(self, cursor=None):
+        """Page désignée par le curseur opaque (première page si absent ou invalide)"""
+        payload = decode_cursor(cursor) or {}
+        direction = payload.get('d')
+        key = payload.get('k')
+        if direction not in ('n', 'p', 'l') or (direction != 'l' and (not key or len(key) != len(self.fields))):
+            payload, direction, key = {}, None, None
+        if key:
+            key = [_deserialize(self.queryset.model, field, value) for field, value in zip(self.fields, key)]
+
+        # Page précédente / dernière page : lecture à rebours puis remise dans l'ordre
+        backward = direction in ('p', 'l')
+        ordering = self.ordering
+        queryset = self.queryset
+        if key:
+            queryset = queryset.filter(self._after(key, reverse=backward))
+        if backward:
+            ordering = tuple(f[1:] if f.startswith('-') else f"-{f}" for f in ordering)
+
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        plus = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backward:
+            rows.reverse()
+            has_previous, has_next = plus, direction == 'p'
+        else:
+            has_previous, has_next = bool(key), plus
+
+        # Numéro connu seulement en avançant depuis la première page (None sinon)
+        if not has_previous and not backward:
+            number = 1
+        elif direction == 'n':
+            number = payload.get('p')
+        else:
+            number = None
+        return KeysetPage(
+            rows, number, self, has_next, has_previous,
+            first_key=self._key(rows[0]) if rows else None,
+            last_key=self._key(rows[-1]) if rows else None,
+        )
+
+
+def _attname(model, field):
+    return 'pk' if field == 'pk' else model._meta.get_field(field).attname
+
+
+def _serialize(value):
+    """Valeur de tri → JSON (dates en ISO)"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def _deserialize(model, field, value):
+    if field == 'pk':
+        field = model._meta.pk.name
+    return model._meta.get_field(field).to_python(value)
+
+
+# ==================== VUES ====================
+
+class KeysetPaginationMixin:
+    """
+    Remplace la pagination par OFFSET d'une ListView par un KeysetPaginator.
+
+    Attributs : ``keyset_ordering`` (tri, terminé par 'id'), ``paginate_by``,
+    ``keyset_count`` (None, 'exact' ou 'estimate'). Le curseur est lu dans ``?cursor=``.
+    Le contexte expose ``page_obj`` (number, has_next/has_previous,
+    next_querystring/previous_querystring qui conservent les autres filtres GET).
+    """
+    keyset_ordering = ('id',)
+    keyset_count = 'estimate'
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, self.keyset_ordering, page_size, count=self.keyset_count)
+        page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        page.next_querystring = self._cursor_querystring(page.next_cursor)
+        page.previous_querystring = self._cursor_querystring(page.previous_cursor)
+        page.first_querystring = self._cursor_querystring(None)
+        page.last_querystring = self._cursor_querystring(paginator.last_cursor)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def _cursor_querystring(self, cursor):
+        params = self.request.GET.copy()
+        params.pop(self.cursor_kwarg, None)
+        params.pop('page', None)
+        if cursor:
+            params[self.cursor_kwarg] = cursor
+        return params.urlencode()
@@ -0,0 +1,180 @@
+"""Planification des formateurs : disponibilités et conflits de sessions.
+
+Pour un OF, les sessions de tous ses formateurs (FormateurAffectation active) sont
+chargées en une requête et rangées, par formateur, dans un index d'intervalles
+trié par date de début avec le maximum cumulé des dates de fin : tester si un
+formateur est pris sur [date_debut, date_fin] coûte une recherche dichotomique.
+
+Les sessions d'un formateur chez un autre OF comptent aussi (il ne peut pas être
+à deux endroits à la fois). Les sessions annulées sont ignorées.
+
+Usage::
+
+    planning = get_planning(of)
+    planning.formateurs_disponibles(date_debut, date_fin, specialisation_ids)
+    planning.conflits(formateur_id, date_debut, date_fin, exclude_session_id=session.pk)
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from itertools import accumulate
+
+from django.conf import settings
+
+from .models import ProfilUtilisateur, SessionFormation
+
+
+class IntervalIndex:
+    """Intervalles fermés [debut, fin] triés par début, avec maximum cumulé des fins."""
+
+    __slots__ = ('_items', '_debuts', '_max_fins')
+
+    def __init__(self, intervals):
+        self._items = sorted(intervals)
+        self._debuts = [item[0] for item in self._items]
+        self._max_fins = list(accumulate((item[1] for item in self._items), max))
+
+    def __len__(self):
+        return len(self._items)
+
+    def chevauche(self, debut, fin):
+        """Vrai si au moins un intervalle chevauche [debut, fin] (O(log n))"""
+        i = bisect_right(self._debuts, fin)
+        return i > 0 and self._max_fins[i - 1] >= debut
+
+    def chevauchements(self, debut, fin):
+        """Identifiants des intervalles chevauchant [debut, fin]"""
+        i = bisect_right(self._debuts, fin) - 1
+        while i >= 0 and self._max_fins[i] >= debut:
+            if self._items[i][1] >= debut:
+                yield self._items[i][2]
+            i -= 1
+
+
+class PlanningFormateurs:
+    """Index des sessions des formateurs affectés à un OF"""
+
+    def __init__(self, entreprise_id):
+        self.entreprise_id = entreprise_id
+        self.formateur_ids = set(
+            ProfilUtilisateur.objects.filter(
+                role='formateur', actif=True,
+                affectations__entreprise_id=entreprise_id, affectations__actif=True,
+            ).values_list('pk', flat=True)
+        )
+        intervals = defaultdict(set)
+        Formateurs = SessionFormation.formateurs.through
+        rows = Formateurs.objects.filter(
+            profilutilisateur_id__in=self.formateur_ids,
+        ).exclude(sessionformation__statut='annulee').values_list(
+            'profilutilisateur_id', 'sessionformation__date_debut',
+            'sessionformation__date_fin', 'sessionformation_id',
+        )
+        for formateur_id, debut, fin, session_id in rows:
+            intervals[formateur_id].add((debut, fin, session_id))
+        # LEGACY : formateur unique (User) sur la session
+        legacy = SessionFormation.objects.filter(
+            formateur__profil__in=self.formateur_ids,
+        ).exclude(statut='annulee').values_list('formateur__profil', 'date_debut', 'date_fin', 'pk')
+        for formateur_id, debut, fin, session_id in legacy:
+            intervals[formateur_id].add((debut, fin, session_id))
+        self._index = {formateur_id: IntervalIndex(items) for formateur_id, items in intervals.items()}
+
+    def conflits(self, formateur_id, date_debut, date_fin, exclude_session_id=None):
+        """Sessions du formateur qui chevauchent [date_debut, date_fin]"""
+        index = self._index.get(formateur_id)
+        if index is None:
+            return []
+        return [
+            session_id for session_id in index.chevauchements(date_debut, date_fin)
+            if session_id != exclude_session_id
+        ]
+
+    def est_disponible(self, formateur_id, date_debut, date_fin, exclude_session_id=None):
+        index = self._index.get(formateur_id)
+        if index is None:
+            return True
+        if exclude_session_id is None:
+            return not index.chevauche(date_debut, date_fin)
+        return not self.conflits(formateur_id, date_debut, date_fin, exclude_session_id)
+
+    def formateurs_disponibles_ids(self, date_debut, date_fin, specialisation_ids=(), exclude_session_id=None):
+        """Formateurs de l'OF libres sur la période et (si fourni) qualifiés pour les spécialisations"""
+        from .services import qualified_formateur_ids
+
+        candidats = self.formateur_ids
+        if specialisation_ids:
+            candidats = candidats & set(
+                qualified_formateur_ids(specialisation_ids).filter(
+                    formateur_profil_id__in=candidats
+                ).values_list('formateur_profil_id', flat=True)
+            )
+        return {
+            formateur_id for formateur_id in candidats
+            if self.est_disponible(formateur_id, date_debut, date_fin, exclude_session_id)
+        }
+
+    def formateurs_disponibles(self, date_debut, date_fin, specialisation_ids=(), exclude_session_id=None):
+        """QuerySet de ProfilUtilisateur disponibles et compétents"""
+        return ProfilUtilisateur.objects.filter(pk__in=self.formateurs_disponibles_ids(
+            date_debut, date_fin, specialisation_ids, exclude_session_id
+        ))
+
+
+# Cache process-local entreprise_id → PlanningFormateurs, invalidé par les signaux
+# SessionFormation / FormateurAffectation
+_planning_cache = {}
+_planning_cache_lock = threading.Lock()
+
+
+def invalidate_planning_cache():
+    with _planning_cache_lock:
+        _planning_cache.clear()
+
+
+def get_planning(entreprise):
+    """Planning des formateurs d'un OF (mis en cache PLANNING_CACHE_TTL secondes)"""
+    entreprise_id = getattr(entreprise, 'pk', entreprise)
+    now = time.monotonic()
+    entry = _planning_cache.get(entreprise_id)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+    planning = PlanningFormateurs(entreprise_id)
+    with _planning_cache_lock:
+        _planning_cache[entreprise_id] = (planning, now + getattr(settings, 'PLANNING_CACHE_TTL', 60))
+    return planning
+
+
+def conflits_formateurs(formateurs, date_debut, date_fin, exclude_session_id=None):
+    """
+    Conflits de planning de quelques formateurs sur une période (contrôle à l'enregistrement).
+
+    Interroge directement la base (pas le cache) pour ne rien manquer.
+
+    Returns:
+        dict {formateur: [SessionFormation en conflit]} (formateurs sans conflit absents)
+    """
+    formateurs = {f.pk: f for f in formateurs}
+    if not formateurs:
+        return {}
+    Formateurs = SessionFormation.formateurs.through
+    rows = list(Formateurs.objects.filter(
+        profilutilisateur_id__in=formateurs,
+        sessionformation__date_debut__lte=date_fin,
+        sessionformation__date_fin__gte=date_debut,
+    ).exclude(sessionformation__statut='annulee').exclude(
+        sessionformation_id=exclude_session_id
+    ).values_list('profilutilisateur_id', 'sessionformation_id'))
+    rows += SessionFormation.objects.filter(
+        formateur__profil__in=formateurs, date_debut__lte=date_fin, date_fin__gte=date_debut,
+    ).exclude(statut='annulee').exclude(pk=exclude_session_id).values_list('formateur__profil', 'pk')
+    if not rows:
+        return {}
+
+    sessions = SessionFormation.objects.in_bulk({session_id for _, session_id in rows})
+    conflits = defaultdict(list)
+    for formateur_id, session_id in sorted(set(rows)):
+        conflits[formateurs[formateur_id]].append(sessions[session_id])
+    return dict(conflits)
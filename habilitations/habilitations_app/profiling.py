@@ -0,0 +1,186 @@
+# habilitations_app/profiling.py
+"""
+Profilage des vues : nombre de requêtes SQL, temps SQL / Python, requêtes dupliquées
+
+ProfilingMiddleware (activé par PROFILING_ENABLED) enveloppe chaque requête HTTP
+d'un ``connection.execute_wrapper`` : chaque requête SQL est chronométrée et
+réduite à une empreinte (SQL paramétré, listes ``IN (...)`` repliées). Une
+empreinte exécutée plusieurs fois dans la même requête HTTP est la signature
+d'un N+1.
+
+Chaque requête HTTP produit un enregistrement (nom d'URL, tenant, compteurs)
+ajouté à un tampon circulaire en mémoire (PROFILING_BUFFER_SIZE entrées) et,
+si PROFILING_LOG_FILE est défini, à un fichier JSONL lu par
+``manage.py perf_report``. La synthèse par vue et tenant est exposée aux super
+admins par ``api/perf/``.
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils import timezone
+
+
+# ==================== EMPREINTES ====================
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_ESPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Empreinte d'une requête paramétrée : listes IN repliées, espaces normalisés"""
+    return _IN_LIST.sub('IN (...)', _ESPACES.sub(' ', sql).strip())
+
+
+class QueryRecorder:
+    """execute_wrapper qui compte et chronomètre les requêtes SQL par empreinte"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, limit=5):
+        """[(empreinte, nombre)] des requêtes exécutées plus d'une fois, les plus répétées d'abord"""
+        return [(sql, n) for sql, n in self.fingerprints.most_common(limit) if n > 1]
+
+
+# ==================== TAMPON ====================
+
+_records = deque(maxlen=getattr(settings, 'PROFILING_BUFFER_SIZE', 2000))
+_records_lock = threading.Lock()
+
+
+def record(entry):
+    """Ajoute un enregistrement au tampon (et au fichier JSONL si configuré)"""
+    with _records_lock:
+        _records.append(entry)
+        log_file = getattr(settings, 'PROFILING_LOG_FILE', '')
+        if log_file:
+            with open(log_file, 'a', encoding='utf-8') as fh:
+                fh.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def get_records():
+    with _records_lock:
+        return list(_records)
+
+
+def clear_records():
+    with _records_lock:
+        _records.clear()
+
+
+def read_log_file(path):
+    """Enregistrements d'un fichier JSONL (lignes illisibles ignorées)"""
+    records = []
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+# ==================== SYNTHÈSE ====================
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else 0
+
+
+def summarize(records, sort='queries'):
+    """
+    Synthèse par (vue, tenant), triée par coût décroissant.
+
+    Args:
+        records: Enregistrements du middleware
+        sort: 'queries' (moyenne de requêtes), 'total' (p95 de durée) ou 'sql' (temps SQL moyen)
+
+    Returns:
+        Liste de dicts : url_name, tenant_id, hits, queries_avg/max, sql_ms_avg,
+        python_ms_avg, total_ms_p50/p95, duplicates ([{'sql', 'count'}] cumulés)
+    """
+    groupes = defaultdict(list)
+    for entry in records:
+        groupes[(entry['url_name'], entry.get('tenant_id'))].append(entry)
+
+    lignes = []
+    for (url_name, tenant_id), entries in groupes.items():
+        hits = len(entries)
+        duplicates = Counter()
+        for entry in entries:
+            for dup in entry.get('duplicates', []):
+                duplicates[dup['sql']] += dup['count']
+        lignes.append({
+            'url_name': url_name,
+            'tenant_id': tenant_id,
+            'hits': hits,
+            'queries_avg': round(sum(e['queries'] for e in entries) / hits, 1),
+            'queries_max': max(e['queries'] for e in entries),
+            'sql_ms_avg': round(sum(e['sql_ms'] for e in entries) / hits, 2),
+            'python_ms_avg': round(sum(e['python_ms'] for e in entries) / hits, 2),
+            'total_ms_p50': _percentile([e['total_ms'] for e in entries], 50),
+            'total_ms_p95': _percentile([e['total_ms'] for e in entries], 95),
+            'duplicates': [{'sql': sql, 'count': n} for sql, n in duplicates.most_common(5)],
+        })
+    cle = {
+        'queries': lambda l: l['queries_avg'],
+        'total': lambda l: l['total_ms_p95'],
+        'sql': lambda l: l['sql_ms_avg'],
+    }[sort]
+    return sorted(lignes, key=cle, reverse=True)
+
+
+# ==================== MIDDLEWARE ====================
+
+class ProfilingMiddleware:
+    """
+    Mesure chaque requête HTTP (à placer avant MultiTenantMiddleware pour inclure
+    le chargement du profil). Désactivé sauf si PROFILING_ENABLED.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        principal = getattr(request, 'principal', None)
+        record({
+            'time': timezone.now().isoformat(timespec='seconds'),
+            'url_name': (match.view_name if match else None) or request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'tenant_id': getattr(principal, 'tenant_id', None),
+            'queries': recorder.count,
+            'sql_ms': round(recorder.duration * 1000, 2),
+            'python_ms': round((total - recorder.duration) * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'duplicates': [
+                {'sql': sql[:500], 'count': n} for sql, n in recorder.duplicates()
+            ],
+        })
+        return response
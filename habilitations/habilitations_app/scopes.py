@@ -0,0 +1,242 @@
+"""Moteur de périmètre d'accès (scope) par principal.
+
+Le périmètre d'un utilisateur (tenant, entreprise, sessions du formateur) est résolu
+une seule fois par requête à partir du RequestPrincipal. Les querysets retournés
+filtrent par identifiants (``*_id``, ``id__in`` sur sous-requête, ``EXISTS``) plutôt
+que par jointures ``.distinct()``.
+
+Usage dans une vue::
+
+    scope = get_request_scope(request)
+    stagiaires = scope.stagiaires().filter(actif=True)
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils.functional import cached_property
+
+from .models import (
+    Stagiaire, Entreprise, Formation, Titre, RenouvellementHabilitation,
+    SessionFormation, DemandeFormation,
+)
+
+
+CLIENT_ROLES = ('responsable_pme', 'client')
+
+
+# Cache process-local user_id → sessions du formateur, invalidé par les signaux SessionFormation
+_sessions_cache = {}
+_sessions_cache_lock = threading.Lock()
+
+
+def invalidate_formateur_sessions_cache():
+    """Vide le cache des sessions par formateur (post_save/post_delete/m2m de SessionFormation)."""
+    with _sessions_cache_lock:
+        _sessions_cache.clear()
+
+
+def formateur_session_ids(user_id, profil_id=None):
+    """Identifiants des sessions d'un formateur (FK legacy ``formateur`` ou M2M ``formateurs``).
+
+    Mis en cache pendant SCOPE_CACHE_TTL secondes.
+    """
+    now = time.monotonic()
+    entry = _sessions_cache.get(user_id)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    condition = Q(formateur_id=user_id)
+    if profil_id is not None:
+        condition |= Q(formateurs__id=profil_id)
+    ids = frozenset(SessionFormation.objects.filter(condition).values_list('pk', flat=True))
+    with _sessions_cache_lock:
+        _sessions_cache[user_id] = (ids, now + getattr(settings, 'SCOPE_CACHE_TTL', 60))
+    return ids
+
+
+class AccessScope:
+    """Périmètre d'accès d'un principal ; chaque méthode retourne un queryset filtré."""
+
+    def __init__(self, principal):
+        self.principal = principal
+
+    @property
+    def is_global(self):
+        return self.principal.is_super_admin
+
+    @property
+    def is_of_staff(self):
+        return self.principal.is_admin_of or self.principal.is_secretariat
+
+    @property
+    def is_client(self):
+        return self.principal.role in CLIENT_ROLES
+
+    @cached_property
+    def session_ids(self):
+        """Sessions du formateur (vide pour les autres rôles)"""
+        if not self.principal.is_formateur:
+            return frozenset()
+        return formateur_session_ids(self.principal.user_id, self.principal.profil_id)
+
+    def _tenant_filter(self, qs):
+        """Admin OF / Secrétariat : restriction au tenant quand il est connu"""
+        if self.principal.tenant_id:
+            return qs.filter(tenant_id=self.principal.tenant_id)
+        return qs
+
+    # ==================== QUERYSETS ====================
+
+    def stagiaires(self):
+        p = self.principal
+        qs = Stagiaire.objects.all()
+        if not p.is_authenticated:
+            return qs.none()
+        if self.is_global:
+            return qs
+        if self.is_of_staff:
+            if p.tenant_id:
+                return qs.filter(tenant_id=p.tenant_id)
+            return qs.filter(organisme_formation_id=p.entreprise_id)
+        if p.is_formateur:
+            return qs.filter(pk__in=Formation.objects.filter(
+                session_id__in=self.session_ids
+            ).values('stagiaire_id'))
+        if self.is_client:
+            return qs.filter(entreprise_id=p.entreprise_id)
+        if p.is_stagiaire:
+            return qs.filter(user_id=p.user_id)
+        return qs.none()
+
+    def entreprises(self):
+        p = self.principal
+        qs = Entreprise.objects.all()
+        if not p.is_authenticated:
+            return qs.none()
+        if self.is_global:
+            return qs
+        if self.is_of_staff:
+            # Son OF + clients ayant des stagiaires gérés par l'OF
+            a_stagiaires = Exists(Stagiaire.objects.filter(
+                entreprise_id=OuterRef('pk'), organisme_formation_id=p.entreprise_id
+            ))
+            qs = qs.filter(Q(pk=p.entreprise_id) | Q(a_stagiaires, type_entreprise='client'))
+            if p.tenant_id:
+                qs = qs.filter(Q(tenant_id=p.tenant_id) | Q(pk=p.entreprise_id))
+            return qs
+        if p.is_formateur:
+            return qs.filter(pk__in=Stagiaire.objects.filter(
+                pk__in=Formation.objects.filter(session_id__in=self.session_ids).values('stagiaire_id')
+            ).values('entreprise_id'))
+        if self.is_client:
+            return qs.filter(pk=p.entreprise_id)
+        return qs.none()
+
+    def demandes_formation(self):
+        p = self.principal
+        qs = DemandeFormation.objects.all()
+        if not p.is_authenticated:
+            return qs.none()
+        if self.is_global:
+            return qs
+        if self.is_of_staff:
+            return self._tenant_filter(qs.filter(organisme_formation_id=p.entreprise_id))
+        if p.is_formateur:
+            return qs.filter(session_creee_id__in=self.session_ids)
+        if self.is_client:
+            return qs.filter(entreprise_demandeuse_id=p.entreprise_id)
+        return qs.none()
+
+    def sessions(self):
+        """Sessions visibles : le planning du tenant est consultable par ses formateurs"""
+        p = self.principal
+        qs = SessionFormation.objects.all()
+        if not p.is_authenticated:
+            return qs.none()
+        if self.is_global:
+            return qs
+        if self.is_of_staff or (p.is_formateur and p.tenant_id):
+            return self._tenant_filter(qs)
+        if p.is_formateur:
+            return qs.filter(pk__in=self.session_ids)
+        return qs.none()
+
+    def sessions_assignees(self):
+        """Sessions animées par le formateur"""
+        if not self.principal.is_formateur:
+            return SessionFormation.objects.none()
+        return SessionFormation.objects.filter(pk__in=self.session_ids)
+
+    def formations(self):
+        p = self.principal
+        qs = Formation.objects.all()
+        if not p.is_authenticated:
+            return qs.none()
+        if self.is_global:
+            return qs
+        if self.is_of_staff:
+            return self._tenant_filter(qs)
+        if p.is_formateur:
+            return qs.filter(session_id__in=self.session_ids)
+        if p.is_stagiaire:
+            return qs.filter(stagiaire__user_id=p.user_id)
+        return qs.filter(stagiaire__entreprise_id=p.entreprise_id)
+
+    def titres(self):
+        p = self.principal
+        qs = Titre.objects.all()
+        if not p.is_authenticated:
+            return qs.none()
+        if self.is_global:
+            return qs
+        if self.is_of_staff:
+            return self._tenant_filter(qs)
+        if p.is_formateur:
+            return qs.filter(formation__session_id__in=self.session_ids)
+        if p.is_stagiaire:
+            return qs.filter(stagiaire__user_id=p.user_id)
+        return qs.filter(stagiaire__entreprise_id=p.entreprise_id)
+
+    def renouvellements(self):
+        p = self.principal
+        qs = RenouvellementHabilitation.objects.all()
+        if not p.is_authenticated:
+            return qs.none()
+        if self.is_global:
+            return qs
+        if self.is_of_staff:
+            return self._tenant_filter(qs)
+        if p.is_formateur:
+            return qs.filter(titre_precedent__formation__session_id__in=self.session_ids)
+        if p.is_stagiaire:
+            return qs.filter(titre_precedent__stagiaire__user_id=p.user_id)
+        return qs.filter(titre_precedent__stagiaire__entreprise_id=p.entreprise_id)
+
+
+def get_request_scope(request):
+    """Retourne le périmètre de la requête (calculé une fois puis mémorisé sur la requête)."""
+    from .middleware import get_request_principal
+
+    scope = getattr(request, 'scope', None)
+    if scope is None:
+        scope = request.scope = AccessScope(get_request_principal(request))
+    return scope
+
+
+def scope_for_user(user):
+    """Périmètre d'un utilisateur hors requête (commandes, jobs)."""
+    from .middleware import ANONYMOUS_PRINCIPAL, RequestPrincipal, load_profil
+
+    principal = ANONYMOUS_PRINCIPAL
+    if user is not None and user.is_authenticated:
+        # Réutilise le profil déjà chargé sur l'utilisateur (middleware) s'il existe
+        if type(user).profil.related.is_cached(user):
+            profil = user.profil
+        else:
+            profil = load_profil(user)
+        if profil is not None:
+            principal = RequestPrincipal.from_profil(user, profil)
+    return AccessScope(principal)
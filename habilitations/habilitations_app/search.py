@@ -0,0 +1,303 @@
+# habilitations_app/search.py
+"""
+Recherche plein texte des stagiaires, entreprises, titres et sessions
+
+Chaque objet cherchable a un DocumentRecherche : libellé affiché + texte normalisé
+(minuscules, accents retirés, ponctuation remplacée par des espaces), rattaché à
+son tenant. Le texte est indexé :
+- sur SQLite, dans la table FTS5 ``habilitations_recherche_fts`` (rowid = id du
+  document) ; chaque mot cherché est un préfixe (``dup`` trouve « Dupont »),
+  classement bm25 ;
+- ailleurs, dans TrigrammeRecherche ; classement par nombre de trigrammes communs.
+
+L'index est tenu à jour par les signaux post_save/post_delete (voir models.py),
+par index_objets() après les bulk_create, et reconstruit par
+``manage.py rebuild_search_index``. Le périmètre d'accès (scopes.AccessScope) est
+passé à rechercher() et appliqué dans la requête, avant le classement et la limite.
+"""
+import re
+import unicodedata
+from collections import Counter, namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.db.models.expressions import RawSQL
+
+from .models import DocumentRecherche, Entreprise, SessionFormation, Stagiaire, Titre, TrigrammeRecherche
+
+
+FTS_TABLE = 'habilitations_recherche_fts'
+
+Resultat = namedtuple('Resultat', 'type_objet objet_id libelle score')
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normaliser(texte):
+    """Minuscules sans accents, mots séparés par un espace"""
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM.sub(' ', texte).strip()
+
+
+def trigrammes(texte):
+    """Trigrammes des mots d'un texte normalisé (mots bordés d'espaces, comme pg_trgm)"""
+    result = set()
+    for mot in texte.split():
+        mot = f"  {mot} "
+        result.update(mot[i:i + 3] for i in range(len(mot) - 2))
+    return result
+
+
+_fts_disponible = {}
+
+
+def fts_disponible():
+    """Vrai si la table FTS5 existe (SQLite compilé avec FTS5, migration appliquée) ; mémorisé par base"""
+    if connection.vendor != 'sqlite':
+        return False
+    if connection.alias not in _fts_disponible:
+        _fts_disponible[connection.alias] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_disponible[connection.alias]
+
+
+# ==================== DOCUMENTS ====================
+
+def _document_stagiaire(stagiaire):
+    libelle = stagiaire.nom_complet
+    return stagiaire.tenant_id, libelle, ' '.join(filter(None, [
+        stagiaire.nom, stagiaire.prenom, stagiaire.email, stagiaire.poste,
+    ]))
+
+
+def _document_entreprise(entreprise):
+    return entreprise.tenant_id, entreprise.nom, ' '.join(filter(None, [
+        entreprise.nom, entreprise.ville, entreprise.code_postal, entreprise.email,
+    ]))
+
+
+def _document_titre(titre):
+    return titre.tenant_id, titre.numero_titre, titre.numero_titre
+
+
+def _document_session(session):
+    return session.tenant_id, session.numero_session, ' '.join(filter(None, [
+        session.numero_session, session.lieu,
+    ]))
+
+
+# type_objet → (modèle, constructeur du document)
+INDEXED = {
+    'stagiaire': (Stagiaire, _document_stagiaire),
+    'entreprise': (Entreprise, _document_entreprise),
+    'titre': (Titre, _document_titre),
+    'session': (SessionFormation, _document_session),
+}
+TYPE_PAR_MODELE = {model: type_objet for type_objet, (model, _) in INDEXED.items()}
+
+
+# ==================== INDEXATION ====================
+
+def index_objets(type_objet, objets):
+    """
+    (Ré)indexe des objets d'un même type en lot.
+
+    Args:
+        type_objet: Clé de INDEXED
+        objets: Instances du modèle correspondant
+    """
+    _, builder = INDEXED[type_objet]
+    objets = [o for o in objets if o.pk]
+    if not objets:
+        return 0
+    with transaction.atomic():
+        desindexer(type_objet, [o.pk for o in objets])
+        documents = []
+        for objet in objets:
+            tenant_id, libelle, texte = builder(objet)
+            documents.append(DocumentRecherche(
+                type_objet=type_objet, objet_id=objet.pk, tenant_id=tenant_id,
+                libelle=(libelle or '')[:255], texte=normaliser(texte),
+            ))
+        documents = DocumentRecherche.objects.bulk_create(documents)
+        if documents and documents[0].pk is None:
+            # Backend sans RETURNING : relire les identifiants
+            ids = dict(DocumentRecherche.objects.filter(
+                type_objet=type_objet, objet_id__in=[d.objet_id for d in documents]
+            ).values_list('objet_id', 'pk'))
+            for document in documents:
+                document.pk = ids[document.objet_id]
+        _index_texte(documents)
+    return len(documents)
+
+
+def _index_texte(documents):
+    if fts_disponible():
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE}(rowid, texte) VALUES (%s, %s)",
+                [(d.pk, d.texte) for d in documents],
+            )
+    else:
+        TrigrammeRecherche.objects.bulk_create([
+            TrigrammeRecherche(document_id=d.pk, trigramme=t)
+            for d in documents for t in trigrammes(d.texte)
+        ], batch_size=1000)
+
+
+def desindexer(type_objet, objet_ids):
+    """Retire des objets de l'index"""
+    documents = DocumentRecherche.objects.filter(type_objet=type_objet, objet_id__in=list(objet_ids))
+    if fts_disponible():
+        ids = list(documents.values_list('pk', flat=True))
+        if ids:
+            with connection.cursor() as cursor:
+                cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in ids])
+    documents.delete()
+
+
+def rebuild_index(batch_size=1000, stdout=None):
+    """Reconstruit tout l'index. Retourne {type_objet: nombre de documents}"""
+    with transaction.atomic():
+        if fts_disponible():
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        TrigrammeRecherche.objects.all().delete()
+        DocumentRecherche.objects.all().delete()
+    totals = {}
+    for type_objet, (model, _) in INDEXED.items():
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(model.objects.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+            if not batch:
+                break
+            total += index_objets(type_objet, batch)
+            last_pk = batch[-1].pk
+        totals[type_objet] = total
+        if stdout is not None:
+            stdout.write(f"{type_objet} : {total} document(s)")
+    return totals
+
+
+# ==================== REQUÊTES ====================
+
+def rechercher(query, tenant_id=None, types=None, limit=20, perimetre=None):
+    """
+    Recherche classée (meilleur résultat d'abord).
+
+    Args:
+        query: Texte saisi (partiel, accents et casse indifférents)
+        tenant_id: Restreindre au tenant (None = tous)
+        types: Types d'objets à inclure (défaut : tous)
+        limit: Nombre maximum de résultats
+        perimetre: {type_objet: queryset des objets visibles} (None = pas de restriction) ;
+            un type absent du dictionnaire n'est pas retourné
+
+    Returns:
+        Liste de Resultat(type_objet, objet_id, libelle, score)
+    """
+    mots = normaliser(query).split()
+    if not mots:
+        return []
+    if perimetre is not None:
+        perimetre = {t: qs for t, qs in perimetre.items() if not types or t in types}
+        if not perimetre:
+            return []
+    if fts_disponible():
+        return _rechercher_fts(mots, tenant_id, types, limit, perimetre)
+    return _rechercher_trigrammes(mots, tenant_id, types, limit, perimetre)
+
+
+def _filtres_documents(tenant_id, types, alias='d', perimetre=None):
+    conditions, params = [], []
+    if tenant_id is not None:
+        conditions.append(f"{alias}.tenant_id = %s")
+        params.append(tenant_id)
+    if types:
+        conditions.append(f"{alias}.type_objet IN ({', '.join(['%s'] * len(types))})")
+        params.extend(types)
+    if perimetre is not None:
+        # (type = 'stagiaire' AND objet_id IN (<périmètre>)) OR …
+        alternatives = []
+        for type_objet, queryset in perimetre.items():
+            sql, sub_params = queryset.values('pk').query.sql_with_params()
+            alternatives.append(f"({alias}.type_objet = %s AND {alias}.objet_id IN ({sql}))")
+            params.extend([type_objet, *sub_params])
+        conditions.append(f"({' OR '.join(alternatives)})")
+    return conditions, params
+
+
+def _q_perimetre(perimetre):
+    condition = Q(pk__in=[])
+    for type_objet, queryset in perimetre.items():
+        condition |= Q(type_objet=type_objet, objet_id__in=queryset.values('pk'))
+    return condition
+
+
+def _fts_match(mots):
+    """Expression MATCH : chaque mot est un préfixe, les mots sont combinés par ET"""
+    return ' '.join(f'"{mot}"*' for mot in mots)
+
+
+def _rechercher_fts(mots, tenant_id, types, limit, perimetre=None):
+    match = _fts_match(mots)
+    conditions, params = _filtres_documents(tenant_id, types, perimetre=perimetre)
+    where = ''.join(f" AND {c}" for c in conditions)
+    sql = (
+        f"SELECT d.type_objet, d.objet_id, d.libelle, bm25({FTS_TABLE}) AS score "
+        f"FROM {FTS_TABLE} JOIN {DocumentRecherche._meta.db_table} d ON d.id = {FTS_TABLE}.rowid "
+        f"WHERE {FTS_TABLE} MATCH %s{where} ORDER BY score LIMIT %s"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match, *params, limit])
+        # bm25 est négatif (plus petit = meilleur) : score positif croissant
+        return [Resultat(t, o, l, -s) for t, o, l, s in cursor.fetchall()]
+
+
+def _rechercher_trigrammes(mots, tenant_id, types, limit, perimetre=None):
+    cherches = trigrammes(' '.join(mots))
+    documents = DocumentRecherche.objects.filter(trigrammes__trigramme__in=cherches)
+    if tenant_id is not None:
+        documents = documents.filter(tenant_id=tenant_id)
+    if types:
+        documents = documents.filter(type_objet__in=types)
+    if perimetre is not None:
+        documents = documents.filter(_q_perimetre(perimetre))
+    # Au moins la moitié des trigrammes cherchés, puis vérification des préfixes en Python
+    candidats = Counter(dict(
+        documents.values('pk').annotate(n=Count('trigrammes')).filter(n__gte=max(1, len(cherches) // 2))
+        .order_by('-n').values_list('pk', 'n')[:limit * 10]
+    ))
+    resultats = []
+    for document in DocumentRecherche.objects.filter(pk__in=candidats):
+        tokens = document.texte.split()
+        if all(any(token.startswith(mot) or mot in token for token in tokens) for mot in mots):
+            score = candidats[document.pk] / max(len(cherches), 1)
+            resultats.append(Resultat(document.type_objet, document.objet_id, document.libelle, score))
+    resultats.sort(key=lambda r: (-r.score, r.libelle))
+    return resultats[:limit]
+
+
+def filtrer_queryset(queryset, query, tenant_id=None, limit=2000):
+    """
+    Restreint un queryset (Stagiaire, Entreprise, Titre, SessionFormation) aux objets trouvés.
+
+    Sur FTS5 la recherche devient une sous-requête (pas de limite) ; sinon les
+    ``limit`` meilleurs identifiants parmi ceux du queryset sont injectés dans un ``pk__in``.
+    """
+    type_objet = TYPE_PAR_MODELE[queryset.model]
+    mots = normaliser(query).split()
+    if not mots:
+        return queryset
+    if fts_disponible():
+        conditions, params = _filtres_documents(tenant_id, [type_objet])
+        sql = (
+            f"SELECT d.objet_id FROM {FTS_TABLE} "
+            f"JOIN {DocumentRecherche._meta.db_table} d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND {' AND '.join(conditions)}"
+        )
+        return queryset.filter(pk__in=RawSQL(sql, [_fts_match(mots), *params]))
+    # Périmètre appliqué avant la limite (sinon : meilleurs résultats tous tenants confondus)
+    resultats = _rechercher_trigrammes(mots, tenant_id, [type_objet], limit, perimetre={type_objet: queryset})
+    return queryset.filter(pk__in=[r.objet_id for r in resultats])
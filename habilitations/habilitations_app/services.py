@@ -2,7 +2,21 @@
 """
 Services métier pour la gestion des formations et formateurs
 """
-from .models import ProfilUtilisateur, FormateurCompetence, FormateurAffectation
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Case, Count, F, Func, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import (
+    ProfilUtilisateur, FormateurCompetence, FormateurAffectation,
+    Tenant, TenantDashboardStats, Stagiaire, Formation, Titre, RenouvellementHabilitation,
+    SessionFormation, DemandeFormation, DemandeStagiaire, Habilitation, Specialisation, CompetenceItem, ValidationCompetence
+)
 
 
 def formateurs_of(entreprise):
@@ -91,4 +105,635 @@ def sync_formateur_competences(formateur_profil, specialisations_qs):
         'added': added,
         'updated': updated,
         'deactivated': deactivated
-    }
\ No newline at end of file
+    }
+
+
+# ==================== ÉLIGIBILITÉ FORMATEURS ====================
+
+def qualified_formateur_ids(specialisation_ids):
+    """
+    Sous-requête des formateurs couvrant TOUTES les spécialisations données.
+
+    Une seule requête groupée :
+    GROUP BY formateur_profil HAVING COUNT(DISTINCT specialisation) = n
+    """
+    specialisation_ids = set(specialisation_ids)
+    return FormateurCompetence.objects.filter(
+        actif=True,
+        specialisation_id__in=specialisation_ids,
+    ).values('formateur_profil_id').annotate(
+        nb=Count('specialisation_id', distinct=True)
+    ).filter(nb=len(specialisation_ids)).values('formateur_profil_id')
+
+
+def formateurs_qualifies(specialisation_ids, queryset=None):
+    """
+    Formateurs qualifiés pour un ensemble de spécialisations.
+
+    Args:
+        specialisation_ids: Identifiants des spécialisations requises
+        queryset: Base de ProfilUtilisateur (ex : formateurs_of(of)) ; défaut : tous les formateurs actifs
+
+    Returns:
+        QuerySet de ProfilUtilisateur
+    """
+    if queryset is None:
+        queryset = ProfilUtilisateur.objects.filter(role='formateur', actif=True)
+    specialisation_ids = set(specialisation_ids)
+    if not specialisation_ids:
+        return queryset
+    return queryset.filter(pk__in=qualified_formateur_ids(specialisation_ids))
+
+
+def _count_subquery(queryset):
+    """COUNT(*) corrélé d'un queryset filtré par OuterRef, 0 si vide"""
+    return Coalesce(
+        Subquery(queryset.order_by().annotate(c=Func(F('pk'), function='COUNT')).values('c')[:1],
+                 output_field=IntegerField()),
+        Value(0),
+    )
+
+
+def annotate_formateurs_competents(sessions):
+    """
+    Annote ``formateurs_competents`` (bool) sur un queryset de sessions.
+
+    Vrai si chaque formateur affecté maîtrise chaque spécialisation de la session
+    (nombre de couples formateur × spécialisation couverts = nb formateurs × nb spécialisations).
+    Sans formateur ou sans spécialisation : tolérance legacy (True).
+    """
+    Formateurs = SessionFormation.formateurs.through
+    Specialisations = SessionFormation.spécialisations.through
+    couvertures = FormateurCompetence.objects.filter(
+        actif=True,
+        formateur_profil_id__in=Formateurs.objects.filter(
+            sessionformation_id=OuterRef(OuterRef('pk'))
+        ).values('profilutilisateur_id'),
+        specialisation_id__in=Specialisations.objects.filter(
+            sessionformation_id=OuterRef(OuterRef('pk'))
+        ).values('specialisation_id'),
+    )
+    return sessions.annotate(
+        nb_formateurs_session=_count_subquery(Formateurs.objects.filter(sessionformation_id=OuterRef('pk'))),
+        nb_specialisations_session=_count_subquery(Specialisations.objects.filter(sessionformation_id=OuterRef('pk'))),
+        nb_couvertures=_count_subquery(couvertures),
+    ).annotate(
+        formateurs_competents=Case(
+            When(Q(nb_formateurs_session=0) | Q(nb_specialisations_session=0), then=Value(True)),
+            When(nb_couvertures=F('nb_formateurs_session') * F('nb_specialisations_session'), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+    )
+
+
+def formateurs_eligibles_par_session(session_ids):
+    """
+    Pour plusieurs sessions, formateurs couvrant toutes leurs spécialisations.
+
+    Returns:
+        dict {session_id: set(profil_id)} ; une session sans spécialisation n'apparaît pas
+    """
+    Specialisations = SessionFormation.spécialisations.through
+    requis = dict(
+        Specialisations.objects.filter(sessionformation_id__in=session_ids).order_by()
+        .values('sessionformation_id').annotate(n=Count('specialisation_id'))
+        .values_list('sessionformation_id', 'n')
+    )
+    eligibles = {session_id: set() for session_id in requis}
+    couvertures = FormateurCompetence.objects.filter(
+        actif=True, specialisation__sessions__in=requis.keys(),
+    ).order_by().values('specialisation__sessions', 'formateur_profil_id').annotate(
+        nb=Count('specialisation_id', distinct=True)
+    ).values_list('specialisation__sessions', 'formateur_profil_id', 'nb')
+    for session_id, profil_id, nb in couvertures:
+        if nb == requis[session_id]:
+            eligibles[session_id].add(profil_id)
+    return eligibles
+
+
+# ==================== STATISTIQUES TABLEAUX DE BORD ====================
+
+def count_by(queryset, **conditions):
+    """
+    Compte en UNE requête les lignes du queryset satisfaisant chaque condition.
+    
+    Exemple : count_by(Formation.objects.all(), en_cours=Q(statut='en_cours'), total=Q())
+    
+    Returns:
+        dict nom -> nombre de lignes
+    """
+    return queryset.aggregate(**{
+        name: Count('pk', filter=condition) if condition else Count('pk')
+        for name, condition in conditions.items()
+    })
+
+
+def formation_stats(queryset):
+    """Compteurs formations : total, en cours, complétées"""
+    return count_by(
+        queryset,
+        total=Q(),
+        en_cours=Q(statut='en_cours'),
+        completees=Q(statut='completee'),
+    )
+
+
+def titre_stats(queryset, horizon_jours=90):
+    """Compteurs titres : délivrés, valides, expirés, expirant sous `horizon_jours`"""
+    today = timezone.now().date()
+    return count_by(
+        queryset,
+        delivres=Q(statut__in=('delivre', 'expire')),
+        valides=Q(statut='delivre', date_expiration__gte=today),
+        # 'expire' est posé par scan_expirations ; les titres échus depuis le dernier scan comptent aussi
+        expires=Q(statut='expire') | Q(statut='delivre', date_expiration__lt=today),
+        expiration_proche=Q(
+            statut='delivre',
+            date_expiration__gte=today,
+            date_expiration__lte=today + timedelta(days=horizon_jours)
+        ),
+    )
+
+
+def demande_stats(queryset):
+    """Compteurs demandes de formation : en attente, approuvées"""
+    return count_by(
+        queryset,
+        en_attente=Q(statut='en_attente'),
+        approuvees=Q(statut='approuvee'),
+    )
+
+
+# Compteurs matérialisés du tableau de bord Admin OF (TenantDashboardStats)
+
+DASHBOARD_STATS_GROUPS = ('stagiaires', 'sessions', 'demandes', 'formations', 'titres')
+# Groupes dont le résultat dépend de la date du jour
+DASHBOARD_STATS_DATED_GROUPS = ('sessions', 'titres')
+
+
+def compute_dashboard_counters(organisme_formation, tenant, groups=DASHBOARD_STATS_GROUPS):
+    """
+    Calcule les compteurs du tableau de bord Admin OF, une requête agrégée par groupe.
+    
+    Args:
+        organisme_formation: Instance Entreprise (type_entreprise='of')
+        tenant: Tenant de l'OF (peut être None)
+        groups: Groupes de compteurs à calculer (voir DASHBOARD_STATS_GROUPS)
+    
+    Returns:
+        dict nom du compteur -> valeur
+    """
+    today = timezone.now().date()
+    counters = {}
+    
+    if 'stagiaires' in groups:
+        counters.update(Stagiaire.objects.filter(organisme_formation=organisme_formation).aggregate(
+            total_stagiaires=Count('pk'),
+            stagiaires_independants=Count('pk', filter=Q(entreprise__isnull=True)),
+            total_pme=Count('entreprise', distinct=True, filter=Q(entreprise__type_entreprise='client')),
+        ))
+    
+    if 'sessions' in groups:
+        counters['sessions_en_cours'] = SessionFormation.objects.filter(
+            tenant=tenant,
+            statut='en_cours',
+            date_fin__gte=today
+        ).count() if tenant else 0
+    
+    if 'demandes' in groups:
+        demandes = demande_stats(DemandeFormation.objects.filter(organisme_formation=organisme_formation))
+        counters['demandes_en_attente'] = demandes['en_attente']
+        counters['demandes_approuvees'] = demandes['approuvees']
+    
+    if 'formations' in groups:
+        counters['formations_a_valider'] = Formation.objects.filter(
+            stagiaire__organisme_formation=organisme_formation,
+            statut='completee',
+            avis__isnull=True
+        ).count()
+    
+    if 'titres' in groups:
+        counters.update(Titre.objects.filter(stagiaire__organisme_formation=organisme_formation).aggregate(
+            titres_mois=Count('pk', filter=Q(date_delivrance__gte=today.replace(day=1))),
+            titres_expires=Count('pk', filter=Q(statut='expire') | Q(statut='delivre', date_expiration__lt=today)),
+            titres_expirant=Count('pk', filter=Q(
+                statut='delivre', date_expiration__gte=today, date_expiration__lte=today + timedelta(days=90)
+            )),
+        ))
+        counters['renouvellements_planifies'] = RenouvellementHabilitation.objects.filter(
+            titre_precedent__stagiaire__organisme_formation=organisme_formation,
+            statut='planifie',
+        ).count()
+    
+    return counters
+
+
+def refresh_tenant_dashboard_stats(tenant, groups=DASHBOARD_STATS_GROUPS):
+    """
+    Recalcule les groupes de compteurs demandés et les écrit dans TenantDashboardStats.
+    
+    La ligne est créée (avec tous les compteurs) si elle n'existe pas encore.
+    """
+    counters = compute_dashboard_counters(tenant.organisme_formation, tenant, groups)
+    if all(g in groups for g in DASHBOARD_STATS_DATED_GROUPS):
+        counters['date_reference'] = timezone.now().date()
+    counters['date_maj'] = timezone.now()
+    
+    if TenantDashboardStats.objects.filter(tenant=tenant).update(**counters):
+        return
+    
+    if set(groups) != set(DASHBOARD_STATS_GROUPS):
+        counters = compute_dashboard_counters(tenant.organisme_formation, tenant)
+        counters['date_reference'] = timezone.now().date()
+    try:
+        with transaction.atomic():
+            TenantDashboardStats.objects.create(tenant=tenant, **counters)
+    except IntegrityError:
+        # Créée en parallèle : on écrase avec nos valeurs
+        TenantDashboardStats.objects.filter(tenant=tenant).update(**counters)
+
+
+def get_tenant_dashboard_stats(tenant):
+    """
+    Retourne la ligne TenantDashboardStats du tenant.
+    
+    La construit si elle manque et rafraîchit les compteurs datés une fois par jour.
+    """
+    stats = TenantDashboardStats.objects.filter(tenant=tenant).first()
+    if stats is None:
+        refresh_tenant_dashboard_stats(tenant)
+    elif stats.date_reference != timezone.now().date():
+        refresh_tenant_dashboard_stats(tenant, DASHBOARD_STATS_DATED_GROUPS)
+    else:
+        return stats
+    return TenantDashboardStats.objects.get(tenant=tenant)
+
+
+def schedule_dashboard_stats_refresh(group, organisme_formation_id=None, tenant_id=None, stagiaire_id=None):
+    """
+    Planifie (après commit) le recalcul d'un groupe de compteurs pour le tenant concerné.
+    
+    Appelé par les signaux des modèles. Les demandes d'une même transaction sont
+    regroupées sur la connexion : chaque couple (tenant, groupe) est recalculé une
+    seule fois au commit, même après une suppression en masse. Le tenant est résolu
+    au commit (depuis le stagiaire, l'OF ou directement) ; rien n'est fait si le
+    tenant n'a pas encore de ligne de statistiques (elle sera construite complète à
+    la première lecture).
+    """
+    cibles = [(cle, valeur) for cle, valeur in (
+        ('tenant', tenant_id), ('of', organisme_formation_id), ('stagiaire', stagiaire_id),
+    ) if valeur]
+    if not cibles:
+        return
+    connection = transaction.get_connection()
+    pending = getattr(connection, '_dashboard_stats_pending', None)
+    if pending is None:
+        pending = connection._dashboard_stats_pending = set()
+    pending.update((group, cle, valeur) for cle, valeur in cibles)
+    # Un rappel par appel (un savepoint annulé peut emporter le sien) : le premier
+    # exécuté traite tout l'ensemble, les suivants le trouvent vide
+    transaction.on_commit(_flush_dashboard_stats_refresh)
+
+
+def _flush_dashboard_stats_refresh():
+    """Recalcule, une fois par tenant, les groupes accumulés par schedule_dashboard_stats_refresh"""
+    connection = transaction.get_connection()
+    pending = getattr(connection, '_dashboard_stats_pending', None)
+    if not pending:
+        return
+    connection._dashboard_stats_pending = set()
+
+    par_stagiaire = {valeur for _, cle, valeur in pending if cle == 'stagiaire'}
+    of_stagiaires = dict(Stagiaire.objects.filter(pk__in=par_stagiaire).values_list(
+        'pk', 'organisme_formation_id'
+    )) if par_stagiaire else {}
+    groups_par_of, groups_par_tenant = defaultdict(set), defaultdict(set)
+    for group, cle, valeur in pending:
+        if cle == 'tenant':
+            groups_par_tenant[valeur].add(group)
+        elif cle == 'of':
+            groups_par_of[valeur].add(group)
+        elif of_stagiaires.get(valeur):
+            groups_par_of[of_stagiaires[valeur]].add(group)
+
+    tenants = Tenant.objects.filter(dashboard_stats__isnull=False).filter(
+        Q(pk__in=groups_par_tenant) | Q(organisme_formation_id__in=groups_par_of)
+    ).select_related('organisme_formation')
+    for tenant in tenants:
+        groups = groups_par_tenant.get(tenant.pk, set()) | groups_par_of.get(tenant.organisme_formation_id, set())
+        refresh_tenant_dashboard_stats(tenant, tuple(g for g in DASHBOARD_STATS_GROUPS if g in groups))
+
+
+# ==================== INSCRIPTIONS SESSION ====================
+
+@dataclass
+class EnrolmentResult:
+    """Résultat de l'inscription d'une demande à une session"""
+    demande_id: int
+    statut: str  # 'inscrit', 'deja_inscrit', 'complet', 'ignoree', 'erreur'
+    stagiaire_id: Optional[int] = None
+    formation_id: Optional[int] = None
+    message: str = ''
+
+    @property
+    def ok(self):
+        return self.statut in ('inscrit', 'deja_inscrit')
+
+
+class SessionEnrolmentService:
+    """
+    Inscription en lot de demandes de stagiaires indépendants à une session.
+
+    Tout se fait dans une transaction : la session est verrouillée
+    (select_for_update), la capacité restante est lue une fois sur le compteur
+    places_occupees, les places sont réservées par reserve_seats(), puis
+    stagiaires, formations et demandes sont écrits en bulk.
+    """
+
+    DEMANDE_FIELDS = ['statut', 'session_assignee', 'stagiaire_cree', 'date_traitement', 'traite_par']
+
+    def __init__(self, session, organisme_formation, user, tenant=None):
+        self.session = session
+        self.organisme_formation = organisme_formation
+        self.user = user
+        self.tenant = session.tenant or tenant
+
+    def enrol(self, demandes):
+        """
+        Inscrit les demandes (ordre d'arrivée) dans la limite des places.
+
+        Args:
+            demandes: Itérable/queryset de DemandeStagiaire
+
+        Returns:
+            liste d'EnrolmentResult, une entrée par demande
+        """
+        demande_ids = [d.pk for d in demandes]
+        if not demande_ids:
+            return []
+
+        with transaction.atomic():
+            session = SessionFormation.objects.select_for_update().get(pk=self.session.pk)
+            if session.habilitation_id is None:
+                return [
+                    EnrolmentResult(pk, 'erreur', message="Session sans habilitation")
+                    for pk in demande_ids
+                ]
+            places = session.places_restantes
+
+            demandes = list(
+                DemandeStagiaire.objects.select_for_update()
+                .select_related('stagiaire_existant')
+                .filter(pk__in=demande_ids)
+                .order_by('date_demande', 'pk')
+            )
+            results = {pk: EnrolmentResult(pk, 'erreur', message="Demande introuvable") for pk in demande_ids}
+
+            # Stagiaires : existants (lien direct ou même email), puis nouveaux
+            a_traiter = []
+            for demande in demandes:
+                if demande.statut != 'en_attente':
+                    results[demande.pk] = EnrolmentResult(
+                        demande.pk, 'ignoree', message=f"Demande déjà {demande.get_statut_display().lower()}"
+                    )
+                    continue
+                a_traiter.append(demande)
+
+            emails = {d.email for d in a_traiter if not d.stagiaire_existant_id and d.email}
+            stagiaires_par_email = {
+                s.email: s for s in Stagiaire.objects.filter(email__in=emails)
+            } if emails else {}
+            stagiaires = {}
+            for demande in a_traiter:
+                if demande.stagiaire_existant_id:
+                    stagiaires[demande.pk] = demande.stagiaire_existant
+                elif demande.email in stagiaires_par_email:
+                    stagiaires[demande.pk] = stagiaires_par_email[demande.email]
+
+            formations_existantes = {
+                f.stagiaire_id: f for f in Formation.objects.filter(
+                    habilitation_id=session.habilitation_id,
+                    stagiaire_id__in={s.pk for s in stagiaires.values()},
+                )
+            }
+
+            # Capacité : seule une nouvelle formation consomme une place. Une formation
+            # existante dans une autre session (ou hors session) n'est pas une inscription
+            # à celle-ci : la demande reste en attente
+            retenues = []
+            for demande in a_traiter:
+                stagiaire = stagiaires.get(demande.pk)
+                formation = formations_existantes.get(stagiaire.pk) if stagiaire is not None else None
+                if formation is not None and formation.session_id != session.pk:
+                    results[demande.pk] = EnrolmentResult(
+                        demande.pk, 'ignoree', stagiaire_id=stagiaire.pk, formation_id=formation.pk,
+                        message=(
+                            f"{demande.nom_complet} a déjà une formation {session.habilitation.code} "
+                            f"hors de cette session."
+                        ),
+                    )
+                elif formation is not None:
+                    retenues.append(demande)
+                elif places > 0:
+                    places -= 1
+                    retenues.append(demande)
+                else:
+                    results[demande.pk] = EnrolmentResult(
+                        demande.pk, 'complet',
+                        message=f"Session complète. Impossible d'ajouter {demande.nom_complet}.",
+                    )
+
+            nouveaux = {}
+            for demande in retenues:
+                if demande.pk in stagiaires:
+                    continue
+                key = demande.email or f"demande-{demande.pk}"
+                if key not in nouveaux:
+                    nouveaux[key] = Stagiaire(
+                        email=demande.email or None,
+                        nom=demande.nom,
+                        prenom=demande.prenom,
+                        telephone=demande.telephone,
+                        organisme_formation=self.organisme_formation,
+                        tenant=self.tenant,
+                    )
+                stagiaires[demande.pk] = nouveaux[key]
+            if nouveaux:
+                from .autocomplete import invalidate_autocomplete_cache
+                from .search import index_objets
+                Stagiaire.objects.bulk_create(nouveaux.values())
+                # bulk_create ne déclenche pas les signaux : indexation de recherche explicite
+                index_objets('stagiaire', nouveaux.values())
+                invalidate_autocomplete_cache('stagiaires')
+
+            # Formations manquantes
+            nouvelles_formations = {}
+            for demande in retenues:
+                stagiaire = stagiaires[demande.pk]
+                if stagiaire.pk in formations_existantes or stagiaire.pk in nouvelles_formations:
+                    continue
+                nouvelles_formations[stagiaire.pk] = Formation(
+                    stagiaire=stagiaire,
+                    habilitation_id=session.habilitation_id,
+                    session=session,
+                    date_debut=session.date_debut,
+                    date_fin_prevue=session.date_fin,
+                    numero_session=session.numero_session,
+                    organisme_formation=getattr(self.organisme_formation, 'nom', '') or 'Oxalis',
+                    tenant=self.tenant,
+                )
+            if nouvelles_formations:
+                # bulk_create ne passe pas par les signaux Formation : réservation explicite
+                session.reserve_seats(len(nouvelles_formations))
+                Formation.objects.bulk_create(nouvelles_formations.values())
+                materialiser_competences(nouvelles_formations.values())
+
+            # Demandes
+            now = timezone.now()
+            for demande in retenues:
+                stagiaire = stagiaires[demande.pk]
+                formation = formations_existantes.get(stagiaire.pk) or nouvelles_formations[stagiaire.pk]
+                demande.statut = 'integree'
+                demande.session_assignee = session
+                demande.stagiaire_cree = stagiaire
+                demande.date_traitement = now
+                demande.traite_par = self.user
+                results[demande.pk] = EnrolmentResult(
+                    demande.pk,
+                    'deja_inscrit' if stagiaire.pk in formations_existantes else 'inscrit',
+                    stagiaire_id=stagiaire.pk,
+                    formation_id=formation.pk,
+                )
+            if retenues:
+                DemandeStagiaire.objects.bulk_update(retenues, self.DEMANDE_FIELDS)
+
+            # bulk_create ne déclenche pas les signaux : recalcul explicite des compteurs
+            if nouveaux:
+                schedule_dashboard_stats_refresh('stagiaires', organisme_formation_id=self.organisme_formation.pk)
+            if nouvelles_formations:
+                schedule_dashboard_stats_refresh('formations', organisme_formation_id=self.organisme_formation.pk)
+
+        return [results[pk] for pk in demande_ids]
+
+
+# ==================== VALIDATION DES COMPÉTENCES ====================
+
+def lignes_competences(habilitation):
+    """Checklist d'une habilitation : [(type_competence, titre)], une ligne par savoir / savoir-faire"""
+    lignes = {}
+    for type_competence, texte in (('savoir', habilitation.savoirs), ('savoir_faire', habilitation.savoirs_faire)):
+        for ligne in (texte or '').split('\n'):
+            titre = ligne.strip()[:255]
+            if titre:
+                # (formation, titre_competence) est unique : la première occurrence l'emporte
+                lignes.setdefault(titre, type_competence)
+    return [(type_competence, titre) for titre, type_competence in lignes.items()]
+
+
+def synchroniser_referentiel(source):
+    """
+    Aligne le référentiel CompetenceItem d'une Habilitation ou Specialisation sur ses champs texte.
+
+    Les lignes inchangées gardent leur identifiant (seuls type et ordre sont mis à
+    jour), les nouvelles sont créées, les disparues désactivées. Une seule requête
+    de lecture si rien n'a changé.
+    """
+    champ = 'habilitation' if isinstance(source, Habilitation) else 'specialisation'
+    existants = {item.titre: item for item in CompetenceItem.objects.filter(**{champ: source})}
+    a_creer, a_modifier = [], []
+    for ordre, (type_competence, titre) in enumerate(lignes_competences(source)):
+        item = existants.pop(titre, None)
+        if item is None:
+            a_creer.append(CompetenceItem(
+                **{champ: source}, type_competence=type_competence, titre=titre, ordre=ordre,
+            ))
+        elif (item.type_competence, item.ordre, item.actif) != (type_competence, ordre, True):
+            item.type_competence, item.ordre, item.actif = type_competence, ordre, True
+            a_modifier.append(item)
+    retires = [item.pk for item in existants.values() if item.actif]
+    if a_creer or a_modifier or retires:
+        with transaction.atomic():
+            CompetenceItem.objects.bulk_create(a_creer)
+            CompetenceItem.objects.bulk_update(a_modifier, ['type_competence', 'ordre', 'actif'])
+            CompetenceItem.objects.filter(pk__in=retires).update(actif=False)
+    return len(a_creer), len(a_modifier), len(retires)
+
+
+def referentiels_habilitations(habilitation_ids):
+    """
+    Référentiels actifs de plusieurs habilitations : {habilitation_id: [CompetenceItem]}.
+
+    Les habilitations sans aucun item (créées par update()/bulk_create) sont synchronisées
+    au passage, puis relues en une requête ; une habilitation sans savoirs ni
+    savoir-faire garde un référentiel vide.
+    """
+    habilitation_ids = set(habilitation_ids)
+    referentiels = {pk: [] for pk in habilitation_ids}
+    items = CompetenceItem.objects.order_by('type_competence', 'ordre')
+    synchronisees = set()
+    for item in items.filter(habilitation_id__in=habilitation_ids):
+        synchronisees.add(item.habilitation_id)
+        if item.actif:
+            referentiels[item.habilitation_id].append(item)
+    manquantes = habilitation_ids - synchronisees
+    if manquantes:
+        crees = 0
+        for habilitation in Habilitation.objects.filter(pk__in=manquantes).only('id', 'savoirs', 'savoirs_faire'):
+            crees += synchroniser_referentiel(habilitation)[0]
+        if crees:
+            for item in items.filter(habilitation_id__in=manquantes, actif=True):
+                referentiels[item.habilitation_id].append(item)
+    return referentiels
+
+
+def materialiser_competences(formations):
+    """
+    Crée les lignes ValidationCompetence manquantes de formations (référentiel de leur habilitation).
+
+    Une requête pour les référentiels, un bulk_create(ignore_conflicts=True) pour
+    les lignes : sans effet sur les lignes déjà présentes.
+    """
+    formations = [f for f in formations if f.pk]
+    if not formations:
+        return 0
+    referentiels = referentiels_habilitations(f.habilitation_id for f in formations)
+    validations = [
+        ValidationCompetence(
+            formation_id=formation.pk,
+            tenant_id=formation.tenant_id,
+            competence_item_id=item.pk,
+            type_competence=item.type_competence,
+            titre_competence=item.titre,
+        )
+        for formation in formations
+        for item in referentiels[formation.habilitation_id]
+    ]
+    ValidationCompetence.objects.bulk_create(validations, ignore_conflicts=True, batch_size=500)
+    return len(validations)
+
+
+def appliquer_validations(formation, validation_ids, validees_ids, validateur):
+    """
+    Enregistre une saisie de checklist en deux UPDATE (validées / non validées), même horodatage.
+
+    Args:
+        formation: Formation concernée (les identifiants d'autres formations sont ignorés)
+        validation_ids: Lignes soumises
+        validees_ids: Lignes cochées parmi les lignes soumises
+        validateur: User qui valide
+
+    Returns:
+        (nombre de lignes validées, nombre de lignes non validées)
+    """
+    soumises = ValidationCompetence.objects.filter(formation=formation, pk__in=set(validation_ids))
+    validees_ids = set(validees_ids)
+    now = timezone.now()
+    with transaction.atomic():
+        validees = soumises.filter(pk__in=validees_ids).update(
+            valide=True, validateur=validateur, date_validation=now,
+        )
+        non_validees = soumises.exclude(pk__in=validees_ids).update(
+            valide=False, validateur=validateur, date_validation=now,
+        )
+    return validees, non_validees
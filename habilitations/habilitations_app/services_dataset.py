@@ -0,0 +1,384 @@
+# habilitations_app/services_dataset.py
+"""
+Génération d'un jeu de données de charge reproductible (``manage.py generate_dataset``)
+
+Graphe par tenant : OF + Tenant, admin OF / secrétariat / formateurs, PME clientes
+avec leur responsable, stagiaires, sessions (12 inscrits max) et formations,
+titres des formations terminées, demandes de formation PME → OF et demandes de
+stagiaires en attente. Tout est écrit par bulk_create, une transaction par tenant.
+
+Le tirage est entièrement déterminé par ``seed`` et ``today`` : deux exécutions
+avec les mêmes paramètres produisent les mêmes données. Les objets générés sont
+préfixés (slug, noms, identifiants) pour être purgés par ``flush_dataset``.
+
+bulk_create ne déclenche pas les signaux : places occupées et statistiques des
+tableaux de bord sont calculées explicitement, l'index de recherche est alimenté
+lot par lot (sauf ``index=False``) et les checklists de compétences sont
+matérialisées lot par lot (services.materialiser_competences), comme le fait le
+signal de création d'une formation : les benchmarks mesurent le régime établi.
+"""
+import random
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .models import (
+    DemandeFormation, DemandeStagiaire, DocumentRecherche, Entreprise, FormateurAffectation, Formation, Habilitation,
+    ProfilUtilisateur, SessionFormation, Stagiaire, Tenant, Titre,
+)
+from .autocomplete import invalidate_autocomplete_cache
+from .catalogue import bump_catalogue_version
+from .middleware import invalidate_tenant_cache
+from .planning import invalidate_planning_cache
+from .scopes import invalidate_formateur_sessions_cache
+from .search import FTS_TABLE, fts_disponible, index_objets
+from .services import materialiser_competences, refresh_tenant_dashboard_stats
+
+
+# Mot de passe de tous les comptes générés (benchmarks)
+DATASET_PASSWORD = 'bench-password'
+
+PLACES_PAR_SESSION = 12
+
+PRENOMS = [
+    'Adèle', 'Agathe', 'Alexandre', 'Amélie', 'Antoine', 'Arthur', 'Baptiste', 'Camille', 'Céline', 'Chloé',
+    'Clément', 'Denis', 'Élodie', 'Éloïse', 'Émile', 'Estelle', 'Fabien', 'François', 'Gaëlle', 'Hélène',
+    'Hugo', 'Inès', 'Jérôme', 'Joël', 'Julie', 'Léa', 'Léon', 'Louis', 'Lucas', 'Maëlys', 'Manon', 'Mathis',
+    'Mélanie', 'Nathan', 'Noé', 'Océane', 'Paul', 'Pierre', 'Raphaël', 'Sébastien', 'Sophie', 'Théo',
+    'Thomas', 'Valérie', 'Yanis', 'Zoé',
+]
+NOMS = [
+    'Bernard', 'Blanc', 'Bonnet', 'Chevalier', 'David', 'Dubois', 'Dupont', 'Dupré', 'Durand', 'Faure',
+    'Fournier', 'Gaillard', 'Garnier', 'Girard', 'Guérin', 'Lambert', 'Laurent', 'Lefèvre', 'Legrand',
+    'Lemaître', 'Leroy', 'Martin', 'Mercier', 'Michel', 'Moreau', 'Morel', 'Muller', 'Noël', 'Perrin',
+    'Petit', 'Robert', 'Roche', 'Rousseau', 'Roux', 'Simon', 'Thomas', 'Vincent',
+]
+POSTES = ['Électricien', 'Technicien de maintenance', "Chef d'équipe", 'Opérateur', 'Agent de production', 'Ingénieur']
+VILLES = [
+    ('Lyon', '69000'), ('Grenoble', '38000'), ('Saint-Étienne', '42000'), ('Annecy', '74000'),
+    ('Chambéry', '73000'), ('Valence', '26000'), ('Clermont-Ferrand', '63000'), ('Dijon', '21000'),
+]
+SECTEURS = ['Bâtiment', 'Énergie', 'Industrie', 'Maintenance', 'Logistique', 'Services', 'Réseaux', 'Travaux']
+
+# Référentiel minimal créé s'il manque (code, nom, catégorie, niveau)
+HABILITATIONS = [
+    ('B0', 'Exécutant non électricien', '1', 'B0'),
+    ('H0', 'Exécutant non électricien HT', '1', 'H0'),
+    ('B1', 'Exécutant électricien', '2', 'B1'),
+    ('B1V', 'Exécutant électricien voisinage', '2', 'B1V'),
+    ('B2', "Chargé de travaux", '2', 'B2'),
+    ('BR', "Chargé d'intervention générale", '2', 'BR'),
+    ('BC', 'Chargé de consignation', '3', 'BC'),
+    ('H1V', 'Exécutant électricien HT voisinage', '3', 'H1V'),
+]
+
+
+def _referentiel_habilitations():
+    """Habilitations du référentiel (créées au besoin), dans un ordre stable"""
+    for code, nom, categorie, niveau in HABILITATIONS:
+        Habilitation.objects.get_or_create(code=code, defaults={
+            'nom': nom, 'categorie': categorie, 'niveau': niveau,
+            'savoirs': "Connaître les dangers de l'électricité\nConnaître les zones d'environnement",
+            'savoirs_faire': "Appliquer les prescriptions de sécurité\nRendre compte de son activité",
+        })
+    return list(Habilitation.objects.filter(actif=True).order_by('code'))
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _bulk(model, objets, batch_size):
+    """bulk_create par lots ; les clés primaires sont renseignées (SQLite ≥ 3.35, PostgreSQL)"""
+    return model.objects.bulk_create(objets, batch_size=batch_size)
+
+
+def _supprimer_en_masse(queryset):
+    """
+    DELETE SQL direct d'un queryset et de ses dépendances, sans charger les lignes ni envoyer de signaux.
+
+    Les relations sont suivies via ``_meta`` comme le ferait le Collector de Django :
+    CASCADE supprimé récursivement (enfants d'abord), SET_NULL mis à jour, tables M2M
+    automatiques vidées ; les autres comportements (PROTECT…) passent par ``delete()``.
+    """
+    if not queryset.exists():
+        return  # Branche vide : inutile de descendre dans ses dépendances
+    model = queryset.model
+    pks = queryset.values('pk')
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            if relation.through._meta.auto_created:
+                relation.through._base_manager.filter(
+                    **{f"{relation.field.m2m_reverse_field_name()}__in": pks}
+                )._raw_delete(queryset.db)
+            continue
+        lies = relation.related_model._base_manager.filter(**{f"{relation.field.name}__in": pks})
+        if relation.on_delete is models.CASCADE:
+            _supprimer_en_masse(lies)
+        elif relation.on_delete is models.SET_NULL:
+            lies.update(**{relation.field.name: None})
+        elif relation.on_delete is not models.DO_NOTHING:
+            lies.delete()
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        if through._meta.auto_created:
+            through._base_manager.filter(**{f"{field.m2m_field_name()}__in": pks})._raw_delete(queryset.db)
+    model._base_manager.filter(pk__in=pks)._raw_delete(queryset.db)
+
+
+def flush_dataset(prefix):
+    """
+    Supprime un jeu généré (tenants, entreprises et comptes préfixés). Retourne le nombre de tenants.
+
+    Suppression SQL en masse (voir _supprimer_en_masse) : les signaux par ligne
+    (index de recherche, places, statistiques, caches) sont remplacés par une seule
+    purge de l'index et une invalidation des caches. Les lignes de statistiques
+    partent avec leurs tenants ; les autres tenants ne sont pas touchés.
+    """
+    tenants = Tenant.objects.filter(slug__startswith=f"{prefix}-")
+    of_ids = list(tenants.values_list('organisme_formation_id', flat=True))
+    tenant_ids = list(tenants.values_list('pk', flat=True))
+    with transaction.atomic():
+        documents = DocumentRecherche.objects.filter(tenant_id__in=tenant_ids)
+        if tenant_ids and fts_disponible():
+            sql, params = documents.values('pk').query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({sql})", params)
+        _supprimer_en_masse(documents)
+        _supprimer_en_masse(Entreprise.objects.filter(tenant_id__in=tenant_ids, type_entreprise='client'))
+        _supprimer_en_masse(User.objects.filter(username__startswith=f"{prefix}-"))
+        _supprimer_en_masse(Entreprise.objects.filter(pk__in=of_ids))
+    invalidate_tenant_cache()
+    invalidate_formateur_sessions_cache()
+    invalidate_planning_cache()
+    invalidate_autocomplete_cache()
+    bump_catalogue_version()
+    return len(tenant_ids)
+
+
+def generate_dataset(tenants=1, pme=20, stagiaires=1000, formateurs=5, demandes=200, formations_max=3,
+                     seed=42, prefix='bench', today=None, batch_size=2000, index=True, stdout=None):
+    """
+    Génère ``tenants`` tenants complets.
+
+    Args:
+        tenants: Nombre de tenants (OF)
+        pme: PME clientes par tenant
+        stagiaires: Stagiaires par tenant
+        formateurs: Formateurs par tenant
+        demandes: Demandes de formation par tenant (autant de demandes de stagiaires / 2)
+        formations_max: Formations (habilitations distinctes) par stagiaire, tirées entre 1 et ce nombre
+        seed: Graine du tirage
+        prefix: Préfixe des slugs, noms et identifiants
+        today: Date de référence des dates générées (défaut : aujourd'hui)
+        batch_size: Taille des lots de bulk_create
+        index: Alimenter l'index de recherche plein texte
+
+    Returns:
+        dict {modèle: nombre de lignes créées}
+    """
+    today = today or timezone.now().date()
+    habilitations = _referentiel_habilitations()
+    password = make_password(DATASET_PASSWORD)
+    totaux = {}
+    for numero in range(1, tenants + 1):
+        # Une graine par tenant : le tenant n ne dépend pas du nombre de tenants générés
+        rng = random.Random(f"{seed}-{numero}")
+        with transaction.atomic():
+            compteurs = _generer_tenant(
+                rng, numero, prefix, today, habilitations, password,
+                pme, stagiaires, formateurs, demandes, formations_max, batch_size, index,
+            )
+        for model, n in compteurs.items():
+            totaux[model] = totaux.get(model, 0) + n
+        if stdout is not None:
+            stdout.write(f"Tenant {prefix}-of-{numero} : " + ', '.join(f"{n} {m}" for m, n in compteurs.items()))
+    invalidate_autocomplete_cache()
+    return totaux
+
+
+def _generer_tenant(rng, numero, prefix, today, habilitations, password,
+                    nb_pme, nb_stagiaires, nb_formateurs, nb_demandes, formations_max, batch_size, index):
+    ville, code_postal = rng.choice(VILLES)
+    of = Entreprise.objects.create(
+        nom=f"{prefix.upper()} OF {numero:03d}", type_entreprise='of',
+        email=f"contact@{prefix}-of-{numero}.example.com", telephone='0400000000',
+        adresse=f"{numero} rue de la Formation", code_postal=code_postal, ville=ville,
+    )
+    tenant = Tenant.objects.create(
+        organisme_formation=of, nom_public=f"{prefix.upper()} Formation {numero:03d}", slug=f"{prefix}-of-{numero}",
+    )
+    of.tenant = tenant
+    of.save(update_fields=['tenant'])
+
+    # Comptes : un admin OF, un secrétariat, les formateurs, un responsable par PME
+    base = f"{prefix}-t{numero}"
+    comptes = [(f"{base}-admin", 'admin_of', of), (f"{base}-secretariat", 'secretariat', of)]
+    comptes += [(f"{base}-formateur-{i}", 'formateur', of) for i in range(1, nb_formateurs + 1)]
+
+    pmes = []
+    for i in range(1, nb_pme + 1):
+        ville, code_postal = rng.choice(VILLES)
+        pmes.append(Entreprise(
+            nom=f"{prefix.upper()} {rng.choice(SECTEURS)} {numero:03d}-{i:05d}", type_entreprise='client',
+            email=f"contact@{base}-pme-{i}.example.com", telephone='0400000000',
+            adresse=f"{rng.randint(1, 200)} avenue des PME", code_postal=code_postal, ville=ville, tenant=tenant,
+        ))
+    pmes = _bulk(Entreprise, pmes, batch_size)
+    comptes += [(f"{base}-pme-{i}", 'responsable_pme', entreprise) for i, entreprise in enumerate(pmes, 1)]
+
+    users = _bulk(User, [
+        User(username=username, email=f"{username}@example.com", password=password,
+             first_name=rng.choice(PRENOMS), last_name=rng.choice(NOMS))
+        for username, _, _ in comptes
+    ], batch_size)
+    profils = _bulk(ProfilUtilisateur, [
+        ProfilUtilisateur(user=user, role=role, entreprise=entreprise, tenant=tenant)
+        for user, (_, role, entreprise) in zip(users, comptes)
+    ], batch_size)
+    admin = users[0]
+    formateurs = [(user, profil) for user, profil, (_, role, _) in zip(users, profils, comptes) if role == 'formateur']
+    responsables = {profil.entreprise_id: user for user, profil in zip(users, profils) if profil.role == 'responsable_pme'}
+    _bulk(FormateurAffectation, [
+        FormateurAffectation(formateur=profil, entreprise=of) for _, profil in formateurs
+    ], batch_size)
+    compteurs = {'entreprises': len(pmes) + 1, 'utilisateurs': len(users)}
+
+    # Stagiaires, répartis sur les PME
+    stagiaires = []
+    for i in range(1, nb_stagiaires + 1):
+        prenom, nom = rng.choice(PRENOMS), rng.choice(NOMS)
+        stagiaires.append(Stagiaire(
+            organisme_formation=of, tenant=tenant, entreprise=rng.choice(pmes) if pmes else None,
+            nom=nom, prenom=prenom, email=f"{base}-s{i}@example.com", telephone='0600000000',
+            poste=rng.choice(POSTES), date_embauche=today - timedelta(days=rng.randint(30, 7000)),
+        ))
+    par_pme = {}
+    for batch in _batches(stagiaires, batch_size):
+        batch = _bulk(Stagiaire, batch, batch_size)
+        if index:
+            index_objets('stagiaire', batch)
+        for stagiaire in batch:
+            par_pme.setdefault(stagiaire.entreprise_id, []).append(stagiaire.pk)
+    if index:
+        index_objets('entreprise', [of, *pmes])
+    compteurs['stagiaires'] = len(stagiaires)
+
+    # Inscriptions : habilitations distinctes par stagiaire, regroupées en sessions de 12
+    inscrits = {h.pk: [] for h in habilitations}
+    for stagiaire in stagiaires:
+        for habilitation in rng.sample(habilitations, rng.randint(1, min(formations_max, len(habilitations)))):
+            inscrits[habilitation.pk].append(stagiaire.pk)
+
+    nb_sessions = nb_formations = nb_titres = nb_competences = 0
+    sequence_titre = 0
+    for habilitation in habilitations:
+        stagiaire_ids = inscrits[habilitation.pk]
+        rng.shuffle(stagiaire_ids)
+        groupes = list(_batches(stagiaire_ids, PLACES_PAR_SESSION))
+        for groupes_lot in _batches(groupes, max(1, batch_size // PLACES_PAR_SESSION)):
+            sessions = []
+            for groupe in groupes_lot:
+                nb_sessions += 1
+                debut = today + timedelta(days=rng.randint(-3 * 365, 180))
+                fin = debut + timedelta(days=rng.randint(0, 4))
+                statut = 'terminee' if fin < today else ('en_cours' if debut <= today else 'planifiee')
+                formateur_user, _ = rng.choice(formateurs) if formateurs else (None, None)
+                sessions.append(SessionFormation(
+                    numero_session=f"{base}-{habilitation.code}-{nb_sessions:06d}", tenant=tenant,
+                    habilitation=habilitation, formateur=formateur_user, date_debut=debut, date_fin=fin,
+                    lieu=of.ville, statut=statut, nombre_places=PLACES_PAR_SESSION,
+                    places_occupees=len(groupe), createur=admin,
+                ))
+            sessions = _bulk(SessionFormation, sessions, batch_size)
+            if formateurs:
+                Through = SessionFormation.formateurs.through
+                _bulk(Through, [
+                    Through(sessionformation_id=session.pk, profilutilisateur_id=rng.choice(formateurs)[1].pk)
+                    for session in sessions
+                ], batch_size)
+            if index:
+                index_objets('session', sessions)
+
+            formations = []
+            for session, groupe in zip(sessions, groupes_lot):
+                for stagiaire_id in groupe:
+                    statut, fin_reelle = 'en_cours', None
+                    if session.statut == 'terminee':
+                        statut = 'abandonnee' if rng.random() < 0.05 else 'completee'
+                        fin_reelle = session.date_fin if statut == 'completee' else None
+                    formations.append(Formation(
+                        stagiaire_id=stagiaire_id, habilitation=habilitation, tenant=tenant, session=session,
+                        organisme_formation=of.nom, date_debut=session.date_debut,
+                        date_fin_prevue=session.date_fin, date_fin_reelle=fin_reelle,
+                        statut=statut, numero_session=session.numero_session,
+                    ))
+            formations = _bulk(Formation, formations, batch_size)
+            nb_formations += len(formations)
+            nb_competences += materialiser_competences(formations)
+
+            titres = []
+            for formation in formations:
+                if formation.statut != 'completee' or rng.random() < 0.05:
+                    continue  # 5 % des formations terminées attendent encore leur titre
+                sequence_titre += 1
+                expiration = formation.date_fin_reelle + relativedelta(months=habilitation.duree_validite_mois)
+                titres.append(Titre(
+                    stagiaire_id=formation.stagiaire_id, formation=formation, tenant=tenant,
+                    habilitation=habilitation, numero_titre=f"{base}-T{sequence_titre:07d}",
+                    date_delivrance=formation.date_fin_reelle, date_expiration=expiration,
+                    statut='expire' if expiration < today else 'delivre', delivre_par=admin,
+                ))
+            titres = _bulk(Titre, titres, batch_size)
+            if index:
+                index_objets('titre', titres)
+            nb_titres += len(titres)
+    compteurs.update({
+        'sessions': nb_sessions, 'formations': nb_formations, 'competences': nb_competences, 'titres': nb_titres,
+    })
+
+    # Demandes de formation PME → OF, avec quelques stagiaires de la PME
+    statuts = ['en_attente'] * 5 + ['approuvee'] * 3 + ['refusee', 'annulee']
+    demandes = []
+    for _ in range(nb_demandes if pmes else 0):
+        pme = rng.choice(pmes)
+        statut = rng.choice(statuts)
+        demandes.append(DemandeFormation(
+            entreprise_demandeuse=pme, organisme_formation=of, tenant=tenant,
+            habilitation=rng.choice(habilitations), statut=statut,
+            type_formation=rng.choice(['intra', 'inter']), lieu_formation=rng.choice(['sur_site', 'chez_of']),
+            date_souhaitee=today + timedelta(days=rng.randint(7, 120)), demandeur=responsables.get(pme.pk),
+            traite_par=admin if statut != 'en_attente' else None, consentement_at=timezone.now(),
+        ))
+    demandes = _bulk(DemandeFormation, demandes, batch_size)
+    Through = DemandeFormation.stagiaires.through
+    liens = []
+    for demande in demandes:
+        candidats = par_pme.get(demande.entreprise_demandeuse_id, [])
+        for stagiaire_id in rng.sample(candidats, min(len(candidats), rng.randint(1, 5))):
+            liens.append(Through(demandeformation_id=demande.pk, stagiaire_id=stagiaire_id))
+    _bulk(Through, liens, batch_size)
+
+    # Demandes de stagiaires en attente d'affectation à une session
+    demandes_stagiaires = []
+    for i in range(nb_demandes // 2):
+        prenom, nom = rng.choice(PRENOMS), rng.choice(NOMS)
+        demandes_stagiaires.append(DemandeStagiaire(
+            tenant=tenant, nom=nom, prenom=prenom, email=f"{base}-d{i}@example.com",
+            telephone='0600000000', statut_professionnel='salarie', consentement_at=timezone.now(),
+        ))
+    demandes_stagiaires = _bulk(DemandeStagiaire, demandes_stagiaires, batch_size)
+    Through = DemandeStagiaire.habilitations_demandees.through
+    _bulk(Through, [
+        Through(demandestagiaire_id=demande.pk, habilitation_id=rng.choice(habilitations).pk)
+        for demande in demandes_stagiaires
+    ], batch_size)
+    compteurs.update({'demandes_formation': len(demandes), 'demandes_stagiaires': len(demandes_stagiaires)})
+
+    refresh_tenant_dashboard_stats(tenant)
+    return compteurs
@@ -0,0 +1,130 @@
+# habilitations_app/services_expirations.py
+"""
+Scan incrémental des expirations de titres
+
+Deux curseurs (EtatScanExpirations) bornent le travail de chaque exécution :
+- les titres 'delivre' échus entre curseur_expiration et aujourd'hui passent à 'expire'
+- les titres expirant entre curseur_renouvellement et aujourd'hui + horizon reçoivent
+  un RenouvellementHabilitation 'planifie' s'ils n'en ont pas déjà un
+
+Les deux parcours suivent l'index (statut, date_expiration) par lots de clés
+primaires ; les écritures sont des update()/bulk_create(). Les compteurs par tenant
+de l'exécution sont stockés dans EtatScanExpirations.resultat et les statistiques
+des tableaux de bord des tenants touchés sont recalculées.
+
+Un titre antidaté sous un curseur (date d'expiration corrigée à la main, titre
+de courte validité délivré après coup) n'est repris que par un scan --full.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import EtatScanExpirations, RenouvellementHabilitation, Tenant, Titre
+from .services import schedule_dashboard_stats_refresh
+
+
+def get_etat_scan():
+    """Ligne unique des curseurs du scan (créée au premier appel)"""
+    etat, _ = EtatScanExpirations.objects.get_or_create(pk=1)
+    return etat
+
+
+def scan_expirations(today=None, horizon_jours=None, batch_size=None, full=False, dry_run=False):
+    """
+    Expire les titres échus et planifie les renouvellements à venir depuis les curseurs.
+
+    Args:
+        today: Date de référence (défaut : aujourd'hui)
+        horizon_jours: Délai de planification des renouvellements (défaut : RENOUVELLEMENT_HORIZON_JOURS)
+        batch_size: Nombre de titres par lot/transaction (défaut : EXPIRATION_SCAN_BATCH_SIZE)
+        full: Ignorer les curseurs et reparcourir tout l'historique
+        dry_run: Compter sans rien écrire (les curseurs ne bougent pas)
+
+    Returns:
+        dict avec clés 'date', 'expires', 'renouvellements', 'tenants'
+        ('tenants' : liste de dicts tenant_id / expires / renouvellements)
+    """
+    today = today or timezone.now().date()
+    horizon_jours = horizon_jours if horizon_jours is not None else getattr(settings, 'RENOUVELLEMENT_HORIZON_JOURS', 90)
+    batch_size = batch_size or getattr(settings, 'EXPIRATION_SCAN_BATCH_SIZE', 1000)
+    etat = get_etat_scan()
+
+    par_tenant = defaultdict(lambda: {'expires': 0, 'renouvellements': 0})
+
+    # 1. Titres échus : [curseur_expiration, today[
+    expirables = Titre.objects.filter(statut='delivre', date_expiration__lt=today)
+    if etat.curseur_expiration and not full:
+        expirables = expirables.filter(date_expiration__gte=etat.curseur_expiration)
+    for batch in _iter_pk_batches(expirables, batch_size):
+        pks = [pk for pk, _ in batch]
+        if not dry_run:
+            Titre.objects.filter(pk__in=pks, statut='delivre').update(statut='expire', date_modification=timezone.now())
+        for _, tenant_id in batch:
+            par_tenant[tenant_id]['expires'] += 1
+
+    # 2. Renouvellements à planifier : [curseur_renouvellement, today + horizon]
+    limite = today + timedelta(days=horizon_jours + 1)
+    debut = etat.curseur_renouvellement if etat.curseur_renouvellement and not full else today
+    a_renouveler = Titre.objects.filter(
+        statut='delivre', date_expiration__gte=debut, date_expiration__lt=limite,
+    ).exclude(Exists(RenouvellementHabilitation.objects.filter(titre_precedent=OuterRef('pk'))))
+    for batch in _iter_pk_batches(a_renouveler, batch_size, fields=('tenant_id', 'date_expiration')):
+        if not dry_run:
+            with transaction.atomic():
+                RenouvellementHabilitation.objects.bulk_create([
+                    RenouvellementHabilitation(
+                        titre_precedent_id=pk,
+                        tenant_id=tenant_id,
+                        date_renouvellement_prevue=date_expiration,
+                        statut='planifie',
+                        notes="Planifié automatiquement (scan des expirations)",
+                    )
+                    for pk, tenant_id, date_expiration in batch
+                ])
+        for _, tenant_id, _ in batch:
+            par_tenant[tenant_id]['renouvellements'] += 1
+
+    resultat = {
+        'date': today.isoformat(),
+        'dry_run': dry_run,
+        'expires': sum(c['expires'] for c in par_tenant.values()),
+        'renouvellements': sum(c['renouvellements'] for c in par_tenant.values()),
+        'tenants': [
+            {'tenant_id': tenant_id, **compteurs}
+            for tenant_id, compteurs in sorted(par_tenant.items(), key=lambda item: item[0] or 0)
+        ],
+    }
+    if dry_run:
+        return resultat
+
+    etat.curseur_expiration = today
+    etat.curseur_renouvellement = limite if full else max(limite, etat.curseur_renouvellement or limite)
+    etat.derniere_execution = timezone.now()
+    etat.resultat = resultat
+    etat.save()
+
+    # update()/bulk_create() ne déclenchent pas les signaux : recalcul explicite des compteurs
+    for tenant_id in Tenant.objects.filter(pk__in=[t for t in par_tenant if t]).values_list('pk', flat=True):
+        schedule_dashboard_stats_refresh('titres', tenant_id=tenant_id)
+    return resultat
+
+
+def _iter_pk_batches(queryset, batch_size, fields=('tenant_id',)):
+    """
+    Parcourt un queryset par lots de tuples (pk, *fields), dans l'ordre de la clé primaire.
+
+    Le parcours avance par pk > dernier pk vu : il reste correct que le lot précédent
+    ait été modifié (statut changé, renouvellement créé) ou non (dry-run).
+    """
+    queryset = queryset.order_by('pk').values_list('pk', *fields)
+    dernier = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=dernier)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        dernier = batch[-1][0]
@@ -0,0 +1,229 @@
+# habilitations_app/services_import.py
+"""
+Import CSV en masse des stagiaires et demandes de formation
+
+Le fichier est décodé en flux (chunk par chunk), puis traité par lots :
+- préchargement des entreprises, stagiaires et habilitations existants du lot
+- bulk_create des nouvelles lignes et des lignes M2M demande ↔ stagiaire
+- une transaction atomique par lot
+
+En dry-run, toutes les validations sont faites mais rien n'est écrit.
+"""
+import codecs
+import csv
+import re
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Entreprise, Stagiaire, Habilitation, DemandeFormation
+from .autocomplete import invalidate_autocomplete_cache
+from .search import index_objets
+from .services import schedule_dashboard_stats_refresh
+
+
+# Fins de ligne CSV : str.splitlines() couperait aussi sur \x0b, \x0c, \x1c-\x1e, \x85, \u2028…
+# qui peuvent figurer dans un champ entre guillemets
+_FIN_DE_LIGNE = re.compile(r'\r\n|\r|\n')
+
+
+def iter_decoded_lines(uploaded, encoding='utf-8-sig'):
+    """
+    Décode un fichier uploadé chunk par chunk et produit ses lignes (fins de ligne conservées).
+
+    Seuls \\r\\n, \\n et \\r terminent une ligne (comme ``newline=''`` pour le module csv).
+    Le fichier n'est jamais chargé entièrement en mémoire.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+    pending = ''
+    for chunk in uploaded.chunks():
+        pending += decoder.decode(chunk)
+        start = 0
+        for match in _FIN_DE_LIGNE.finditer(pending):
+            # Un \r en fin de chunk peut être la première moitié d'un \r\n
+            if match.end() == len(pending) and match.group() == '\r':
+                break
+            yield pending[start:match.end()]
+            start = match.end()
+        # La dernière ligne peut être incomplète : on la garde pour le chunk suivant
+        pending = pending[start:]
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+def iter_batches(iterable, size):
+    """Découpe un itérable en listes de `size` éléments"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_stagiaires_csv(uploaded, organisme_formation, tenant, user, dry_run=True, batch_size=None,
+                          progress=None):
+    """
+    Importe un CSV (colonnes : entreprise, email, nom, prenom, habilitation_code).
+
+    Args:
+        uploaded: UploadedFile Django
+        organisme_formation: Entreprise OF qui gère les stagiaires importés
+        tenant: Tenant de l'OF (peut être None)
+        user: Utilisateur à l'origine des demandes créées
+        dry_run: Valider sans rien écrire
+        batch_size: Nombre de lignes par lot/transaction (défaut : CSV_IMPORT_BATCH_SIZE)
+        progress: Callable optionnel appelé après chaque lot avec le nombre de lignes traitées
+
+    Returns:
+        dict avec clés 'dry_run', 'lignes', 'created_entreprises', 'created_stagiaires',
+        'created_demandes', 'errors'
+    """
+    batch_size = batch_size or getattr(settings, 'CSV_IMPORT_BATCH_SIZE', 500)
+    result = {
+        'dry_run': dry_run,
+        'lignes': 0,
+        'created_entreprises': 0,
+        'created_stagiaires': 0,
+        'created_demandes': 0,
+        'errors': [],
+    }
+    # État partagé entre les lots : cache des habilitations et, en dry-run,
+    # les entreprises/emails qui auraient déjà été créés par un lot précédent
+    state = {'habilitations': {}, 'entreprises': set(), 'emails': set()}
+
+    try:
+        reader = csv.DictReader(iter_decoded_lines(uploaded))
+        rows = enumerate(reader, start=1)
+        for batch in iter_batches(rows, batch_size):
+            result['lignes'] += len(batch)
+            try:
+                with transaction.atomic():
+                    counts = _import_batch(
+                        batch, organisme_formation, tenant, user, state, result['errors'], dry_run
+                    )
+            except Exception as exc:
+                result['errors'].append(f"Lignes {batch[0][0]}-{batch[-1][0]}: {exc}")
+                counts = {}
+            for key, value in counts.items():
+                result[key] += value
+            if progress is not None:
+                progress(result['lignes'])
+    except UnicodeDecodeError as exc:
+        result['errors'].append(f"Fichier non UTF-8 : {exc}")
+
+    if not dry_run and (result['created_stagiaires'] or result['created_demandes']):
+        # bulk_create ne déclenche pas les signaux : recalcul explicite des compteurs
+        schedule_dashboard_stats_refresh('stagiaires', organisme_formation_id=organisme_formation.pk)
+        schedule_dashboard_stats_refresh('demandes', organisme_formation_id=organisme_formation.pk)
+
+    return result
+
+
+def _import_batch(batch, organisme_formation, tenant, user, state, errors, dry_run):
+    """Traite un lot de lignes (déjà dans une transaction). Retourne les compteurs du lot."""
+    valid = []
+    for idx, row in batch:
+        entreprise_nom = (row.get('entreprise') or '').strip()
+        email = (row.get('email') or '').strip()
+        if not entreprise_nom or not email:
+            errors.append(f"Ligne {idx}: entreprise ou email manquant")
+            continue
+        valid.append((idx, row, entreprise_nom, email, (row.get('habilitation_code') or '').strip()))
+
+    # Préchargement des lignes existantes du lot
+    entreprises = {
+        e.nom: e for e in Entreprise.objects.filter(nom__in={v[2] for v in valid})
+    }
+    stagiaires = {
+        s.email: s for s in Stagiaire.objects.filter(email__in={v[3] for v in valid})
+    }
+    habilitations = state['habilitations']
+    codes_manquants = {v[4] for v in valid if v[4]} - habilitations.keys()
+    if codes_manquants:
+        habilitations.update(
+            (h.code, h) for h in Habilitation.objects.filter(code__in=codes_manquants)
+        )
+
+    # Nouvelles entreprises et nouveaux stagiaires (dédoublonnés dans le lot)
+    new_entreprises = {}
+    new_stagiaires = {}
+    for idx, row, entreprise_nom, email, hab_code in valid:
+        if entreprise_nom not in entreprises and entreprise_nom not in new_entreprises \
+                and entreprise_nom not in state['entreprises']:
+            new_entreprises[entreprise_nom] = Entreprise(
+                nom=entreprise_nom, type_entreprise='client', email='na@example.com',
+                telephone='', adresse='', code_postal='', ville='', tenant=tenant,
+            )
+        if email not in stagiaires and email not in new_stagiaires and email not in state['emails']:
+            new_stagiaires[email] = Stagiaire(
+                email=email,
+                nom=row.get('nom', ''),
+                prenom=row.get('prenom', ''),
+                organisme_formation=organisme_formation,
+                tenant=tenant,
+            )
+            new_stagiaires[email]._entreprise_nom = entreprise_nom
+
+    demandes = []
+    for idx, row, entreprise_nom, email, hab_code in valid:
+        if not hab_code:
+            continue
+        hab = habilitations.get(hab_code)
+        if hab is None:
+            errors.append(f"Ligne {idx}: habilitation {hab_code} inconnue")
+            continue
+        demandes.append((entreprise_nom, email, hab))
+
+    counts = {
+        'created_entreprises': len(new_entreprises),
+        'created_stagiaires': len(new_stagiaires),
+        'created_demandes': len(demandes),
+    }
+    if dry_run:
+        state['entreprises'].update(new_entreprises)
+        state['emails'].update(new_stagiaires)
+        return counts
+
+    if new_entreprises:
+        Entreprise.objects.bulk_create(new_entreprises.values())
+        entreprises.update(
+            (e.nom, e) for e in Entreprise.objects.filter(nom__in=new_entreprises.keys())
+        )
+        # bulk_create ne déclenche pas les signaux : indexation de recherche explicite
+        index_objets('entreprise', [entreprises[nom] for nom in new_entreprises])
+
+    if new_stagiaires:
+        for stagiaire in new_stagiaires.values():
+            stagiaire.entreprise = entreprises[stagiaire._entreprise_nom]
+        Stagiaire.objects.bulk_create(new_stagiaires.values())
+        stagiaires.update(
+            (s.email, s) for s in Stagiaire.objects.filter(email__in=new_stagiaires.keys())
+        )
+        index_objets('stagiaire', [stagiaires[email] for email in new_stagiaires])
+        invalidate_autocomplete_cache('stagiaires')
+
+    if demandes:
+        now = timezone.now()
+        objs = DemandeFormation.objects.bulk_create([
+            DemandeFormation(
+                entreprise_demandeuse=entreprises[entreprise_nom],
+                organisme_formation=organisme_formation,
+                tenant=tenant,
+                habilitation=hab,
+                statut='en_attente',
+                demandeur=user,
+                consentement_at=now,
+            )
+            for entreprise_nom, email, hab in demandes
+        ])
+        Through = DemandeFormation.stagiaires.through
+        Through.objects.bulk_create([
+            Through(demandeformation_id=demande.pk, stagiaire_id=stagiaires[email].pk)
+            for demande, (entreprise_nom, email, hab) in zip(objs, demandes)
+        ])
+
+    return counts
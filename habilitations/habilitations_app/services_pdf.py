@@ -0,0 +1,295 @@
+# habilitations_app/services_pdf.py
+"""
+Génération des PDF de titres d'habilitation
+
+- Les données d'un titre sont extraites une fois en dict (titre_payload) : le rendu
+  lui-même ne touche plus à l'ORM et peut tourner dans un pool de processus.
+- Les éléments statiques de la page (bandeau, logo, libellés) sont préparés une fois
+  par tenant (get_titre_template, mis en cache dans le processus) puis dessinés une
+  seule fois par document sous forme de Form XObject réutilisé sur chaque page.
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+
+try:
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+except ImportError:  # pragma: no cover - reportlab optionnel
+    canvas = None
+
+
+TITRE_RELATED = ('stagiaire', 'habilitation', 'specialisation', 'tenant')
+
+# À incrémenter à chaque changement de mise en page : invalide le cache disque des PDF
+PDF_TEMPLATE_VERSION = 1
+
+# Ordonnées des lignes libellé/valeur sous le bandeau
+FIELD_ROWS = (740, 720, 700, 680, 660)
+
+
+# ==================== DONNÉES ====================
+
+def titre_payload(titre):
+    """Données nécessaires au rendu d'un titre (dict sérialisable, sans accès ORM ensuite)"""
+    if titre.specialisation_id:
+        libelle = f"{titre.specialisation.code} - {titre.specialisation.nom}"
+    elif titre.habilitation_id:
+        libelle = f"{titre.habilitation.code} - {titre.habilitation.nom}"
+    else:
+        libelle = ''
+    return {
+        'numero_titre': titre.numero_titre,
+        'stagiaire': titre.stagiaire.nom_complet,
+        'habilitation': libelle,
+        'date_delivrance': str(titre.date_delivrance),
+        'date_expiration': str(titre.date_expiration),
+        'template': template_key(titre.tenant),
+    }
+
+
+def titres_for_batch(session=None, tenant=None):
+    """Titres délivrés d'une session ou d'un tenant, préchargés pour le rendu"""
+    from .models import Titre
+
+    qs = Titre.objects.select_related(*TITRE_RELATED).exclude(statut='attente')
+    if session is not None:
+        qs = qs.filter(formation__session=session)
+    if tenant is not None:
+        qs = qs.filter(tenant=tenant)
+    return qs
+
+
+def template_key(tenant):
+    """Clé (hashable) du gabarit statique d'un tenant ; None = gabarit générique"""
+    if tenant is None:
+        return None
+    logo = tenant.logo.path if tenant.logo else ''
+    return (tenant.pk, tenant.nom_public, tenant.couleur_primaire, logo)
+
+
+def titre_pdf_filename(titre):
+    return f"titre-{titre.numero_titre}.pdf"
+
+
+# ==================== CACHE DISQUE ====================
+
+def titre_pdf_digest(titre, payload=None):
+    """
+    Empreinte du PDF d'un titre : champs rendus + version du gabarit + date_modification.
+
+    Sert à la fois de nom de fichier dans le cache et d'ETag HTTP.
+    """
+    payload = payload or titre_payload(titre)
+    data = {
+        'payload': payload,
+        'version': PDF_TEMPLATE_VERSION,
+        'date_modification': titre.date_modification.isoformat() if titre.date_modification else '',
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _titre_cache_dir(titre):
+    root = getattr(settings, 'TITRE_PDF_CACHE_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'titres_pdf')
+    return os.path.join(root, str(titre.pk))
+
+
+def get_cached_titre_pdf(titre, payload=None):
+    """
+    Retourne (fichier ouvert en lecture binaire, empreinte) du PDF d'un titre,
+    en le générant si absent du cache. L'appelant ferme le fichier.
+
+    Un fichier par titre et par empreinte ; à la régénération, les anciennes
+    versions du même titre sont supprimées. Le fichier est ouvert ici même : une
+    version supprimée entre-temps par une autre requête est simplement régénérée,
+    et un PDF tout juste rendu est servi depuis la mémoire.
+    """
+    payload = payload or titre_payload(titre)
+    digest = titre_pdf_digest(titre, payload)
+    directory = _titre_cache_dir(titre)
+    path = os.path.join(directory, f"{digest}.pdf")
+    try:
+        return open(path, 'rb'), digest
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(directory, exist_ok=True)
+    content = render_payloads_pdf([payload], title=f"Titre {titre.numero_titre}")
+    # Écriture atomique : une requête concurrente ne lit jamais un fichier partiel
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(content)
+    os.replace(tmp_path, path)
+
+    for name in os.listdir(directory):
+        if name.endswith('.pdf') and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+    return io.BytesIO(content), digest
+
+
+# ==================== GABARIT PAR TENANT ====================
+
+@lru_cache(maxsize=64)
+def get_titre_template(key):
+    """
+    Prépare les éléments statiques de la page pour un tenant (mis en cache par processus).
+
+    Le logo est lu et décodé une seule fois ; un changement de logo/couleur/nom
+    change la clé et donc le gabarit.
+    """
+    template = {'nom': "Titre d'habilitation", 'couleur': '#2c3e50', 'logo': None}
+    if key is None:
+        return template
+    _, nom_public, couleur, logo_path = key
+    template['nom'] = nom_public
+    template['couleur'] = couleur or template['couleur']
+    if logo_path and canvas is not None and os.path.exists(logo_path):
+        try:
+            template['logo'] = ImageReader(logo_path)
+        except Exception:
+            template['logo'] = None
+    return template
+
+
+def _template_form_name(key):
+    return 'gabarit_generique' if key is None else f"gabarit_{key[0]}"
+
+
+def _ensure_template_form(pdf, key, drawn):
+    """Dessine le gabarit du tenant comme Form XObject, une seule fois par document"""
+    name = _template_form_name(key)
+    if name in drawn:
+        return name
+    template = get_titre_template(key)
+    width, height = A4
+    pdf.beginForm(name)
+    try:
+        couleur = HexColor(template['couleur'])
+    except Exception:
+        couleur = HexColor('#2c3e50')
+    pdf.setFillColor(couleur)
+    pdf.rect(0, height - 70, width, 70, stroke=0, fill=1)
+    pdf.setFillColorRGB(1, 1, 1)
+    pdf.setFont('Helvetica-Bold', 16)
+    pdf.drawString(50, height - 45, template['nom'])
+    if template['logo'] is not None:
+        pdf.drawImage(template['logo'], width - 130, height - 65, width=80, height=60,
+                      preserveAspectRatio=True, mask='auto')
+    pdf.setFillColorRGB(0, 0, 0)
+    pdf.setFont('Helvetica', 11)
+    for y, label in zip(FIELD_ROWS, ('Titre n°', 'Stagiaire', 'Habilitation', 'Délivré le', 'Expire le')):
+        pdf.drawString(50, y, f"{label} :")
+    pdf.endForm()
+    drawn.add(name)
+    return name
+
+
+# ==================== RENDU ====================
+
+def _draw_titre_page(pdf, payload, drawn):
+    pdf.doForm(_ensure_template_form(pdf, payload['template'], drawn))
+    pdf.setFont('Helvetica', 11)
+    values = (payload['numero_titre'], payload['stagiaire'], payload['habilitation'],
+              payload['date_delivrance'], payload['date_expiration'])
+    for y, value in zip(FIELD_ROWS, values):
+        pdf.drawString(160, y, value)
+    pdf.showPage()
+
+
+def render_payloads_pdf(payloads, title=None):
+    """Rend une liste de payloads en un PDF (une page par titre). Retourne des bytes."""
+    if canvas is None:
+        # Fallback texte
+        return '\n'.join(
+            f"Titre {p['numero_titre']} - {p['stagiaire']}" for p in payloads
+        ).encode('utf-8')
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    if title:
+        pdf.setTitle(title)
+    drawn = set()
+    for payload in payloads:
+        _draw_titre_page(pdf, payload, drawn)
+    pdf.save()
+    return buffer.getvalue()
+
+
+def render_titre_pdf(titre):
+    """
+    Génère le PDF d'un titre.
+
+    Args:
+        titre: Instance Titre (stagiaire et habilitation idéalement préchargés)
+
+    Returns:
+        bytes du PDF (contenu texte brut si reportlab n'est pas installé)
+    """
+    return render_payloads_pdf([titre_payload(titre)], title=f"Titre {titre.numero_titre}")
+
+
+def _render_chunk(payloads):
+    """Rendu d'un lot de titres en PDF individuels (exécuté dans un processus du pool)"""
+    return [
+        (f"titre-{p['numero_titre']}.pdf", render_payloads_pdf([p], title=f"Titre {p['numero_titre']}"))
+        for p in payloads
+    ]
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def render_titres_batch(titres, output='zip', workers=None):
+    """
+    Rend un ensemble de titres en un seul fichier.
+
+    Args:
+        titres: Queryset/itérable de Titre (préchargé via TITRE_RELATED de préférence)
+        output: 'zip' (un PDF par titre) ou 'pdf' (un PDF multi-pages)
+        workers: Nombre de processus pour le rendu ZIP (défaut : PDF_RENDER_WORKERS ;
+                 1 = rendu dans le processus courant)
+
+    Returns:
+        (nom_de_fichier, bytes, nombre_de_titres)
+    """
+    # Les titres sont regroupés par tenant pour que chaque lot réutilise le même gabarit
+    payloads = sorted((titre_payload(t) for t in titres), key=lambda p: (str(p['template']), p['numero_titre']))
+
+    if output == 'pdf':
+        return 'titres.pdf', render_payloads_pdf(payloads, title='Titres'), len(payloads)
+    if output != 'zip':
+        raise ValueError(f"Format de sortie inconnu : {output}")
+
+    workers = workers or getattr(settings, 'PDF_RENDER_WORKERS', None) or os.cpu_count() or 1
+    chunk_size = getattr(settings, 'PDF_RENDER_CHUNK_SIZE', 50)
+    chunks = list(_chunks(payloads, chunk_size))
+
+    # Un processus démon ne peut pas créer de pool (run_workers lance des processus non démons) : rendu local
+    if workers > 1 and len(chunks) > 1 and not multiprocessing.current_process().daemon:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            rendered = pool.map(_render_chunk, chunks)
+            files = [f for chunk in rendered for f in chunk]
+    else:
+        files = [f for chunk in chunks for f in _render_chunk(chunk)]
+
+    buffer = io.BytesIO()
+    # Les PDF sont déjà compressés : ZIP_STORED évite de recompresser pour rien
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for filename, content in files:
+            archive.writestr(filename, content)
+    return 'titres.zip', buffer.getvalue(), len(payloads)
@@ -0,0 +1,90 @@
+"""
+Jeux de données minimaux des tests : un tenant OF, une PME, des comptes par rôle
+et des dossiers stagiaire complets (formation, session, titre, renouvellement)
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from ..models import (
+    DemandeFormation, Entreprise, Formation, Habilitation, ProfilUtilisateur, RenouvellementHabilitation,
+    SessionFormation, Stagiaire, Tenant, Titre,
+)
+
+
+def creer_tenant(slug='of-test'):
+    """Entreprise OF + Tenant, et une PME cliente du tenant"""
+    of = Entreprise.objects.create(
+        nom=f"OF {slug}", type_entreprise='of', email=f"contact@{slug}.example.com",
+        telephone='0400000000', adresse='1 rue de la Formation', code_postal='69000', ville='Lyon',
+    )
+    tenant = Tenant.objects.create(organisme_formation=of, nom_public=f"Formation {slug}", slug=slug)
+    of.tenant = tenant
+    of.save(update_fields=['tenant'])
+    pme = Entreprise.objects.create(
+        nom=f"PME {slug}", type_entreprise='client', email=f"contact@pme-{slug}.example.com",
+        telephone='0400000000', adresse='2 avenue des PME', code_postal='69000', ville='Lyon', tenant=tenant,
+    )
+    return of, tenant, pme
+
+
+def creer_utilisateur(username, role, entreprise=None, tenant=None):
+    """Compte avec son profil (créé par signal puis complété)"""
+    user = User.objects.create_user(username, email=f"{username}@example.com", password='test')
+    ProfilUtilisateur.objects.filter(user=user).update(role=role, entreprise=entreprise, tenant=tenant)
+    return User.objects.get(pk=user.pk)
+
+
+def creer_habilitation(code='B1V'):
+    return Habilitation.objects.create(
+        code=code, nom=f"Habilitation {code}", categorie='1', niveau=code,
+        savoirs="Connaître les dangers de l'électricité\nConnaître les zones d'environnement",
+        savoirs_faire="Appliquer les prescriptions de sécurité",
+    )
+
+
+def creer_session(tenant, habilitation, createur, formateur=None, numero='S-001'):
+    today = timezone.now().date()
+    session = SessionFormation.objects.create(
+        numero_session=numero, tenant=tenant, habilitation=habilitation, formateur=formateur,
+        date_debut=today - timedelta(days=3), date_fin=today + timedelta(days=2),
+        lieu='Lyon', statut='en_cours', nombre_places=1000, createur=createur,
+    )
+    if formateur is not None:
+        session.formateurs.add(formateur.profil)
+    return session
+
+
+def creer_dossiers(of, tenant, pme, habilitations, session, admin, nombre, debut=0):
+    """
+    ``nombre`` stagiaires de la PME avec, par habilitation, une formation terminée,
+    un titre délivré (expirant sous 60 jours), un renouvellement planifié et une demande.
+    """
+    today = timezone.now().date()
+    for i in range(debut, debut + nombre):
+        stagiaire = Stagiaire.objects.create(
+            organisme_formation=of, tenant=tenant, entreprise=pme,
+            nom=f"Nom{i:04d}", prenom=f"Prénom{i:04d}", email=f"stagiaire{i}@{tenant.slug}.example.com",
+        )
+        for habilitation in habilitations:
+            formation = Formation.objects.create(
+                stagiaire=stagiaire, habilitation=habilitation, tenant=tenant, session=session,
+                organisme_formation=of.nom, date_debut=today - timedelta(days=30),
+                date_fin_prevue=today - timedelta(days=28), date_fin_reelle=today - timedelta(days=28),
+                statut='completee', numero_session=session.numero_session,
+            )
+            titre = Titre.objects.create(
+                stagiaire=stagiaire, formation=formation, tenant=tenant, habilitation=habilitation,
+                numero_titre=f"{tenant.slug}-{habilitation.code}-{i:04d}",
+                date_delivrance=today - timedelta(days=28), date_expiration=today + timedelta(days=60),
+                statut='delivre', delivre_par=admin,
+            )
+            RenouvellementHabilitation.objects.create(
+                titre_precedent=titre, tenant=tenant, date_renouvellement_prevue=today + timedelta(days=30),
+            )
+        demande = DemandeFormation.objects.create(
+            entreprise_demandeuse=pme, organisme_formation=of, tenant=tenant,
+            habilitation=habilitations[0], demandeur=admin,
+        )
+        demande.stagiaires.add(stagiaire)
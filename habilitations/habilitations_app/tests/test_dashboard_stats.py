@@ -0,0 +1,61 @@
+"""
+Compteurs matérialisés du tableau de bord Admin OF (TenantDashboardStats)
+"""
+from unittest import mock
+
+from django.test import TestCase
+
+from .. import services
+from ..models import Formation, Stagiaire, TenantDashboardStats
+from ..services import get_tenant_dashboard_stats
+from .fixtures import creer_dossiers, creer_habilitation, creer_session, creer_tenant, creer_utilisateur
+
+
+class DashboardStatsRefreshTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.of, cls.tenant, cls.pme = creer_tenant('of-a')
+        cls.autre_of, cls.autre_tenant, _ = creer_tenant('of-b')
+        admin = creer_utilisateur('admin', 'admin_of', cls.of, cls.tenant)
+        habilitation = creer_habilitation('B1V')
+        session = creer_session(cls.tenant, habilitation, admin)
+        creer_dossiers(cls.of, cls.tenant, cls.pme, [habilitation], session, admin, 5)
+
+    def setUp(self):
+        for tenant in (self.tenant, self.autre_tenant):
+            get_tenant_dashboard_stats(tenant)
+
+    def _stats(self, tenant):
+        return TenantDashboardStats.objects.get(tenant=tenant)
+
+    def test_suppression_en_masse_un_seul_recalcul(self):
+        with mock.patch.object(services, 'refresh_tenant_dashboard_stats',
+                               wraps=services.refresh_tenant_dashboard_stats) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                Formation.objects.filter(tenant=self.tenant).delete()
+        tenants = [c.args[0] for c in refresh.call_args_list]
+        self.assertEqual(tenants, [self.tenant])
+        self.assertIn('formations', refresh.call_args.args[1])
+
+    def test_changement_d_of_rafraichit_les_deux_tenants(self):
+        stagiaire = Stagiaire.objects.filter(organisme_formation=self.of).first()
+        stagiaire.organisme_formation = self.autre_of
+        stagiaire.tenant = self.autre_tenant
+        with self.captureOnCommitCallbacks(execute=True):
+            stagiaire.save()
+        self.assertEqual(self._stats(self.tenant).total_stagiaires, 4)
+        self.assertEqual(self._stats(self.autre_tenant).total_stagiaires, 1)
+        self.assertEqual(self._stats(self.tenant).titres_expirant, 4)
+        self.assertEqual(self._stats(self.autre_tenant).titres_expirant, 1)
+
+    def test_formation_changee_de_stagiaire(self):
+        autre = Stagiaire.objects.create(
+            organisme_formation=self.autre_of, tenant=self.autre_tenant, nom='Autre', prenom='OF',
+        )
+        formation = Formation.objects.filter(stagiaire__organisme_formation=self.of, statut='completee').first()
+        formation.stagiaire = autre
+        with self.captureOnCommitCallbacks(execute=True):
+            formation.save()
+        self.assertEqual(self._stats(self.tenant).formations_a_valider, 4)
+        self.assertEqual(self._stats(self.autre_tenant).formations_a_valider, 1)
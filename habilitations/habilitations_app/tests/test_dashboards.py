@@ -0,0 +1,114 @@
+"""
+Régression du nombre de requêtes SQL des tableaux de bord
+
+Chaque tableau de bord est appelé une première fois (caches process-local du
+middleware et des périmètres remplis), puis son nombre de requêtes est figé.
+Le nombre ne doit pas dépendre du volume : il est vérifié avant et après
+l'ajout de nouveaux dossiers.
+"""
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import views
+from ..models import Stagiaire
+from .fixtures import (
+    creer_dossiers, creer_habilitation, creer_session, creer_tenant, creer_utilisateur,
+)
+
+
+class DashboardQueryCountTests(TestCase):
+    # url_name → (compte, requêtes attendues)
+    DASHBOARDS = {
+        'dashboard_super_admin': ('super_admin', 9),
+        'dashboard_admin_of': ('admin', 7),
+        'dashboard_responsable_pme': ('pme', 10),
+        'dashboard_formateur': ('formateur', 7),
+        'dashboard_stagiaire': ('stagiaire', 7),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.of, cls.tenant, cls.pme = creer_tenant()
+        cls.users = {
+            'super_admin': creer_utilisateur('sa', 'super_admin'),
+            'admin': creer_utilisateur('admin', 'admin_of', cls.of, cls.tenant),
+            'pme': creer_utilisateur('resp', 'responsable_pme', cls.pme, cls.tenant),
+            'formateur': creer_utilisateur('formateur', 'formateur', cls.of, cls.tenant),
+            'stagiaire': creer_utilisateur('stu', 'stagiaire', cls.pme, cls.tenant),
+        }
+        cls.habilitations = [creer_habilitation('B1V'), creer_habilitation('BR')]
+        cls.session = creer_session(cls.tenant, cls.habilitations[0], cls.users['admin'], cls.users['formateur'])
+        creer_dossiers(cls.of, cls.tenant, cls.pme, cls.habilitations, cls.session, cls.users['admin'], 3)
+        Stagiaire.objects.filter(pk=Stagiaire.objects.order_by('pk').values('pk')[:1]).update(
+            user=cls.users['stagiaire']
+        )
+
+    def assertDashboardQueries(self, url_name):
+        role, expected = self.DASHBOARDS[url_name]
+        self.client.force_login(self.users[role])
+        url = reverse(url_name)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_query_counts(self):
+        for url_name in self.DASHBOARDS:
+            with self.subTest(dashboard=url_name):
+                self.assertDashboardQueries(url_name)
+
+    def test_query_counts_independent_of_volume(self):
+        creer_dossiers(self.of, self.tenant, self.pme, self.habilitations, self.session, self.users['admin'], 10, debut=100)
+        for url_name in self.DASHBOARDS:
+            with self.subTest(dashboard=url_name):
+                self.assertDashboardQueries(url_name)
+
+
+class LegacyDashboardTests(TestCase):
+    """
+    dashboard_client / dashboard_of (views.py) : les URL portent désormais ces noms vers
+    views_dashboards, les vues historiques sont appelées directement
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.of, cls.tenant, cls.pme = creer_tenant()
+        cls.admin = creer_utilisateur('admin', 'admin_of', cls.of, cls.tenant)
+        cls.pme_user = creer_utilisateur('resp', 'responsable_pme', cls.pme, cls.tenant)
+        cls.habilitations = [creer_habilitation('B1V'), creer_habilitation('BR')]
+        cls.session = creer_session(cls.tenant, cls.habilitations[0], cls.admin)
+        creer_dossiers(cls.of, cls.tenant, cls.pme, cls.habilitations, cls.session, cls.admin, 3)
+
+    def _get(self, view, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        request._messages = CookieStorage(request)
+        return view(request)
+
+    def assertQueriesIndependentOfVolume(self, view, user):
+        """Nombre de requêtes identique après l'ajout de nouveaux dossiers"""
+        with CaptureQueriesContext(connection) as avant:
+            self.assertEqual(self._get(view, user).status_code, 200)
+        creer_dossiers(self.of, self.tenant, self.pme, self.habilitations, self.session, self.admin, 10, debut=100)
+        with self.assertNumQueries(len(avant.captured_queries)):
+            self._get(view, user)
+
+    def test_dashboard_client(self):
+        response = self._get(views.dashboard_client, self.pme_user)
+        self.assertEqual(response.status_code, 200)
+        # Titres délivrés expirant sous 90 jours
+        self.assertContains(response, 'Nom0002')
+        self.assertQueriesIndependentOfVolume(views.dashboard_client, self.pme_user)
+
+    def test_dashboard_of(self):
+        response = self._get(views.dashboard_of, self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.session.numero_session)
+        self.assertQueriesIndependentOfVolume(views.dashboard_of, self.admin)
+
+    def test_acces_refuse(self):
+        self.assertEqual(self._get(views.dashboard_client, self.admin).status_code, 302)
+        self.assertEqual(self._get(views.dashboard_of, self.pme_user).status_code, 302)
@@ -0,0 +1,34 @@
+"""
+Jeu de données de charge : génération puis purge
+"""
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from ..models import DocumentRecherche, Formation, Stagiaire, Tenant, ValidationCompetence
+from ..search import rechercher
+from ..services_dataset import flush_dataset, generate_dataset
+from .fixtures import creer_tenant
+
+
+class DatasetTests(TestCase):
+
+    def setUp(self):
+        self.of, self.tenant, self.pme = creer_tenant('autre')
+        self.stagiaire = Stagiaire.objects.create(
+            organisme_formation=self.of, tenant=self.tenant, entreprise=self.pme, nom='Hors', prenom='Jeu',
+        )
+
+    def test_generation_puis_purge(self):
+        generate_dataset(tenants=1, pme=2, stagiaires=20, formateurs=1, demandes=4, prefix='test')
+        formations = Formation.objects.filter(tenant__slug='test-of-1')
+        self.assertTrue(formations.exists())
+        # Checklists matérialisées à la génération (régime établi des benchmarks)
+        self.assertFalse(formations.filter(validations__isnull=True).exists())
+
+        self.assertEqual(flush_dataset('test'), 1)
+        self.assertFalse(Tenant.objects.filter(slug__startswith='test-').exists())
+        self.assertFalse(User.objects.filter(username__startswith='test-').exists())
+        self.assertEqual(ValidationCompetence.objects.count(), 0)
+        self.assertEqual(list(Stagiaire.objects.all()), [self.stagiaire])
+        self.assertEqual(DocumentRecherche.objects.filter(tenant__isnull=False).exclude(tenant=self.tenant).count(), 0)
+        self.assertEqual([r.objet_id for r in rechercher('hors', types=['stagiaire'])], [self.stagiaire.pk])
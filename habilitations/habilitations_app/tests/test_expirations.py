@@ -0,0 +1,95 @@
+"""
+Scan incrémental des expirations : reprise depuis les curseurs d'EtatScanExpirations
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Formation, RenouvellementHabilitation, Stagiaire, Titre
+from ..services_expirations import get_etat_scan, scan_expirations
+from .fixtures import creer_habilitation, creer_tenant, creer_utilisateur
+
+
+class ScanExpirationsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.of, cls.tenant, cls.pme = creer_tenant()
+        cls.admin = creer_utilisateur('admin', 'admin_of', cls.of, cls.tenant)
+        cls.habilitation = creer_habilitation('B1V')
+        cls.today = timezone.now().date()
+
+    def _titre(self, numero, date_expiration):
+        # Une formation par (stagiaire, habilitation) : un stagiaire par titre
+        stagiaire = Stagiaire.objects.create(
+            organisme_formation=self.of, tenant=self.tenant, entreprise=self.pme, nom=f"Nom {numero}", prenom='Test',
+        )
+        formation = Formation.objects.create(
+            stagiaire=stagiaire, habilitation=self.habilitation, tenant=self.tenant,
+            organisme_formation=self.of.nom, date_debut=self.today - timedelta(days=400),
+            date_fin_prevue=self.today - timedelta(days=398), statut='completee',
+        )
+        return Titre.objects.create(
+            stagiaire=stagiaire, formation=formation, tenant=self.tenant, habilitation=self.habilitation,
+            numero_titre=numero, date_delivrance=self.today - timedelta(days=398),
+            date_expiration=date_expiration, statut='delivre', delivre_par=self.admin,
+        )
+
+    def _statut(self, titre):
+        return Titre.objects.values_list('statut', flat=True).get(pk=titre.pk)
+
+    def test_reprise_depuis_le_curseur_d_expiration(self):
+        echu = self._titre('T-1', self.today - timedelta(days=1))
+        bientot = self._titre('T-2', self.today + timedelta(days=3))
+        resultat = scan_expirations(today=self.today, horizon_jours=0)
+        self.assertEqual(resultat['expires'], 1)
+        self.assertEqual(get_etat_scan().curseur_expiration, self.today)
+
+        # Même jour : rien à refaire
+        self.assertEqual(scan_expirations(today=self.today, horizon_jours=0)['expires'], 0)
+
+        # Quelques jours plus tard : seul l'intervalle [curseur, aujourd'hui[ est parcouru
+        antidate = self._titre('T-3', self.today - timedelta(days=10))
+        resultat = scan_expirations(today=self.today + timedelta(days=5), horizon_jours=0)
+        self.assertEqual(resultat['expires'], 1)
+        self.assertEqual(
+            [self._statut(t) for t in (echu, bientot, antidate)], ['expire', 'expire', 'delivre'],
+        )
+        self.assertEqual(get_etat_scan().curseur_expiration, self.today + timedelta(days=5))
+
+        # Le titre antidaté sous le curseur n'est repris que par un scan complet
+        resultat = scan_expirations(today=self.today + timedelta(days=5), horizon_jours=0, full=True)
+        self.assertEqual(resultat['expires'], 1)
+        self.assertEqual(self._statut(antidate), 'expire')
+
+    def test_reprise_depuis_le_curseur_de_renouvellement(self):
+        proche = self._titre('T-1', self.today + timedelta(days=10))
+        lointain = self._titre('T-2', self.today + timedelta(days=40))
+        self.assertEqual(scan_expirations(today=self.today, horizon_jours=30)['renouvellements'], 1)
+        self.assertEqual(get_etat_scan().curseur_renouvellement, self.today + timedelta(days=31))
+
+        # L'horizon avance : le titre lointain y entre, le proche n'est pas replanifié
+        resultat = scan_expirations(today=self.today + timedelta(days=15), horizon_jours=30)
+        self.assertEqual(resultat['renouvellements'], 1)
+        self.assertEqual(
+            list(RenouvellementHabilitation.objects.order_by('titre_precedent_id').values_list(
+                'titre_precedent_id', 'date_renouvellement_prevue',
+            )),
+            [(proche.pk, proche.date_expiration), (lointain.pk, lointain.date_expiration)],
+        )
+
+    def test_dry_run_ne_deplace_pas_les_curseurs(self):
+        titre = self._titre('T-1', self.today - timedelta(days=1))
+        resultat = scan_expirations(today=self.today, dry_run=True)
+        self.assertEqual(resultat['expires'], 1)
+        etat = get_etat_scan()
+        self.assertEqual((etat.curseur_expiration, etat.curseur_renouvellement), (None, None))
+        self.assertEqual(self._statut(titre), 'delivre')
+
+    def test_lots(self):
+        for i in range(5):
+            self._titre(f"T-{i}", self.today - timedelta(days=i + 1))
+        resultat = scan_expirations(today=self.today, batch_size=2)
+        self.assertEqual(resultat['expires'], 5)
+        self.assertEqual(resultat['tenants'], [{'tenant_id': self.tenant.pk, 'expires': 5, 'renouvellements': 0}])
@@ -0,0 +1,33 @@
+"""
+API des formateurs qualifiés : un profil OF sans entreprise ne voit pas les formateurs des autres OF
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import ProfilUtilisateur
+from .fixtures import creer_tenant, creer_utilisateur
+
+
+class FormateursQualifiesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        of, cls.tenant, _ = creer_tenant()
+        cls.formateur = creer_utilisateur('form', 'formateur', tenant=cls.tenant)
+        cls.secretariat = creer_utilisateur('secr', 'secretariat')
+
+    def _formateurs(self, user):
+        self.client.force_login(user)
+        response = self.client.get(reverse('api_formateurs_qualifies'))
+        self.assertEqual(response.status_code, 200)
+        return [f['id'] for f in response.json()['formateurs']]
+
+    def test_sans_entreprise_ni_tenant(self):
+        self.assertEqual(self._formateurs(self.secretariat), [])
+
+    def test_sans_entreprise_restreint_au_tenant(self):
+        ProfilUtilisateur.objects.filter(user=self.secretariat).update(tenant=self.tenant)
+        self.assertEqual(self._formateurs(self.secretariat), [self.formateur.profil.pk])
+
+    def test_super_admin(self):
+        self.assertIn(self.formateur.profil.pk, self._formateurs(creer_utilisateur('sa', 'super_admin')))
@@ -0,0 +1,26 @@
+"""
+Décodage en flux des CSV importés
+"""
+import csv
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from ..services_import import iter_decoded_lines
+
+
+class IterDecodedLinesTests(SimpleTestCase):
+    CONTENU = 'nom;poste\r\nDupont;"Chef\x0bd\'équipe zone\x85B"\r\nMartin;Électricien\rDurand;Soudeur\n'
+
+    def _lignes(self, chunk_size):
+        uploaded = SimpleUploadedFile('import.csv', self.CONTENU.encode('utf-8'))
+        uploaded.DEFAULT_CHUNK_SIZE = chunk_size
+        return list(iter_decoded_lines(uploaded))
+
+    def test_seules_les_fins_de_ligne_csv_coupent(self):
+        for chunk_size in (1, 2, 3, 7, 64 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                lignes = self._lignes(chunk_size)
+                self.assertEqual(''.join(lignes), self.CONTENU)
+                self.assertEqual(len(lignes), 4)
+                self.assertEqual(list(csv.reader(lignes, delimiter=';'))[1][1], "Chef\x0bd'équipe zone\x85B")
@@ -0,0 +1,71 @@
+"""
+File de jobs de fond : réservation, battement de cœur et reprise des jobs abandonnés
+"""
+import time
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from ..jobs import JOB_HANDLERS, claim_next_job, enqueue_job, requeue_stale_jobs, run_job_with_heartbeat
+from ..models import Job
+
+
+class JobTestMixin:
+
+    def setUp(self):
+        JOB_HANDLERS['test'] = lambda job: {'ok': True}
+        self.addCleanup(JOB_HANDLERS.pop, 'test', None)
+
+
+class ClaimAndRequeueTests(JobTestMixin, TestCase):
+
+    def test_un_job_n_est_reserve_qu_une_fois(self):
+        premier, second = enqueue_job('test'), enqueue_job('test')
+        claims = [claim_next_job('w1'), claim_next_job('w2'), claim_next_job('w3')]
+        self.assertEqual([j.pk if j else None for j in claims], [premier.pk, second.pk, None])
+        job = Job.objects.get(pk=premier.pk)
+        self.assertEqual((job.statut, job.worker, job.tentatives), ('en_cours', 'w1', 1))
+        self.assertIsNotNone(job.date_heartbeat)
+
+    def test_job_long_mais_vivant_non_repris(self):
+        job = enqueue_job('test')
+        claim_next_job('w1')
+        # Démarré il y a une heure, dernier battement récent
+        Job.objects.filter(pk=job.pk).update(date_debut=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_jobs(300), 0)
+        self.assertEqual(Job.objects.get(pk=job.pk).statut, 'en_cours')
+
+    def test_battement_manque_remis_en_file(self):
+        job = enqueue_job('test')
+        claim_next_job('w1')
+        Job.objects.filter(pk=job.pk).update(date_heartbeat=timezone.now() - timedelta(seconds=301))
+        self.assertEqual(requeue_stale_jobs(300), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.statut, job.worker), ('en_attente', ''))
+
+    def test_echec_au_dela_des_tentatives(self):
+        job = enqueue_job('test')
+        claim_next_job('w1')
+        Job.objects.filter(pk=job.pk).update(tentatives=3, date_heartbeat=timezone.now() - timedelta(hours=1))
+        requeue_stale_jobs(300, max_tentatives=3)
+        self.assertEqual(Job.objects.get(pk=job.pk).statut, 'echec')
+
+
+class HeartbeatTests(JobTestMixin, TransactionTestCase):
+
+    def test_battement_pendant_l_execution(self):
+        battements = []
+
+        def handler(job):
+            time.sleep(0.7)
+            battements.append(Job.objects.get(pk=job.pk).date_heartbeat)
+            return {}
+
+        JOB_HANDLERS['test'] = handler
+        enqueue_job('test')
+        job = claim_next_job('w1')
+        debut = Job.objects.get(pk=job.pk).date_heartbeat
+        self.assertTrue(run_job_with_heartbeat(job, 'w1', interval=0.2))
+        self.assertGreater(battements[0], debut)
+        self.assertEqual(Job.objects.get(pk=job.pk).statut, 'termine')
@@ -0,0 +1,57 @@
+"""
+Nombre de requêtes SQL constant des listes paginées
+
+Chaque liste est rendue avec N puis 3N dossiers : le nombre de requêtes doit être
+identique (plans de chargement déclarés, voir les ListView de views.py).
+"""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .fixtures import (
+    creer_dossiers, creer_habilitation, creer_session, creer_tenant, creer_utilisateur,
+)
+
+
+class ListViewQueryCountTests(TestCase):
+    LIST_VIEWS = ['stagiaire_list', 'formation_list', 'titre_list', 'renouvellement_list']
+    # Stagiaires ajoutés (deux formations, titres et renouvellements chacun)
+    N = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.of, cls.tenant, cls.pme = creer_tenant()
+        cls.admin = creer_utilisateur('admin', 'admin_of', cls.of, cls.tenant)
+        cls.habilitations = [creer_habilitation('B1V'), creer_habilitation('BR')]
+        cls.session = creer_session(cls.tenant, cls.habilitations[0], cls.admin)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _ajouter_dossiers(self, nombre, debut):
+        creer_dossiers(self.of, self.tenant, self.pme, self.habilitations, self.session, self.admin, nombre, debut)
+
+    def _get(self, url_name):
+        response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_query_count_independent_of_rows(self):
+        self._ajouter_dossiers(self.N, debut=0)
+        attendu, lignes = {}, {}
+        for url_name in self.LIST_VIEWS:
+            # Première requête : caches process-local remplis ; seule la seconde est comptée
+            self._get(url_name)
+            with CaptureQueriesContext(connection) as queries:
+                lignes[url_name] = len(self._get(url_name).context['object_list'])
+            attendu[url_name] = len(queries)
+
+        self._ajouter_dossiers(2 * self.N, debut=self.N)
+        for url_name in self.LIST_VIEWS:
+            with self.subTest(liste=url_name):
+                self._get(url_name)
+                with self.assertNumQueries(attendu[url_name]):
+                    response = self._get(url_name)
+                # La page affiche bien plus de lignes qu'au premier passage
+                self.assertGreater(len(response.context['object_list']), lignes[url_name])
@@ -0,0 +1,98 @@
+"""
+Outbox : réservation des lots, nouvelles tentatives espacées et limite de débit par tenant
+"""
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Outbox
+from ..notifications import _claim_batch, dispatch_outbox, enqueue_email, requeue_stale_messages
+from .fixtures import creer_tenant
+
+
+class BackendEnPanne(EmailBackend):
+    """Refuse tous les messages"""
+
+    def send_messages(self, messages):
+        raise ConnectionError("SMTP indisponible")
+
+
+@override_settings(OUTBOX_TENANT_RATE_LIMIT=0, OUTBOX_RETRY_BASE_DELAY=60, OUTBOX_MAX_TENTATIVES=3)
+class OutboxTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        _, cls.tenant, _ = creer_tenant('of-a')
+        _, cls.autre_tenant, _ = creer_tenant('of-b')
+
+    def _enqueue(self, nombre, tenant=None):
+        tenant = tenant or self.tenant
+        return [
+            enqueue_email('test', f"dest{i}@example.com", f"Sujet {i}", 'Corps', tenant=tenant)
+            for i in range(nombre)
+        ]
+
+    def test_un_message_n_est_reserve_qu_une_fois(self):
+        self._enqueue(3)
+        premier, second = _claim_batch('w1', 2), _claim_batch('w2', 2)
+        self.assertEqual((len(premier), len(second)), (2, 1))
+        self.assertFalse({m.pk for m in premier} & {m.pk for m in second})
+        self.assertEqual(_claim_batch('w3', 2), [])
+        self.assertEqual(Outbox.objects.filter(statut='en_cours', tentatives=1).count(), 3)
+
+    def test_message_non_du_ignore(self):
+        message, = self._enqueue(1)
+        Outbox.objects.filter(pk=message.pk).update(prochaine_tentative=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(_claim_batch('w1', 10), [])
+
+    def test_envoi(self):
+        self._enqueue(2)
+        self.assertEqual(dispatch_outbox(batch_size=1), {'envoyes': 2, 'echecs': 0})
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(Outbox.objects.filter(statut='envoye', date_envoi__isnull=False).count(), 2)
+
+    def test_nouvelle_tentative_espacee(self):
+        message, = self._enqueue(1)
+        debut = timezone.now()
+        self.assertEqual(dispatch_outbox(connection=BackendEnPanne()), {'envoyes': 0, 'echecs': 1})
+        message.refresh_from_db()
+        self.assertEqual((message.statut, message.tentatives, message.worker), ('en_attente', 1, ''))
+        self.assertIn('SMTP indisponible', message.erreur)
+        self.assertGreaterEqual(message.prochaine_tentative, debut + timedelta(seconds=60))
+
+        # Deuxième échec : délai doublé
+        Outbox.objects.filter(pk=message.pk).update(prochaine_tentative=timezone.now())
+        debut = timezone.now()
+        dispatch_outbox(connection=BackendEnPanne())
+        message.refresh_from_db()
+        self.assertEqual(message.tentatives, 2)
+        self.assertGreaterEqual(message.prochaine_tentative, debut + timedelta(seconds=120))
+
+    def test_abandon_apres_max_tentatives(self):
+        message, = self._enqueue(1)
+        Outbox.objects.filter(pk=message.pk).update(tentatives=2)
+        dispatch_outbox(connection=BackendEnPanne())
+        self.assertEqual(Outbox.objects.get(pk=message.pk).statut, 'echec')
+
+    @override_settings(OUTBOX_TENANT_RATE_LIMIT=2)
+    def test_limite_de_debit_par_tenant(self):
+        self._enqueue(3)
+        self._enqueue(1, tenant=self.autre_tenant)
+        self.assertEqual(dispatch_outbox(), {'envoyes': 3, 'echecs': 0})
+        # Le tenant au quota garde son troisième message pour la minute suivante, sans bloquer l'autre
+        restants = Outbox.objects.filter(statut='en_attente')
+        self.assertEqual(list(restants.values_list('tenant_id', flat=True)), [self.tenant.pk])
+
+        Outbox.objects.filter(statut='envoye').update(date_envoi=timezone.now() - timedelta(minutes=2))
+        self.assertEqual(dispatch_outbox(), {'envoyes': 1, 'echecs': 0})
+
+    def test_reprise_des_messages_abandonnes(self):
+        self._enqueue(1)
+        _claim_batch('w1', 10)
+        self.assertEqual(requeue_stale_messages(1800), 0)
+        Outbox.objects.update(prochaine_tentative=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale_messages(1800), 1)
+        self.assertEqual(Outbox.objects.get().statut, 'en_attente')
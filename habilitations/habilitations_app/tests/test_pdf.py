@@ -0,0 +1,57 @@
+"""
+PDF d'un titre : cache disque, ETag et réponses 304
+"""
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import services_pdf
+from ..models import Titre
+from ..services_pdf import get_cached_titre_pdf
+from .fixtures import creer_dossiers, creer_habilitation, creer_session, creer_tenant, creer_utilisateur
+
+
+class TitrePdfTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        of, tenant, pme = creer_tenant()
+        cls.admin = creer_utilisateur('admin', 'admin_of', of, tenant)
+        habilitation = creer_habilitation('B1V')
+        creer_dossiers(of, tenant, pme, [habilitation], creer_session(tenant, habilitation, cls.admin), cls.admin, 1)
+        cls.titre = Titre.objects.get()
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, ignore_errors=True)
+        override = override_settings(TITRE_PDF_CACHE_DIR=self.cache_dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(self.admin)
+        self.url = reverse('api_pdf_titre', args=[self.titre.pk])
+
+    def test_304_sans_rendu_apres_purge_du_cache(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+        etag = response['ETag']
+
+        shutil.rmtree(self.cache_dir)
+        with mock.patch.object(services_pdf, 'render_payloads_pdf') as render:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        render.assert_not_called()
+
+    def test_version_supprimee_entre_temps(self):
+        fichier, digest = get_cached_titre_pdf(self.titre)
+        fichier.close()
+        # Une autre requête a régénéré le titre et purgé cette version
+        os.remove(os.path.join(self.cache_dir, str(self.titre.pk), f"{digest}.pdf"))
+        fichier, digest_bis = get_cached_titre_pdf(self.titre)
+        with fichier:
+            self.assertTrue(fichier.read().startswith(b'%PDF'))
+        self.assertEqual(digest_bis, digest)
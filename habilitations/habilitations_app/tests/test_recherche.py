@@ -0,0 +1,57 @@
+"""
+Recherche plein texte : le périmètre d'accès est appliqué avant la limite
+"""
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Stagiaire
+from ..scopes import scope_for_user
+from ..search import filtrer_queryset
+from .fixtures import creer_tenant, creer_utilisateur
+
+
+class RecherchePerimetreTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.of, cls.tenant, cls.pme = creer_tenant('of-a')
+        autre_of, autre_tenant, autre_pme = creer_tenant('of-b')
+        # Homonymes d'un autre tenant, créés avant et mieux classés (texte plus court)
+        for i in range(40):
+            Stagiaire.objects.create(
+                organisme_formation=autre_of, tenant=autre_tenant, entreprise=autre_pme,
+                nom='Dupont', prenom=f"P{i}",
+            )
+        cls.stagiaire = Stagiaire.objects.create(
+            organisme_formation=cls.of, tenant=cls.tenant, entreprise=cls.pme,
+            nom='Dupont', prenom='Zoé', email='zoe.dupont@of-a.example.com',
+        )
+        cls.responsable = creer_utilisateur('resp', 'responsable_pme', cls.pme)
+
+    def test_client_pme_trouve_ses_stagiaires(self):
+        self.client.force_login(self.responsable)
+        response = self.client.get(reverse('api_recherche'), {'q': 'dupont', 'types': 'stagiaire', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['id'] for r in response.json()['resultats']['stagiaire']], [self.stagiaire.pk])
+
+    def test_filtrer_queryset_dans_le_perimetre(self):
+        stagiaires = scope_for_user(self.responsable).stagiaires()
+        self.assertEqual(list(filtrer_queryset(stagiaires, 'dupont', limit=2)), [self.stagiaire])
+
+
+class RecherchePerimetreTrigrammesTests(RecherchePerimetreTests):
+    """Mêmes cas avec l'index de repli (trigrammes, utilisé hors SQLite/FTS5)"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Actif dès setUpTestData : les signaux indexent alors en trigrammes
+        cls._fts = mock.patch('habilitations_app.search.fts_disponible', return_value=False)
+        cls._fts.start()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._fts.stop()
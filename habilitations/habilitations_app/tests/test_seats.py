@@ -0,0 +1,122 @@
+"""
+Compteur de places des sessions (SessionFormation.places_occupees)
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+from django.test import TestCase
+
+from ..models import DemandeStagiaire, Formation, PlacesInsuffisantes, SessionFormation, Stagiaire
+from ..services import SessionEnrolmentService
+from .fixtures import creer_habilitation, creer_session, creer_tenant, creer_utilisateur
+
+
+class SessionSeatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.of, cls.tenant, cls.pme = creer_tenant()
+        cls.admin = creer_utilisateur('admin', 'admin_of', cls.of, cls.tenant)
+        cls.habilitation = creer_habilitation('B1V')
+        cls.stagiaires = [
+            Stagiaire.objects.create(
+                organisme_formation=cls.of, tenant=cls.tenant, entreprise=cls.pme, nom=f"Nom{i}", prenom='Test',
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.session = creer_session(self.tenant, self.habilitation, self.admin, numero='S-1')
+        self.autre = creer_session(self.tenant, self.habilitation, self.admin, numero='S-2')
+
+    def _places(self, session):
+        return SessionFormation.objects.values_list('places_occupees', flat=True).get(pk=session.pk)
+
+    def _inscrire(self, stagiaire, session):
+        return Formation.objects.create(
+            stagiaire=stagiaire, habilitation=self.habilitation, tenant=self.tenant, session=session,
+            organisme_formation=self.of.nom, date_debut=session.date_debut, date_fin_prevue=session.date_fin,
+        )
+
+    def test_creation_et_suppression(self):
+        formation = self._inscrire(self.stagiaires[0], self.session)
+        self._inscrire(self.stagiaires[1], self.session)
+        self.assertEqual(self._places(self.session), 2)
+        formation.delete()
+        self.assertEqual(self._places(self.session), 1)
+
+    def test_modification_sans_changement_de_session(self):
+        formation = self._inscrire(self.stagiaires[0], self.session)
+        formation.notes = 'RAS'
+        formation.save()
+        self.assertEqual(self._places(self.session), 1)
+
+    def test_deplacement_entre_sessions(self):
+        formation = self._inscrire(self.stagiaires[0], self.session)
+        formation.session = self.autre
+        formation.save()
+        self.assertEqual((self._places(self.session), self._places(self.autre)), (0, 1))
+
+    def test_session_complete(self):
+        SessionFormation.objects.filter(pk=self.session.pk).update(nombre_places=1)
+        self._inscrire(self.stagiaires[0], self.session)
+        with self.assertRaises(PlacesInsuffisantes):
+            self._inscrire(self.stagiaires[1], self.session)
+        self.assertEqual(Formation.objects.filter(session=self.session).count(), 1)
+        self.assertEqual(self._places(self.session), 1)
+
+    def test_deplacement_vers_session_complete(self):
+        SessionFormation.objects.filter(pk=self.autre.pk).update(nombre_places=1)
+        self._inscrire(self.stagiaires[0], self.autre)
+        formation = self._inscrire(self.stagiaires[1], self.session)
+        formation.session = self.autre
+        with self.assertRaises(PlacesInsuffisantes):
+            formation.save()
+        self.assertEqual(Formation.objects.get(pk=formation.pk).session_id, self.session.pk)
+        self.assertEqual((self._places(self.session), self._places(self.autre)), (1, 1))
+
+    def test_inscription_en_lot(self):
+        SessionFormation.objects.filter(pk=self.session.pk).update(nombre_places=2)
+        demandes = [
+            DemandeStagiaire.objects.create(
+                tenant=self.tenant, nom=f"Demande{i}", prenom='Test', email=f"demande{i}@example.com",
+                telephone='0600000000', statut_professionnel='salarie', consentement_at=timezone.now(),
+            )
+            for i in range(3)
+        ]
+        results = SessionEnrolmentService(self.session, self.of, self.admin).enrol(demandes)
+        self.assertEqual([r.statut for r in results], ['inscrit', 'inscrit', 'complet'])
+        self.assertEqual(self._places(self.session), 2)
+
+    def test_inscription_en_lot_formation_existante(self):
+        ailleurs = self._inscrire(self.stagiaires[0], self.autre)
+        ici = self._inscrire(self.stagiaires[1], self.session)
+        demandes = [
+            DemandeStagiaire.objects.create(
+                tenant=self.tenant, nom=stagiaire.nom, prenom=stagiaire.prenom, email=f"demande{i}@example.com",
+                telephone='0600000000', statut_professionnel='salarie', consentement_at=timezone.now(),
+                stagiaire_existant=stagiaire,
+            )
+            for i, stagiaire in enumerate(self.stagiaires[:2])
+        ]
+        results = SessionEnrolmentService(self.session, self.of, self.admin).enrol(demandes)
+        self.assertEqual(
+            [(r.statut, r.formation_id) for r in results], [('ignoree', ailleurs.pk), ('deja_inscrit', ici.pk)],
+        )
+        # Formation dans une autre session : demande laissée en attente, aucune place consommée
+        self.assertEqual(
+            list(DemandeStagiaire.objects.order_by('pk').values_list('statut', flat=True)), ['en_attente', 'integree'],
+        )
+        self.assertEqual((self._places(self.session), self._places(self.autre)), (1, 1))
+
+    def test_reconciliation(self):
+        self._inscrire(self.stagiaires[0], self.session)
+        SessionFormation.objects.filter(pk=self.session.pk).update(places_occupees=5)
+
+        call_command('reconcile_session_seats', '--dry-run', stdout=StringIO())
+        self.assertEqual(self._places(self.session), 5)
+        out = StringIO()
+        call_command('reconcile_session_seats', stdout=out)
+        self.assertEqual(self._places(self.session), 1)
+        self.assertIn('1 écart(s) corrigé(s)', out.getvalue())
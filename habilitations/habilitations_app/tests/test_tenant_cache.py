@@ -0,0 +1,28 @@
+"""
+Cache hôte → tenant du middleware : taille bornée et compteurs exposés par api/perf/
+"""
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..middleware import invalidate_tenant_cache, tenant_cache_stats
+from .fixtures import creer_utilisateur
+
+
+@override_settings(ALLOWED_HOSTS=['*'], TENANT_CACHE_MAX_SIZE=5)
+class TenantCacheTests(TestCase):
+
+    def setUp(self):
+        invalidate_tenant_cache()
+
+    def test_taille_bornee(self):
+        for i in range(20):
+            self.client.get(reverse('login'), HTTP_HOST=f"hote-{i}.example.net")
+        stats = tenant_cache_stats()
+        self.assertEqual(stats['size'], 5)
+        self.assertGreaterEqual(stats['evictions'], 15)
+
+    def test_stats_exposees_aux_super_admins(self):
+        self.client.force_login(creer_utilisateur('sa', 'super_admin'))
+        response = self.client.get(reverse('api_perf'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tenant_cache']['max_size'], 5)
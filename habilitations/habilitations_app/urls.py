@@ -86,6 +86,13 @@ urlpatterns = [
     path('api/aggregats-of/', views.api_aggregats_of, name='api_aggregats_of'),
     path('api/demandes/<int:demande_id>/valider/', views.api_valider_demande, name='api_valider_demande'),
     path('api/titres/<int:titre_id>/pdf/', views.api_pdf_titre, name='api_pdf_titre'),
+    path('api/titres/pdf/', views.api_pdf_titres_batch, name='api_pdf_titres_batch'),
+    path('api/jobs/<int:job_id>/', views.api_job_status, name='api_job_status'),
+    path('api/jobs/<int:job_id>/resultat/', views.api_job_resultat, name='api_job_resultat'),
     path('api/type-formations/', views_api.api_type_formations, name='api_type_formations'),
     path('api/type-formations/<int:type_id>/specialisations/', views_api.api_type_formation_specialisations, name='api_type_formation_specialisations'),
+    path('api/formateurs-qualifies/', views_api.api_formateurs_qualifies, name='api_formateurs_qualifies'),
+    path('api/recherche/', views_api.api_recherche, name='api_recherche'),
+    path('api/autocomplete/<slug:source>/', views_api.api_autocomplete, name='api_autocomplete'),
+    path('api/perf/', views_api.api_perf, name='api_perf'),
 ]
@@ -1,21 +1,34 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
+from django.conf import settings
 from django.contrib import messages
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.urls import reverse_lazy
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Q, Count
+from django.urls import reverse, reverse_lazy
+from django.http import JsonResponse, HttpResponse, FileResponse
+from django.db.models import Count
 from datetime import timedelta
 from django.utils import timezone
-import csv
-import io
-from .services import formateurs_of
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from .services import (
+    SessionEnrolmentService, annotate_formateurs_competents, appliquer_validations, formateurs_of,
+    formation_stats, materialiser_competences, titre_stats,
+)
+from .services_import import import_stagiaires_csv
+from .services_pdf import (
+    TITRE_RELATED, get_cached_titre_pdf, render_titres_batch, titre_payload, titre_pdf_digest, titre_pdf_filename,
+    titres_for_batch,
+)
+from .jobs import enqueue_job
+from .pagination import KeysetPaginationMixin
+from .scopes import get_request_scope
+from .search import filtrer_queryset
 from .models import (
     Entreprise, Stagiaire, Formation, ValidationCompetence, 
     Titre, AvisFormation, RenouvellementHabilitation, Habilitation,
-    DemandeStagiaire, SessionFormation, ProfilUtilisateur
+    DemandeStagiaire, SessionFormation, ProfilUtilisateur, DemandeFormation, Job
 )
 from .forms import (
     StagiaireForm, FormationForm, ValidationCompetenceForm, 
@@ -94,16 +107,10 @@ def dashboard_client(request):
     
     entreprise = profil.entreprise
     
-    # Statistiques
+    # Statistiques : une requête agrégée par table
     stagiaires = Stagiaire.objects.filter(entreprise=entreprise).count()
-    formations_en_cours = Formation.objects.filter(
-        stagiaire__entreprise=entreprise,
-        statut='en_cours'
-    ).count()
-    titres_valides = Titre.objects.filter(
-        stagiaire__entreprise=entreprise,
-        statut='delivre'
-    ).count()
+    formations = formation_stats(Formation.objects.filter(stagiaire__entreprise=entreprise))
+    titres = titre_stats(Titre.objects.filter(stagiaire__entreprise=entreprise))
     
     # Alertes
     titres_expiration_proche = Titre.objects.filter(
@@ -111,18 +118,18 @@ def dashboard_client(request):
         statut='delivre',
         date_expiration__lte=timezone.now().date() + timedelta(days=90),
         date_expiration__gte=timezone.now().date()
-    )
+    ).select_related('stagiaire', 'habilitation')
     
     formations_completees_recentes = Formation.objects.filter(
         stagiaire__entreprise=entreprise,
         statut='completee',
         date_fin_reelle__isnull=False
-    ).order_by('-date_fin_reelle')[:5]
+    ).select_related('stagiaire', 'habilitation').order_by('-date_fin_reelle')[:5]
     
     context = {
         'stagiaires': stagiaires,
-        'formations_en_cours': formations_en_cours,
-        'titres_valides': titres_valides,
+        'formations_en_cours': formations['en_cours'],
+        'titres_valides': titres['delivres'],
         'titres_expiration_proche': titres_expiration_proche,
         'formations_recentes': formations_completees_recentes,
     }
@@ -140,25 +147,26 @@ def dashboard_of(request):
     
     entreprise = profil.entreprise
     
-    # Statistiques pour l'OF
-    sessions_en_cours = SessionFormation.objects.filter(
-        organisme_formation=entreprise.nom,
-        statut='en_cours'
-    ).count()
+    tenant = getattr(profil, 'tenant', None)
+    sessions = SessionFormation.objects.all()
+    demandes = DemandeStagiaire.objects.all()
+    if tenant:
+        sessions = sessions.filter(tenant=tenant)
+        demandes = demandes.filter(tenant=tenant)
+    
+    # Statistiques pour l'OF : une requête par table
+    sessions_en_cours = sessions.filter(statut='en_cours').count()
     
     formations_en_attente = Formation.objects.filter(
         organisme_formation=entreprise.nom,
-        statut='completee'
-    ).exclude(avis__isnull=False).count()
-    
-    demandes_en_attente = DemandeStagiaire.objects.filter(
-        statut='en_attente'
+        statut='completee',
+        avis__isnull=True
     ).count()
     
+    demandes_en_attente = demandes.filter(statut='en_attente').count()
+    
     # Récentes actions
-    sessions_recentes = SessionFormation.objects.filter(
-        organisme_formation=entreprise.nom
-    ).order_by('-date_debut')[:5]
+    sessions_recentes = sessions.select_related('habilitation').order_by('-date_debut')[:5]
     
     context = {
         'sessions_en_cours': sessions_en_cours,
@@ -170,26 +178,42 @@ def dashboard_of(request):
     return render(request, 'habilitations_app/dashboard_of.html', context)
 
 
-class StagiaireListView(LoginRequiredMixin, ListView):
+class FetchPlanMixin:
+    """Plan de chargement déclaré d'une vue de liste.
+
+    ``list_select_related`` / ``list_prefetch_related`` couvrent toutes les relations
+    parcourues par le template : le nombre de requêtes d'une page ne dépend plus
+    du nombre de lignes affichées.
+    """
+    list_select_related = ()
+    list_prefetch_related = ()
+
+    def fetch_plan(self, queryset):
+        if self.list_select_related:
+            queryset = queryset.select_related(*self.list_select_related)
+        if self.list_prefetch_related:
+            queryset = queryset.prefetch_related(*self.list_prefetch_related)
+        return queryset
+
+
+class StagiaireListView(LoginRequiredMixin, FetchPlanMixin, KeysetPaginationMixin, ListView):
     """Liste des stagiaires"""
     model = Stagiaire
     template_name = 'habilitations_app/stagiaire_list.html'
     context_object_name = 'stagiaires'
     paginate_by = 20
+    keyset_ordering = ('nom', 'prenom', 'id')
+    list_select_related = ('entreprise',)
     
     def get_queryset(self):
-        queryset = Stagiaire.objects.filter(
-            entreprise=self.request.user.profil.entreprise
-        )
+        scope = get_request_scope(self.request)
+        queryset = scope.stagiaires()
         search = self.request.GET.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(nom__icontains=search) |
-                Q(prenom__icontains=search) |
-                Q(email__icontains=search) |
-                Q(poste__icontains=search)
-            )
-        return queryset.order_by('nom', 'prenom')
+            # Index plein texte : préfixes, sans accents ni casse (voir search.py)
+            tenant_id = scope.principal.tenant_id if scope.is_of_staff else None
+            queryset = filtrer_queryset(queryset, search, tenant_id=tenant_id)
+        return self.fetch_plan(queryset)
 
 
 class StagiaireDetailView(LoginRequiredMixin, DetailView):
@@ -199,11 +223,7 @@ class StagiaireDetailView(LoginRequiredMixin, DetailView):
     context_object_name = 'stagiaire'
     
     def get_object(self):
-        return get_object_or_404(
-            Stagiaire,
-            pk=self.kwargs['pk'],
-            entreprise=self.request.user.profil.entreprise
-        )
+        return get_object_or_404(get_request_scope(self.request).stagiaires(), pk=self.kwargs['pk'])
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -249,30 +269,21 @@ class StagiaireUpdateView(LoginRequiredMixin, UpdateView):
         return reverse_lazy('stagiaire_detail', kwargs={'pk': self.object.pk})
 
 
-class FormationListView(LoginRequiredMixin, ListView):
+class FormationListView(LoginRequiredMixin, FetchPlanMixin, KeysetPaginationMixin, ListView):
     """Liste des formations"""
     model = Formation
     template_name = 'habilitations_app/formation_list.html'
     context_object_name = 'formations'
     paginate_by = 20
+    keyset_ordering = ('-date_debut', 'id')
+    list_select_related = ('stagiaire', 'habilitation')
     
     def get_queryset(self):
-        profil = self.request.user.profil
-
-        if profil.est_formateur:
-            queryset = Formation.objects.filter(session__formateur=self.request.user)
-        elif profil.est_of:
-            tenant = getattr(profil, 'tenant', None)
-            queryset = Formation.objects.all()
-            if tenant:
-                queryset = queryset.filter(tenant=tenant)
-        else:
-            queryset = Formation.objects.filter(stagiaire__entreprise=profil.entreprise)
-
+        queryset = get_request_scope(self.request).formations()
         statut = self.request.GET.get('statut')
         if statut:
             queryset = queryset.filter(statut=statut)
-        return queryset.order_by('-date_debut')
+        return self.fetch_plan(queryset)
 
 
 class FormationDetailView(LoginRequiredMixin, DetailView):
@@ -282,25 +293,7 @@ class FormationDetailView(LoginRequiredMixin, DetailView):
     context_object_name = 'formation'
     
     def get_object(self):
-        profil = self.request.user.profil
-        if profil.est_formateur:
-            return get_object_or_404(
-                Formation,
-                pk=self.kwargs['pk'],
-                session__formateur=self.request.user
-            )
-        if profil.est_of:
-            tenant = getattr(profil, 'tenant', None)
-            qs = Formation.objects.all()
-            if tenant:
-                qs = qs.filter(tenant=tenant)
-            return get_object_or_404(qs, pk=self.kwargs['pk'])
-
-        return get_object_or_404(
-            Formation,
-            pk=self.kwargs['pk'],
-            stagiaire__entreprise=self.request.user.profil.entreprise
-        )
+        return get_object_or_404(get_request_scope(self.request).formations(), pk=self.kwargs['pk'])
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -361,6 +354,11 @@ class FormationUpdateView(LoginRequiredMixin, UpdateView):
         return reverse_lazy('formation_detail', kwargs={'pk': self.object.pk})
 
 
+def _int_list(values):
+    """Identifiants entiers d'une liste POST (valeurs invalides ignorées)"""
+    return [int(v) for v in values if str(v).isdigit()]
+
+
 @login_required
 def valider_competences(request, formation_id):
     """Valider les compétences d'une formation"""
@@ -384,48 +382,25 @@ def valider_competences(request, formation_id):
             stagiaire__entreprise=profil.entreprise
         )
     
-    # Créer les validations de compétences si elles n'existent pas
-    habilitation = formation.habilitation
-    savoirs = [s.strip() for s in habilitation.savoirs.split('\n') if s.strip()]
-    savoirs_faire = [sf.strip() for sf in habilitation.savoirs_faire.split('\n') if sf.strip()]
-    
-    validations = []
-    for savoir in savoirs:
-        val, created = ValidationCompetence.objects.get_or_create(
-            formation=formation,
-            titre_competence=savoir,
-            defaults={'type_competence': 'savoir', 'tenant': formation.tenant}
-        )
-        validations.append(val)
-    
-    for sf in savoirs_faire:
-        val, created = ValidationCompetence.objects.get_or_create(
-            formation=formation,
-            titre_competence=sf,
-            defaults={'type_competence': 'savoir_faire', 'tenant': formation.tenant}
-        )
-        validations.append(val)
-    
+    # Checklist matérialisée à la création de la formation ; formations antérieures : au premier accès
+    validations = list(ValidationCompetence.objects.filter(formation=formation))
+    if not validations:
+        materialiser_competences([formation])
+        validations = list(ValidationCompetence.objects.filter(formation=formation))
+
     if request.method == 'POST':
-        for validation_id in request.POST.getlist('validations'):
-            try:
-                validation = ValidationCompetence.objects.get(
-                    pk=validation_id,
-                    formation=formation
-                )
-                validation.valide = validation_id in request.POST.getlist('validations_check')
-                validation.validateur = request.user
-                validation.date_validation = timezone.now()
-                validation.save()
-            except ValidationCompetence.DoesNotExist:
-                pass
-        
+        appliquer_validations(
+            formation,
+            _int_list(request.POST.getlist('validations')),
+            _int_list(request.POST.getlist('validations_check')),
+            request.user,
+        )
         messages.success(request, 'Compétences validées avec succès.')
         return redirect('formation_detail', pk=formation_id)
-    
+
     context = {
         'formation': formation,
-        'validations': ValidationCompetence.objects.filter(formation=formation),
+        'validations': validations,
     }
     
     return render(request, 'habilitations_app/valider_competences.html', context)
@@ -534,50 +509,30 @@ def delivrer_titre(request, formation_id):
     return render(request, 'habilitations_app/titre_form.html', context)
 
 
-class TitreListView(LoginRequiredMixin, ListView):
+class TitreListView(LoginRequiredMixin, FetchPlanMixin, KeysetPaginationMixin, ListView):
     """Liste des titres d'habilitation"""
     model = Titre
     template_name = 'habilitations_app/titre_list.html'
     context_object_name = 'titres'
     paginate_by = 20
+    keyset_ordering = ('-date_delivrance', 'id')
+    list_select_related = ('stagiaire', 'habilitation', 'specialisation')
     
     def get_queryset(self):
-        profil = self.request.user.profil
-        if profil.est_formateur:
-            return Titre.objects.filter(
-                formation__session__formateur=self.request.user
-            ).order_by('-date_delivrance')
-        if profil.est_of:
-            qs = Titre.objects.all()
-            if getattr(profil, 'tenant', None):
-                qs = qs.filter(tenant=profil.tenant)
-            return qs.order_by('-date_delivrance')
-        return Titre.objects.filter(
-            stagiaire__entreprise=profil.entreprise
-        ).order_by('-date_delivrance')
+        return self.fetch_plan(get_request_scope(self.request).titres())
 
 
-class RenouvellementListView(LoginRequiredMixin, ListView):
+class RenouvellementListView(LoginRequiredMixin, FetchPlanMixin, KeysetPaginationMixin, ListView):
     """Liste des renouvellements"""
     model = RenouvellementHabilitation
     template_name = 'habilitations_app/renouvellement_list.html'
     context_object_name = 'renouvellements'
     paginate_by = 20
+    keyset_ordering = ('date_renouvellement_prevue', 'id')
+    list_select_related = ('titre_precedent__stagiaire',)
     
     def get_queryset(self):
-        profil = self.request.user.profil
-        if profil.est_formateur:
-            return RenouvellementHabilitation.objects.filter(
-                titre_precedent__formation__session__formateur=self.request.user
-            ).order_by('date_renouvellement_prevue')
-        if profil.est_of:
-            qs = RenouvellementHabilitation.objects.all()
-            if getattr(profil, 'tenant', None):
-                qs = qs.filter(tenant=profil.tenant)
-            return qs.order_by('date_renouvellement_prevue')
-        return RenouvellementHabilitation.objects.filter(
-            titre_precedent__stagiaire__entreprise=profil.entreprise
-        ).order_by('date_renouvellement_prevue')
+        return self.fetch_plan(get_request_scope(self.request).renouvellements())
 
 
 @login_required
@@ -723,9 +678,9 @@ def liste_sessions_formation(request):
         messages.error(request, "Accès réservé aux organismes de formation.")
         return redirect('home')
 
-    sessions = SessionFormation.objects.all().order_by('-date_debut')
-    if getattr(profil, 'tenant', None):
-        sessions = sessions.filter(tenant=profil.tenant)
+    sessions = annotate_formateurs_competents(
+        get_request_scope(request).sessions().select_related('habilitation')
+    ).order_by('-date_debut')
     
     # Filtres
     statut = request.GET.get('statut')
@@ -809,50 +764,16 @@ def detail_session_formation(request, pk):
     if request.method == 'POST' and 'assigner_demandes' in request.POST:
         form = AssignerDemandeForm(request.POST, habilitation=session.habilitation)
         if form.is_valid():
-            demandes_selectionnees = form.cleaned_data['demandes']
-            for demande in demandes_selectionnees:
-                if session.places_restantes > 0:
-                    # Créer le stagiaire
-                    stagiaire, created = Stagiaire.objects.get_or_create(
-                        email=demande.email,
-                        defaults={
-                            'entreprise': demande.entreprise,
-                            'organisme_formation': profil.entreprise,
-                            'tenant': session.tenant or getattr(profil, 'tenant', None),
-                            'nom': demande.nom,
-                            'prenom': demande.prenom,
-                            'telephone': demande.telephone,
-                            'poste': demande.poste,
-                            'date_embauche': demande.date_embauche,
-                        }
-                    )
-                    
-                    # Créer la formation
-                    formation, created = Formation.objects.get_or_create(
-                        stagiaire=stagiaire,
-                        habilitation=session.habilitation,
-                        defaults={
-                            'session': session,
-                            'date_debut': session.date_debut,
-                            'date_fin_prevue': session.date_fin,
-                            'numero_session': session.numero_session,
-                            'organisme_formation': session.organisme_formation,
-                            'tenant': session.tenant or getattr(profil, 'tenant', None),
-                        }
-                    )
-                    
-                    # Mettre à jour la demande
-                    demande.statut = 'integree'
-                    demande.session_assignee = session
-                    demande.stagiaire_cree = stagiaire
-                    demande.date_traitement = timezone.now()
-                    demande.traite_par = request.user
-                    demande.save()
-                else:
-                    messages.warning(request, f"Session complète. Impossible d'ajouter {demande.nom_complet}.")
-                    break
-            
-            messages.success(request, f"{len(demandes_selectionnees)} stagiaire(s) intégré(s) à la session.")
+            service = SessionEnrolmentService(
+                session, organisme_formation=profil.entreprise, user=request.user,
+                tenant=getattr(profil, 'tenant', None),
+            )
+            results = service.enrol(form.cleaned_data['demandes'])
+            for result in results:
+                if not result.ok:
+                    messages.warning(request, result.message)
+            inscrits = sum(1 for result in results if result.ok)
+            messages.success(request, f"{inscrits} stagiaire(s) intégré(s) à la session.")
             return redirect('detail_session_formation', pk=pk)
     else:
         form = AssignerDemandeForm(habilitation=session.habilitation)
@@ -905,7 +826,7 @@ def liste_demandes_admin(request):
 
 @login_required
 def api_import_csv(request):
-    """Import CSV stagiaires + demandes (dry-run support)"""
+    """Import CSV stagiaires + demandes (dry-run support), traité en flux par lots"""
     profil = request.user.profil
     if not (profil.est_admin_of or profil.est_secretariat or profil.est_super_admin):
         return JsonResponse({'error': 'Accès refusé'}, status=403)
@@ -917,66 +838,24 @@ def api_import_csv(request):
     uploaded = request.FILES['file']
     dry_run = request.POST.get('dry_run', 'true') == 'true'
 
-    data = uploaded.read().decode('utf-8')
-    reader = csv.DictReader(io.StringIO(data))
-
-    created_stagiaires = 0
-    created_demandes = 0
-    errors = []
-
-    for idx, row in enumerate(reader, start=1):
-        try:
-            entreprise_nom = row.get('entreprise')
-            email = row.get('email')
-            if not entreprise_nom or not email:
-                errors.append(f"Ligne {idx}: entreprise ou email manquant")
-                continue
-
-            entreprise, _ = Entreprise.objects.get_or_create(
-                nom=entreprise_nom,
-                defaults={'type_entreprise': 'client', 'email': 'na@example.com', 'telephone': '', 'adresse': '', 'code_postal': '', 'ville': '', 'tenant': tenant}
-            )
-
-            if not dry_run:
-                stagiaire, created = Stagiaire.objects.get_or_create(
-                    email=email,
-                    defaults={
-                        'nom': row.get('nom', ''),
-                        'prenom': row.get('prenom', ''),
-                        'entreprise': entreprise,
-                        'organisme_formation': profil.entreprise,
-                        'tenant': tenant,
-                    }
-                )
-                if created:
-                    created_stagiaires += 1
-
-                hab_code = row.get('habilitation_code')
-                if hab_code:
-                    try:
-                        hab = Habilitation.objects.get(code=hab_code)
-                        demande = DemandeFormation.objects.create(
-                            entreprise_demandeuse=entreprise,
-                            organisme_formation=profil.entreprise,
-                            tenant=tenant,
-                            habilitation=hab,
-                            statut='en_attente',
-                            demandeur=request.user,
-                            consentement_at=timezone.now(),
-                        )
-                        demande.stagiaires.add(stagiaire)
-                        created_demandes += 1
-                    except Habilitation.DoesNotExist:
-                        errors.append(f"Ligne {idx}: habilitation {hab_code} inconnue")
-        except Exception as exc:
-            errors.append(f"Ligne {idx}: {exc}")
-
-    return JsonResponse({
-        'dry_run': dry_run,
-        'created_stagiaires': created_stagiaires,
-        'created_demandes': created_demandes,
-        'errors': errors,
-    })
+    if request.POST.get('async') == 'true':
+        job = enqueue_job(
+            'import_csv',
+            parametres={'organisme_formation_id': profil.entreprise_id, 'dry_run': dry_run},
+            user=request.user,
+            tenant=tenant,
+            fichier=uploaded,
+        )
+        return _job_accepted(job)
+
+    result = import_stagiaires_csv(
+        uploaded,
+        organisme_formation=profil.entreprise,
+        tenant=tenant,
+        user=request.user,
+        dry_run=dry_run,
+    )
+    return JsonResponse(result)
 
 
 @login_required
@@ -1037,7 +916,7 @@ def api_pdf_titre(request, titre_id):
     """Génération rapide d'un PDF de titre"""
     profil = request.user.profil
     try:
-        titre = Titre.objects.get(pk=titre_id)
+        titre = Titre.objects.select_related(*TITRE_RELATED).get(pk=titre_id)
     except Titre.DoesNotExist:
         return JsonResponse({'error': 'Titre introuvable'}, status=404)
 
@@ -1049,27 +928,123 @@ def api_pdf_titre(request, titre_id):
     if profil.est_responsable_pme and titre.stagiaire.entreprise != profil.entreprise:
         return JsonResponse({'error': 'Titre hors entreprise'}, status=403)
 
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-    except Exception:
-        # Fallback texte
-        content = f"Titre {titre.numero_titre} - {titre.stagiaire.nom_complet}"
-        return HttpResponse(content, content_type='application/pdf')
-
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    p.setTitle(f"Titre {titre.numero_titre}")
-    p.drawString(50, 800, f"Titre d'habilitation {titre.numero_titre}")
-    p.drawString(50, 780, f"Stagiaire: {titre.stagiaire.nom_complet}")
-    p.drawString(50, 760, f"Habilitation: {titre.habilitation.code} - {titre.habilitation.nom}")
-    p.drawString(50, 740, f"Délivré le: {titre.date_delivrance}")
-    p.drawString(50, 720, f"Expire le: {titre.date_expiration}")
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-
-    response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-    response['Content-Disposition'] = f"attachment; filename=titre-{titre.numero_titre}.pdf"
+    if request.GET.get('async') == 'true':
+        job = enqueue_job(
+            'pdf_titre',
+            parametres={'titre_id': titre.pk},
+            user=request.user,
+            tenant=titre.tenant,
+        )
+        return _job_accepted(job)
+
+    # Empreinte calculée sans rendu : un client à jour reçoit son 304 même si le cache disque a été purgé
+    payload = titre_payload(titre)
+    etag = quote_etag(titre_pdf_digest(titre, payload))
+    last_modified = int(titre.date_modification.timestamp()) if titre.date_modification else None
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    fichier, _ = get_cached_titre_pdf(titre, payload)
+    response = FileResponse(fichier, as_attachment=True,
+                            filename=titre_pdf_filename(titre), content_type='application/pdf')
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
     return response
 
+
+@login_required
+def api_pdf_titres_batch(request):
+    """PDF de tous les titres d'une session (ou du tenant) : ZIP ou PDF multi-pages"""
+    profil = request.user.profil
+    if not (profil.est_super_admin or profil.est_admin_of or profil.est_secretariat):
+        return JsonResponse({'error': 'Accès refusé'}, status=403)
+
+    output = request.GET.get('format', 'zip')
+    if output not in ('zip', 'pdf'):
+        return JsonResponse({'error': 'Format invalide (zip ou pdf)'}, status=400)
+
+    tenant = getattr(profil, 'tenant', None)
+    # Le périmètre d'un admin OF / secrétariat sans tenant n'est pas restreint : refus explicite
+    if tenant is None and not profil.est_super_admin:
+        return JsonResponse({'error': 'Aucun tenant associé'}, status=403)
+    session = None
+    if request.GET.get('session'):
+        session = get_request_scope(request).sessions().filter(pk=request.GET['session']).first()
+        if session is None:
+            return JsonResponse({'error': 'Session introuvable'}, status=404)
+    elif tenant is None:
+        return JsonResponse({'error': 'Paramètre session requis'}, status=400)
+
+    titres = titres_for_batch(session=session, tenant=tenant)
+    # Au-delà du seuil, rendu en job de fond : pas de pool de processus dans un worker web
+    if request.GET.get('async') == 'true' or titres.count() > getattr(settings, 'PDF_BATCH_SYNC_MAX', 50):
+        job = enqueue_job(
+            'pdf_titres_batch',
+            parametres={'session_id': session.pk if session else None, 'format': output},
+            user=request.user,
+            tenant=tenant,
+        )
+        return _job_accepted(job)
+
+    filename, content, _ = render_titres_batch(titres, output=output, workers=1)
+    content_type = 'application/zip' if output == 'zip' else 'application/pdf'
+    response = HttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f"attachment; filename={filename}"
+    return response
+
+
+def _job_accepted(job):
+    """Réponse 202 pour un job mis en file : l'appelant interroge status_url"""
+    return JsonResponse({
+        'job_id': job.pk,
+        'statut': job.statut,
+        'status_url': reverse('api_job_status', args=[job.pk]),
+    }, status=202)
+
+
+def _get_job_for_user(request, job_id):
+    """Job visible par l'utilisateur (créateur ou super admin), sinon None"""
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None:
+        return None
+    if job.cree_par_id != request.user.pk and not (request.user.is_superuser or request.user.profil.est_super_admin):
+        return None
+    return job
+
+
+@login_required
+def api_job_status(request, job_id):
+    """Suivi d'un job de fond (statut, progression, résultat)"""
+    job = _get_job_for_user(request, job_id)
+    if job is None:
+        return JsonResponse({'error': 'Job introuvable'}, status=404)
+
+    data = {
+        'job_id': job.pk,
+        'type_job': job.type_job,
+        'statut': job.statut,
+        'progression': job.progression,
+        'progression_total': job.progression_total,
+        'resultat': job.resultat,
+        'erreur': job.erreur.split('\n', 1)[0] if job.erreur else '',
+        'date_creation': job.date_creation.isoformat(),
+        'date_fin': job.date_fin.isoformat() if job.date_fin else None,
+    }
+    if job.fichier_resultat:
+        data['resultat_url'] = reverse('api_job_resultat', args=[job.pk])
+    return JsonResponse(data)
+
+
+@login_required
+def api_job_resultat(request, job_id):
+    """Téléchargement du fichier produit par un job terminé"""
+    job = _get_job_for_user(request, job_id)
+    if job is None or job.statut != 'termine' or not job.fichier_resultat:
+        return JsonResponse({'error': 'Résultat indisponible'}, status=404)
+    return FileResponse(
+        job.fichier_resultat.open('rb'),
+        as_attachment=True,
+        filename=job.fichier_resultat.name.rsplit('/', 1)[-1],
+    )
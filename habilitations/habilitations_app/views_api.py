@@ -4,44 +4,22 @@ API AJAX pour le catalogue de formations
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from .models import TypeFormation, Specialisation
+from django.views.decorators.http import condition
+from django.utils.dateparse import parse_date
+from .catalogue import catalogue_etag, catalogue_response
+from .models import ProfilUtilisateur, TypeFormation, Specialisation
+from .services import formateurs_of, formateurs_qualifies
 
 
 @login_required
+@condition(etag_func=lambda request: catalogue_etag(request, 'types'))
 def api_type_formations(request):
-    """Retourne tous les types de formations avec leurs spécialisations (AJAX)"""
-    profil = request.user.profil
-    tenant = profil.tenant
-    
-    # Formations globales + formations custom de cet OF
-    types = TypeFormation.objects.filter(
-        Q(created_by_tenant__isnull=True) |  # Globales
-        Q(created_by_tenant=tenant)           # Custom de cet OF
-    )
-    
-    data = {
-        'types': [
-            {
-                'id': t.id,
-                'nom': t.nom,
-                'code': t.code,
-                'is_custom': t.created_by_tenant is not None,
-                'spécialisations': [
-                    {
-                        'id': s.id,
-                        'code': s.code,
-                        'nom': s.nom
-                    }
-                    for s in t.specialisations.all()
-                ]
-            }
-            for t in types
-        ],
-        # NOUVEAU : Option "Autre"
-        'allow_custom': True
-    }
-    return JsonResponse(data)
+    """Retourne tous les types de formations avec leurs spécialisations (AJAX)
+
+    Formations globales + formations custom du tenant ; réponse en cache par
+    version du catalogue, 304 si l'ETag du client est à jour (voir catalogue.py)
+    """
+    return catalogue_response(request, 'types')
 
 
 @login_required
@@ -69,3 +47,153 @@ def api_type_formation_specialisations(request, type_id):
     }
     return JsonResponse(data)
 
+
+@login_required
+def api_formateurs_qualifies(request):
+    """Formateurs de l'OF couvrant toutes les spécialisations demandées (AJAX)
+
+    ?specialisations=1&specialisations=2 (ou ?specialisations=1,2)
+    &date_debut=AAAA-MM-JJ&date_fin=AAAA-MM-JJ : seulement les formateurs libres sur la période
+    &session=<id> : session en cours d'édition, ignorée dans les conflits
+    """
+    profil = request.user.profil
+    if not (profil.est_admin_of or profil.est_secretariat or profil.est_super_admin):
+        return JsonResponse({'error': 'Accès refusé'}, status=403)
+
+    raw = request.GET.getlist('specialisations')
+    try:
+        spec_ids = {int(v) for item in raw for v in item.split(',') if v}
+    except ValueError:
+        return JsonResponse({'error': 'Identifiants de spécialisations invalides'}, status=400)
+
+    try:
+        date_debut = parse_date(request.GET.get('date_debut', ''))
+        date_fin = parse_date(request.GET.get('date_fin', ''))
+        session_id = int(request.GET['session']) if request.GET.get('session') else None
+    except ValueError:
+        return JsonResponse({'error': 'Période ou session invalide'}, status=400)
+
+    # Super admin : tous les formateurs ; sinon ceux de l'OF, à défaut du tenant, sinon aucun
+    of = profil.entreprise if profil.entreprise_id and not profil.est_super_admin else None
+    if profil.est_super_admin:
+        base = None
+    elif of:
+        base = formateurs_of(of)
+    elif profil.tenant_id:
+        base = ProfilUtilisateur.objects.filter(role='formateur', actif=True, tenant_id=profil.tenant_id)
+    else:
+        base = ProfilUtilisateur.objects.none()
+    formateurs = formateurs_qualifies(spec_ids, queryset=base).select_related('user')
+
+    if date_debut and date_fin:
+        from .planning import conflits_formateurs, get_planning
+        if of:
+            formateurs = formateurs.filter(pk__in=get_planning(of).formateurs_disponibles_ids(
+                date_debut, date_fin, exclude_session_id=session_id
+            ))
+        else:
+            formateurs = list(formateurs)
+            occupes = conflits_formateurs(formateurs, date_debut, date_fin, exclude_session_id=session_id)
+            formateurs = [f for f in formateurs if f not in occupes]
+
+    data = {
+        'specialisations': sorted(spec_ids),
+        'formateurs': [
+            {
+                'id': f.id,
+                'nom': f.user.get_full_name() or f.user.username,
+                'email': f.user.email,
+            }
+            for f in formateurs
+        ]
+    }
+    return JsonResponse(data)
+
+
+@login_required
+def api_recherche(request):
+    """Recherche plein texte dans le périmètre de l'utilisateur (AJAX)
+
+    ?q=<texte>&types=stagiaire,entreprise,titre,session&limit=20
+    Résultats groupés par type, meilleurs d'abord
+    """
+    from .scopes import get_request_scope
+    from .search import INDEXED, rechercher
+
+    query = request.GET.get('q', '').strip()
+    types = [t for item in request.GET.getlist('types') for t in item.split(',') if t]
+    if any(t not in INDEXED for t in types):
+        return JsonResponse({'error': 'Type de recherche inconnu'}, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'Limite invalide'}, status=400)
+    resultats = {t: [] for t in types or INDEXED}
+    if len(query) < 2:
+        return JsonResponse({'q': query, 'resultats': resultats})
+
+    scope = get_request_scope(request)
+    tenant_id = scope.principal.tenant_id if scope.is_of_staff else None
+    querysets = {
+        'stagiaire': scope.stagiaires,
+        'entreprise': scope.entreprises,
+        'titre': scope.titres,
+        'session': scope.sessions,
+    }
+    # Périmètre appliqué dans la recherche : la limite porte sur les seuls objets visibles
+    perimetre = None if scope.is_global else {t: querysets[t]() for t in resultats}
+    for type_objet in resultats:
+        resultats[type_objet] = [
+            {'id': r.objet_id, 'libelle': r.libelle, 'score': round(r.score, 3)}
+            for r in rechercher(query, tenant_id=tenant_id, types=[type_objet], limit=limit, perimetre=perimetre)
+        ]
+    return JsonResponse({'q': query, 'resultats': resultats})
+
+
+@login_required
+def api_autocomplete(request, source):
+    """Suggestions pour les champs de sélection chargés à la demande (AJAX)
+
+    ?q=<début de saisie>&limit=20 → {'results': [{'id', 'text'}]}
+    """
+    from .autocomplete import SOURCES, autocomplete
+    from .scopes import get_request_scope
+
+    if source not in SOURCES:
+        return JsonResponse({'error': 'Source inconnue'}, status=404)
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+    except ValueError:
+        return JsonResponse({'error': 'Limite invalide'}, status=400)
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'results': []})
+    return JsonResponse({'results': autocomplete(source, get_request_scope(request), query, limit)})
+
+
+@login_required
+def api_perf(request):
+    """Synthèse du profilage des vues par URL et tenant (super admin, JSON)
+
+    Inclut les compteurs du cache hôte → tenant (middleware.tenant_cache_stats).
+    ?sort=queries|total|sql ; ?raw=1 ajoute les derniers enregistrements bruts
+    """
+    from django.conf import settings
+    from .middleware import tenant_cache_stats
+    from .profiling import get_records, summarize
+
+    if not request.user.profil.est_super_admin:
+        return JsonResponse({'error': 'Accès refusé'}, status=403)
+    sort = request.GET.get('sort', 'queries')
+    if sort not in ('queries', 'total', 'sql'):
+        return JsonResponse({'error': 'Tri invalide'}, status=400)
+    records = get_records()
+    data = {
+        'enabled': getattr(settings, 'PROFILING_ENABLED', False),
+        'records': len(records),
+        'views': summarize(records, sort=sort),
+        'tenant_cache': tenant_cache_stats(),
+    }
+    if request.GET.get('raw'):
+        data['raw'] = records[-200:]
+    return JsonResponse(data)
@@ -6,9 +6,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_POST
 from django.db import transaction
 
+from .catalogue import catalogue_etag, catalogue_response
 from .decorators import role_required
 from .models import TenantFormation, TypeFormation, Specialisation, Tenant
 from .forms_catalogue import TenantFormationForm
@@ -16,30 +17,13 @@ from .forms_catalogue import TenantFormationForm
 
 @login_required
 @role_required(['admin_of', 'secretariat'])
+@condition(etag_func=lambda request: catalogue_etag(request, 'catalogue'))
 def catalogue_formations_list(request):
-    """Récupère le catalogue de formations pour l'OF courant (AJAX)"""
-    profil = request.user.profil
-    tenant = profil.tenant
-    
-    if not tenant:
+    """Récupère le catalogue de formations pour l'OF courant (AJAX, en cache par version du catalogue)"""
+    if not request.user.profil.tenant_id:
         return JsonResponse({'error': 'Tenant non trouvé'}, status=400)
-    
-    formations = TenantFormation.objects.filter(tenant=tenant).select_related('type_formation')
-    
-    data = {
-        'formations': [
-            {
-                'id': f.id,
-                'nom': f.type_formation.nom,
-                'code': f.type_formation.code,
-                'actif': f.actif,
-                'specialisations': list(f.spécialisations.values_list('code', flat=True)),
-                'date_activation': f.date_activation.strftime('%d/%m/%Y'),
-            }
-            for f in formations
-        ]
-    }
-    return JsonResponse(data)
+
+    return catalogue_response(request, 'catalogue')
 
 
 @login_required
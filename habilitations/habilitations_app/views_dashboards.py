@@ -7,17 +7,17 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Count, Q
+from django.db.models import Count, Exists, OuterRef, Q
 from .models import (
     Entreprise, Stagiaire, Formation, Titre, SessionFormation, 
     DemandeFormation, Habilitation
 )
 from .decorators import role_required
-from .middleware import (
-    get_accessible_stagiaires, 
-    get_accessible_entreprises,
-    get_accessible_demandes_formation
+from .services import (
+    compute_dashboard_counters, get_tenant_dashboard_stats,
+    count_by, formation_stats, titre_stats, demande_stats
 )
+from .scopes import get_request_scope
 
 
 @login_required
@@ -25,23 +25,30 @@ from .middleware import (
 def dashboard_super_admin(request):
     """Tableau de bord Super Admin - Vue globale de la plateforme"""
     
-    # Statistiques globales
-    total_of = Entreprise.objects.filter(type_entreprise='of').count()
-    total_pme = Entreprise.objects.filter(type_entreprise='client').count()
+    # Statistiques globales : une requête agrégée par table
+    entreprises = count_by(
+        Entreprise.objects.all(),
+        total_of=Q(type_entreprise='of'),
+        total_pme=Q(type_entreprise='client'),
+        # OF actifs (ayant des formations récentes)
+        of_actifs=Q(type_entreprise='of') & Q(Exists(Formation.objects.filter(
+            stagiaire__organisme_formation=OuterRef('pk'),
+            date_creation__gte=timezone.now() - timedelta(days=90)
+        ))),
+    )
+    total_of = entreprises['total_of']
+    total_pme = entreprises['total_pme']
+    of_actifs = entreprises['of_actifs']
     total_stagiaires = Stagiaire.objects.count()
     total_formations = Formation.objects.count()
     
-    # OF actifs (ayant des sessions récentes)
-    of_actifs = Entreprise.objects.filter(
-        type_entreprise='of',
-        stagiaires_of__formations__date_creation__gte=timezone.now() - timedelta(days=90)
-    ).distinct().count()
-    
     # Derniers OF créés
     derniers_of = Entreprise.objects.filter(type_entreprise='of').order_by('-date_creation')[:5]
     
     # Demandes de formation récentes
-    demandes_recentes = DemandeFormation.objects.all().order_by('-date_demande')[:10]
+    demandes_recentes = DemandeFormation.objects.select_related(
+        'entreprise_demandeuse', 'habilitation'
+    ).annotate(nb_stagiaires=Count('stagiaires')).order_by('-date_demande')[:10]
     
     # Sessions actives
     sessions_actives = SessionFormation.objects.filter(
@@ -75,71 +82,52 @@ def dashboard_admin_of(request):
         messages.error(request, "Votre profil n'est pas associé à un organisme de formation. Contactez l'administrateur.")
         return redirect('home')
     
-    # Stagiaires gérés par cet OF
-    total_stagiaires = Stagiaire.objects.filter(organisme_formation=organisme_formation).count()
-    stagiaires_independants = Stagiaire.objects.filter(
-        organisme_formation=organisme_formation,
-        entreprise__isnull=True
-    ).count()
-    
-    # Clients
-    pme_clientes = Entreprise.objects.filter(
-        type_entreprise='client',
-        stagiaires__organisme_formation=organisme_formation
-    ).distinct()
-    total_pme = pme_clientes.count()
-    
-    # Sessions
+    # Compteurs matérialisés (une ligne TenantDashboardStats par tenant)
     tenant_of = getattr(organisme_formation, 'tenant_of', None)
     if tenant_of:
-        sessions_en_cours = SessionFormation.objects.filter(
-            tenant=tenant_of,
-            statut='en_cours',
-            date_fin__gte=timezone.now().date()
-        ).count()
-        
+        stats = get_tenant_dashboard_stats(tenant_of)
+        counters = {field: getattr(stats, field) for field in (
+            'total_stagiaires', 'stagiaires_independants', 'total_pme', 'sessions_en_cours',
+            'demandes_en_attente', 'demandes_approuvees', 'formations_a_valider', 'titres_mois',
+            'titres_expires', 'titres_expirant', 'renouvellements_planifies',
+        )}
         sessions_recentes = SessionFormation.objects.filter(
             tenant=tenant_of
-        ).order_by('-date_debut')[:5]
+        ).select_related('habilitation').order_by('-date_debut')[:5]
     else:
-        sessions_en_cours = 0
+        counters = compute_dashboard_counters(organisme_formation, None)
         sessions_recentes = []
     
+    # Clients, avec leur nombre de stagiaires chez l'OF (un COUNT par ligne sinon)
+    pme_clientes = Entreprise.objects.filter(
+        type_entreprise='client',
+        stagiaires__organisme_formation=organisme_formation
+    ).annotate(nb_stagiaires=Count('stagiaires', distinct=True)).order_by('nom')
+    
     # Demandes de formation reçues
     demandes_en_attente = DemandeFormation.objects.filter(
         organisme_formation=organisme_formation,
         statut='en_attente'
-    )
-    
-    demandes_approuvees = DemandeFormation.objects.filter(
-        organisme_formation=organisme_formation,
-        statut='approuvee'
-    ).count()
-    
-    # Formations en attente de validation
-    formations_a_valider = Formation.objects.filter(
-        stagiaire__organisme_formation=organisme_formation,
-        statut='completee'
-    ).exclude(avis__isnull=False).count()
-    
-    # Titres délivrés ce mois
-    titres_mois = Titre.objects.filter(
-        stagiaire__organisme_formation=organisme_formation,
-        date_delivrance__gte=timezone.now().date().replace(day=1)
-    ).count()
+    ).select_related('entreprise_demandeuse', 'habilitation').annotate(
+        nb_stagiaires=Count('stagiaires')
+    ).order_by('-date_demande')
     
     context = {
         'organisme_formation': organisme_formation,
-        'total_stagiaires': total_stagiaires,
-        'stagiaires_independants': stagiaires_independants,
-        'total_pme': total_pme,
+        'total_stagiaires': counters['total_stagiaires'],
+        'stagiaires_independants': counters['stagiaires_independants'],
+        'total_pme': counters['total_pme'],
         'pme_clientes': pme_clientes[:5],  # 5 premières PME
-        'sessions_en_cours': sessions_en_cours,
+        'sessions_en_cours': counters['sessions_en_cours'],
         'sessions_recentes': sessions_recentes,
         'demandes_en_attente': demandes_en_attente,
-        'demandes_approuvees': demandes_approuvees,
-        'formations_a_valider': formations_a_valider,
-        'titres_mois': titres_mois,
+        'nb_demandes_en_attente': counters['demandes_en_attente'],
+        'demandes_approuvees': counters['demandes_approuvees'],
+        'formations_a_valider': counters['formations_a_valider'],
+        'titres_mois': counters['titres_mois'],
+        'titres_expires': counters['titres_expires'],
+        'titres_expirant': counters['titres_expirant'],
+        'renouvellements_planifies': counters['renouvellements_planifies'],
     }
     
     return render(request, 'habilitations_app/dashboard_admin_of.html', context)
@@ -151,7 +139,7 @@ def dashboard_formateur(request):
     """Tableau de bord Formateur - sessions et validations"""
     profil = request.user.profil
 
-    sessions_assignees = SessionFormation.objects.filter(formateur=request.user)
+    sessions_assignees = get_request_scope(request).sessions_assignees()
     if getattr(profil, 'tenant', None):
         sessions_assignees = sessions_assignees.filter(tenant=profil.tenant)
 
@@ -178,29 +166,15 @@ def dashboard_responsable_pme(request):
     entreprise = profil.entreprise
     
     # Récupérer l'OF qui gère cette PME
-    stagiaire_exemple = Stagiaire.objects.filter(entreprise=entreprise).first()
+    stagiaire_exemple = Stagiaire.objects.filter(entreprise=entreprise).select_related('organisme_formation').first()
     organisme_formation = stagiaire_exemple.organisme_formation if stagiaire_exemple else None
     
     # Stagiaires de la PME
     total_stagiaires = Stagiaire.objects.filter(entreprise=entreprise, actif=True).count()
     
-    # Formations
-    formations_en_cours = Formation.objects.filter(
-        stagiaire__entreprise=entreprise,
-        statut='en_cours'
-    ).count()
-    
-    formations_completees = Formation.objects.filter(
-        stagiaire__entreprise=entreprise,
-        statut='completee'
-    ).count()
-    
-    # Titres
-    titres_valides = Titre.objects.filter(
-        stagiaire__entreprise=entreprise,
-        statut='delivre',
-        date_expiration__gte=timezone.now().date()
-    ).count()
+    # Formations et titres : une requête agrégée par table
+    formations = formation_stats(Formation.objects.filter(stagiaire__entreprise=entreprise))
+    titres = titre_stats(Titre.objects.filter(stagiaire__entreprise=entreprise))
     
     # Alertes - Titres expirant dans 90 jours
     titres_expiration_proche = Titre.objects.filter(
@@ -208,35 +182,27 @@ def dashboard_responsable_pme(request):
         statut='delivre',
         date_expiration__lte=timezone.now().date() + timedelta(days=90),
         date_expiration__gte=timezone.now().date()
-    )
+    ).select_related('stagiaire', 'habilitation')
     
     # Demandes de formation
-    demandes_en_attente = DemandeFormation.objects.filter(
-        entreprise_demandeuse=entreprise,
-        statut='en_attente'
-    ).count()
-    
-    demandes_approuvees = DemandeFormation.objects.filter(
-        entreprise_demandeuse=entreprise,
-        statut='approuvee'
-    ).count()
+    demandes = demande_stats(DemandeFormation.objects.filter(entreprise_demandeuse=entreprise))
     
     # Dernières formations complétées
     formations_recentes = Formation.objects.filter(
         stagiaire__entreprise=entreprise,
         statut='completee'
-    ).order_by('-date_fin_reelle')[:5]
+    ).select_related('stagiaire', 'habilitation').order_by('-date_fin_reelle')[:5]
     
     context = {
         'entreprise': entreprise,
         'organisme_formation': organisme_formation,
         'total_stagiaires': total_stagiaires,
-        'formations_en_cours': formations_en_cours,
-        'formations_completees': formations_completees,
-        'titres_valides': titres_valides,
+        'formations_en_cours': formations['en_cours'],
+        'formations_completees': formations['completees'],
+        'titres_valides': titres['valides'],
         'titres_expiration_proche': titres_expiration_proche,
-        'demandes_en_attente': demandes_en_attente,
-        'demandes_approuvees': demandes_approuvees,
+        'demandes_en_attente': demandes['en_attente'],
+        'demandes_approuvees': demandes['approuvees'],
         'formations_recentes': formations_recentes,
     }
     
@@ -254,28 +220,28 @@ def dashboard_stagiaire(request):
         messages.error(request, "Aucun profil stagiaire associé à votre compte.")
         return redirect('home')
     
-    # Formations du stagiaire
-    formations = Formation.objects.filter(stagiaire=stagiaire).order_by('-date_debut')
-    formations_en_cours = formations.filter(statut='en_cours')
-    formations_completees = formations.filter(statut='completee')
-    
-    # Titres du stagiaire
-    titres = Titre.objects.filter(stagiaire=stagiaire).order_by('-date_delivrance')
-    titres_valides = titres.filter(
-        statut='delivre',
-        date_expiration__gte=timezone.now().date()
+    # Formations et titres du stagiaire : chargés une fois puis répartis en mémoire
+    formations = list(
+        Formation.objects.filter(stagiaire=stagiaire).select_related('habilitation', 'session').order_by('-date_debut')
     )
-    titres_expires = titres.filter(
-        statut='delivre',
-        date_expiration__lt=timezone.now().date()
+    formations_en_cours = [f for f in formations if f.statut == 'en_cours']
+    formations_completees = [f for f in formations if f.statut == 'completee']
+    
+    titres = list(
+        Titre.objects.filter(stagiaire=stagiaire).select_related('habilitation', 'specialisation').order_by('-date_delivrance')
     )
+    today = timezone.now().date()
+    titres_valides = [t for t in titres if t.statut == 'delivre' and t.date_expiration >= today]
+    titres_expires = [
+        t for t in titres
+        if t.statut == 'expire' or (t.statut == 'delivre' and t.date_expiration < today)
+    ]
     
     # Alertes - Titre expirant bientôt
-    titre_expiration_proche = titres.filter(
-        statut='delivre',
-        date_expiration__lte=timezone.now().date() + timedelta(days=90),
-        date_expiration__gte=timezone.now().date()
-    ).first()
+    titre_expiration_proche = next(
+        (t for t in titres_valides if t.date_expiration <= today + timedelta(days=90)),
+        None
+    )
     
     context = {
         'stagiaire': stagiaire,
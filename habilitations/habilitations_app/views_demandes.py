@@ -10,8 +10,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
-from .models import DemandeFormation, Stagiaire, Habilitation, SessionFormation, Formation
-from .middleware import get_accessible_stagiaires, get_accessible_demandes_formation
+from django.db import transaction
+from django.db.models import Count
+from .models import DemandeFormation, Stagiaire, Habilitation, SessionFormation, Formation, PlacesInsuffisantes
+from .scopes import get_request_scope
 from .decorators import role_required
 
 
@@ -89,7 +91,9 @@ def creer_demande_formation(request):
 @login_required
 def liste_demandes_formation(request):
     """Liste des demandes de formation selon le rôle"""
-    demandes = get_accessible_demandes_formation(request.user)
+    demandes = get_request_scope(request).demandes_formation().select_related(
+        'entreprise_demandeuse', 'habilitation'
+    ).annotate(nb_stagiaires=Count('stagiaires'))
     
     # Filtres
     statut = request.GET.get('statut')
@@ -204,42 +208,50 @@ def creer_session_from_demande(request, demande_pk):
     )
     
     if request.method == 'POST':
-        # Créer la session
-        session = SessionFormation.objects.create(
-            habilitation=demande.habilitation,
-            numero_session=request.POST.get('numero_session'),
-            organisme_formation=profil.entreprise.nom,
-            tenant=getattr(profil, 'tenant', None),
-            date_debut=request.POST.get('date_debut'),
-            date_fin=request.POST.get('date_fin'),
-            nombre_places=int(request.POST.get('nombre_places', 20)),
-            lieu=request.POST.get('lieu'),
-            notes=request.POST.get('notes', '')
-        )
-        
-        # Inscrire les stagiaires de la demande
-        for stagiaire in demande.stagiaires.all():
-            Formation.objects.create(
-                stagiaire=stagiaire,
-                habilitation=demande.habilitation,
-                session=session,
-                date_debut=session.date_debut,
-                date_fin_prevue=session.date_fin,
-                numero_session=session.numero_session,
-                organisme_formation=session.organisme_formation,
-                tenant=session.tenant,
-                statut='en_cours'
+        try:
+            # Session et inscriptions ensemble : rien n'est créé si la session est trop petite
+            with transaction.atomic():
+                # Créer la session
+                session = SessionFormation.objects.create(
+                    habilitation=demande.habilitation,
+                    numero_session=request.POST.get('numero_session'),
+                    organisme_formation=profil.entreprise.nom,
+                    tenant=getattr(profil, 'tenant', None),
+                    date_debut=request.POST.get('date_debut'),
+                    date_fin=request.POST.get('date_fin'),
+                    nombre_places=int(request.POST.get('nombre_places', 20)),
+                    lieu=request.POST.get('lieu'),
+                    notes=request.POST.get('notes', '')
+                )
+
+                # Inscrire les stagiaires de la demande
+                for stagiaire in demande.stagiaires.all():
+                    Formation.objects.create(
+                        stagiaire=stagiaire,
+                        habilitation=demande.habilitation,
+                        session=session,
+                        date_debut=session.date_debut,
+                        date_fin_prevue=session.date_fin,
+                        numero_session=session.numero_session,
+                        organisme_formation=session.organisme_formation,
+                        tenant=session.tenant,
+                        statut='en_cours'
+                    )
+
+                # Lier la session à la demande
+                demande.session_creee = session
+                demande.save()
+        except PlacesInsuffisantes:
+            messages.error(
+                request,
+                f"La session n'a pas assez de places pour les {demande.nombre_stagiaires} stagiaire(s) de la demande."
             )
-        
-        # Lier la session à la demande
-        demande.session_creee = session
-        demande.save()
-        
-        messages.success(
-            request,
-            f"Session créée et {demande.nombre_stagiaires} stagiaire(s) inscrit(s) avec succès."
-        )
-        return redirect('detail_session_formation', pk=session.pk)
+        else:
+            messages.success(
+                request,
+                f"Session créée et {demande.nombre_stagiaires} stagiaire(s) inscrit(s) avec succès."
+            )
+            return redirect('detail_session_formation', pk=session.pk)
     
     context = {
         'demande': demande,
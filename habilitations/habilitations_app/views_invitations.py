@@ -7,9 +7,11 @@ from django.contrib import messages
 from django.utils import timezone
 from django.contrib.auth import login as auth_login
 from django.contrib.auth.models import User
+from django.db import transaction
 from .decorators import admin_of_required
 from .models import Entreprise, InvitationEntreprise, ProfilUtilisateur
 from .forms import EntrepriseForm, InvitationEntrepriseForm
+from .notifications import notifier_invitation
 
 
 @login_required
@@ -72,20 +74,26 @@ def inviter_client(request, client_id=None):
                         'client': client,
                     })
                 
-                client_obj = entreprise_form.save(commit=False)
-                client_obj.type_entreprise = 'client'
-                client_obj.save()
-            
-            # Créer l'invitation
-            invitation = invitation_form.save(commit=False)
-            invitation.organisme_formation = organisme_formation
-            invitation.entreprise_client = client_obj
-            invitation.created_by = request.user
-            invitation.save()
-            
-            # Lien d'invitation
-            lien = request.build_absolute_uri(f"/invite/{invitation.token}/")
-            messages.success(request, f"Invitation envoyée pour '{client_obj.nom}'. Lien: {lien}")
+            # Client, invitation et email dans la même transaction (outbox)
+            with transaction.atomic():
+                if not client:
+                    client_obj = entreprise_form.save(commit=False)
+                    client_obj.type_entreprise = 'client'
+                    client_obj.save()
+                
+                # Créer l'invitation
+                invitation = invitation_form.save(commit=False)
+                invitation.organisme_formation = organisme_formation
+                invitation.entreprise_client = client_obj
+                invitation.created_by = request.user
+                invitation.save()
+                
+                # Lien d'invitation, envoyé par email via l'outbox
+                lien = request.build_absolute_uri(f"/invite/{invitation.token}/")
+                notifier_invitation(invitation, lien)
+            messages.success(
+                request, f"Invitation envoyée à {invitation.email_contact} pour '{client_obj.nom}'. Lien: {lien}"
+            )
             
             return render(request, 'habilitations_app/invitation_success.html', {
                 'entreprise': client_obj,